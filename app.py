@@ -1,13 +1,13 @@
 import streamlit as st
-from chat_manager import ChatManager
-from workflow_manager import create_workflow
+from chat_manager import ChatManager, CHAT_PAGE_SIZE
+from chat_export import EXPORT_FORMATS, export_to_file
 from tools_manager import (
     display_business_model_canvas,
     display_burn_rate_calculator,
     display_pitch_deck_generator,
-    ToolsManager
+    display_unit_economics_calculator,
+    display_budget_warning
 )
-from langchain_core.messages import HumanMessage
 import os
 from urllib.parse import urlparse
 from help_guide import (
@@ -18,65 +18,12 @@ from help_guide import (
     display_best_practices,
     display_faq
 )
-from tool_llm import ToolLLM
 from dashboard import display_dashboard
-from token_tracker import TokenTracker
+from token_tracker import usage_scope
+from resources import get_resource, warm_up_resources
+from rate_limiter import BudgetExceededError
 from translations import get_text
 
-# Set page config (must be first Streamlit command)
-st.set_page_config(
-    page_title="Startup Mentor",
-    page_icon="🚀",
-    layout="wide"
-)
-
-# Add custom CSS for chat layout
-st.markdown("""
-    <style>
-        .main > div {
-            padding-bottom: 5rem;
-        }
-        .stChatInput {
-            position: fixed;
-            bottom: 0;
-            background-color: white;
-            padding: 1rem;
-            z-index: 999;
-            width: 800px;
-            left: 50%;
-            transform: translateX(-50%);
-        }
-        @media (max-width: 900px) {
-            .stChatInput {
-                width: 90%;
-            }
-        }
-    </style>
-""", unsafe_allow_html=True)
-
-# Initialize session state
-if "messages" not in st.session_state:
-    st.session_state.messages = []
-
-# Initialize session state for language
-if 'language' not in st.session_state:
-    st.session_state.language = "en"
-
-# Initialize chat manager
-chat_manager = ChatManager()
-
-# Initialize workflow
-workflow = create_workflow()
-
-# Initialize the tool-specific LLM
-tool_llm = ToolLLM()
-
-# Initialize the tools manager
-tools_manager = ToolsManager()
-
-# Initialize token tracker
-token_tracker = TokenTracker()
-
 def process_tool_request(user_input: str) -> str:
     """
     Process tool-specific requests using the dedicated GPT-3.5 model.
@@ -121,14 +68,11 @@ def chat(user_input: str, chat_history: list) -> tuple:
     
     if is_tool_request:
         # Use GPT-3.5 for tool-specific requests
+        # Token usage is recorded by the usage callback on the model
         response = process_tool_request(user_input)
-        # Track token usage for tool requests
-        token_tracker.track_usage("gpt-3.5-turbo", user_input, response)
     else:
         # Use the main LLM for general conversation
         response = llm.invoke(user_input)
-        # Track token usage for general conversation
-        token_tracker.track_usage("gpt-4", user_input, response)
     
     # Update chat history
     chat_history.append({"role": "user", "content": user_input})
@@ -150,9 +94,21 @@ def display_chat_tab():
     """Display the chat interface."""
     st.markdown(get_text("chat_welcome", st.session_state.language))
     
-    # Chat interface
-    for message in chat_manager.get_messages():
-        with st.chat_message("user" if isinstance(message, HumanMessage) else "assistant"):
+    # Chat interface: the last pages of the stored history, older ones on request
+    if "chat_pages" not in st.session_state:
+        st.session_state.chat_pages = 1
+    shown = CHAT_PAGE_SIZE * st.session_state.chat_pages
+    # One message more than shown tells whether there are older ones
+    messages = chat_manager.get_recent(shown + 1)
+    if len(messages) > shown:
+        messages = messages[1:]
+        st.button(
+            get_text("load_older", st.session_state.language),
+            key="load_older_messages",
+            on_click=lambda: setattr(st.session_state, "chat_pages", st.session_state.chat_pages + 1)
+        )
+    for message in messages:
+        with st.chat_message("user" if message.role == "human" else "assistant"):
             st.markdown(message.content)
     
     # Chat input
@@ -168,45 +124,56 @@ def display_chat_tab():
         with st.chat_message("assistant"):
             with st.spinner(get_text("thinking", st.session_state.language)):
                 # Run workflow
-                result = workflow.invoke({
-                    "messages": chat_manager.get_messages(),
-                    "context": [],
-                    "is_startup_related": True
-                })
+                try:
+                    with usage_scope() as usage:
+                        result = workflow.invoke({
+                            "messages": chat_manager.get_messages(),
+                            "context": [],
+                            "is_startup_related": True
+                        })
+                except BudgetExceededError as e:
+                    display_budget_warning(e)
+                    return
                 
                 # Get the response content
                 response_content = result["messages"][-1].content
                 
-                # Track token usage
-                token_tracker.track_usage("gpt-4", prompt, response_content)
+                # Keep only what is displayed of the sources, not the retrieved documents
+                is_startup_related = result.get("is_startup_related", True)
+                sources = []
+                for doc in result.get("context") or []:
+                    source = doc.metadata.get("source", "Unknown")
+                    if source.endswith(".pdf"):
+                        source_display = os.path.basename(source)
+                    else:
+                        parsed = urlparse(source)
+                        source_display = parsed.netloc.replace("www.", "")
+                    preview = doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
+                    sources.append({"source": source_display, "preview": preview})
                 
                 # Add AI response
-                chat_manager.add_ai_message(response_content)
+                chat_manager.add_ai_message(response_content, {
+                    "sources": sources,
+                    "is_startup_related": is_startup_related,
+                    "tokens": usage
+                })
                 
                 # Display response
                 st.markdown(response_content)
                 
                 # Display context for startup-related questions
-                if result.get("is_startup_related", True) and "context" in result and result["context"]:
+                if is_startup_related and sources:
                     st.markdown("---")
                     st.markdown(f"**{get_text('sources', st.session_state.language)}**")
-                    for i, doc in enumerate(result["context"], 1):
-                        source = doc.metadata.get("source", "Unknown")
-                        if source.endswith(".pdf"):
-                            source_display = os.path.basename(source)
-                        else:
-                            parsed = urlparse(source)
-                            source_display = parsed.netloc.replace("www.", "")
-                        
+                    for i, source in enumerate(sources, 1):
                         # Display source and preview
-                        preview = doc.page_content[:150] + "..." if len(doc.page_content) > 150 else doc.page_content
                         st.markdown(f"""
                             <div style='font-size: 0.8em; color: #666; margin: 5px 0;'>
-                                <strong>Source {i}:</strong> {source_display}<br>
-                                <em>{preview}</em>
+                                <strong>Source {i}:</strong> {source["source"]}<br>
+                                <em>{source["preview"]}</em>
                             </div>
                         """, unsafe_allow_html=True)
-                elif result.get("is_startup_related", True):
+                elif is_startup_related:
                     st.markdown("---")
                     st.markdown(f"*{get_text('no_sources', st.session_state.language)}*")
 
@@ -245,85 +212,145 @@ def display_tools_tab():
             """
             result = tools_manager.execute_tool("pitch_deck", input_data)
             st.markdown(result)
+    
+    # Unit Economics (calculated locally, no LLM call)
+    with st.expander(f"📐 {get_text('unit_economics_title', st.session_state.language)}"):
+        display_unit_economics_calculator()
+
+# Streamlit runs this script as __main__. Worker processes spawned for PDF
+# rendering (see pdf_jobs) import it as __mp_main__ and only need its definitions.
+if __name__ == "__main__":
+    # Set page config (must be first Streamlit command)
+    st.set_page_config(
+        page_title="Startup Mentor",
+        page_icon="🚀",
+        layout="wide"
+    )
 
-# Sidebar
-with st.sidebar:
-    st.title("🚀 Startup Mentor")
+    # Add custom CSS for chat layout
     st.markdown("""
-    Your AI-powered startup advisor. Get help with:
-    - Business strategy
-    - Market analysis
-    - Financial planning
-    - Pitch deck creation
-    - And more!
-    """)
-    
-    # Help Guide Section
-    st.markdown("---")
-    st.subheader("📚 Help Guide")
-    
-    # Getting Started Section
-    with st.expander("🚀 Getting Started"):
-        display_getting_started()
-    
-    # RAG Process Visualization
-    with st.expander("🔄 How It Works"):
-        display_rag_visualization()
-    
-    # Features Section
-    with st.expander("✨ Key Features"):
-        display_key_features()
-    
-    # Tools Guide Section
-    with st.expander("🛠️ Tools Guide"):
-        display_tools_guide()
-    
-    # Best Practices Section
-    with st.expander("💡 Best Practices"):
-        display_best_practices()
-    
-    # FAQ Section
-    with st.expander("❓ FAQ"):
-        display_faq()
-    
-    st.markdown("---")
-    
-    # Export chat history
-    if st.button("Export Chat History"):
-        chat_json = chat_manager.export_messages()
+        <style>
+            .main > div {
+                padding-bottom: 5rem;
+            }
+            .stChatInput {
+                position: fixed;
+                bottom: 0;
+                background-color: white;
+                padding: 1rem;
+                z-index: 999;
+                width: 800px;
+                left: 50%;
+                transform: translateX(-50%);
+            }
+            @media (max-width: 900px) {
+                .stChatInput {
+                    width: 90%;
+                }
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Initialize session state for language
+    if 'language' not in st.session_state:
+        st.session_state.language = "en"
+
+    # Build the shared resources once per server process; later reruns only look them up
+    warm_up_resources()
+
+    # Initialize chat manager (per session)
+    chat_manager = ChatManager()
+
+    # Shared by all sessions in this process: workflow, tool-specific LLM,
+    # tools manager and token tracker
+    workflow = get_resource("workflow")
+    tool_llm = get_resource("tool_llm")
+    tools_manager = get_resource("tools_manager")
+    token_tracker = get_resource("token_tracker")
+
+    # Sidebar
+    with st.sidebar:
+        st.title("🚀 Startup Mentor")
+        st.markdown("""
+        Your AI-powered startup advisor. Get help with:
+        - Business strategy
+        - Market analysis
+        - Financial planning
+        - Pitch deck creation
+        - And more!
+        """)
+
+        # Help Guide Section
+        st.markdown("---")
+        st.subheader("📚 Help Guide")
+
+        # Getting Started Section
+        with st.expander("🚀 Getting Started"):
+            display_getting_started()
+
+        # RAG Process Visualization
+        with st.expander("🔄 How It Works"):
+            display_rag_visualization()
+
+        # Features Section
+        with st.expander("✨ Key Features"):
+            display_key_features()
+
+        # Tools Guide Section
+        with st.expander("🛠️ Tools Guide"):
+            display_tools_guide()
+
+        # Best Practices Section
+        with st.expander("💡 Best Practices"):
+            display_best_practices()
+
+        # FAQ Section
+        with st.expander("❓ FAQ"):
+            display_faq()
+
+        st.markdown("---")
+
+        # Export chat history; the file is only built when the button is clicked
+        export_format = st.selectbox(
+            "Export format",
+            list(EXPORT_FORMATS),
+            format_func=lambda key: EXPORT_FORMATS[key].label,
+            key="chat_export_format"
+        )
         st.download_button(
             label="Download Chat History",
-            data=chat_json,
-            file_name="chat_history.json",
-            mime="application/json"
+            data=lambda: export_to_file(chat_manager.export_messages(export_format)),
+            file_name=EXPORT_FORMATS[export_format].file_name,
+            mime=EXPORT_FORMATS[export_format].mime,
+            on_click="ignore"
         )
-    
-    # Clear chat
-    if st.button("Clear Chat"):
-        chat_manager.clear_messages()
-        st.rerun()
 
-# Main app
-st.title(get_text("app_title", st.session_state.language))
+        # Clear chat
+        if st.button("Clear Chat"):
+            chat_manager.clear_messages()
+            st.rerun()
+
+    # Main app
+    st.title(get_text("app_title", st.session_state.language))
 
-# Create tabs
-tab1, tab2, tab3 = st.tabs([
-    get_text("chat_tab", st.session_state.language),
-    get_text("tools_tab", st.session_state.language),
-    get_text("dashboard_tab", st.session_state.language)
-])
+    # Create tabs
+    tab1, tab2, tab3 = st.tabs([
+        get_text("chat_tab", st.session_state.language),
+        get_text("tools_tab", st.session_state.language),
+        get_text("dashboard_tab", st.session_state.language)
+    ])
 
-# Display language selector in sidebar
-display_language_selector()
+    # Display language selector in sidebar
+    display_language_selector()
 
-with tab1:
-    display_chat_tab()
+    with tab1:
+        display_chat_tab()
 
-with tab2:
-    display_tools_tab()
+    with tab2:
+        display_tools_tab()
 
-with tab3:
-    display_dashboard()
+    with tab3:
+        display_dashboard()
 
-# Display token usage
-display_token_usage()
+    # Display token usage
+    display_token_usage()
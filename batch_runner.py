@@ -0,0 +1,211 @@
+"""Headless batch generation of Business Model Canvases and pitch decks for a cohort.
+
+Reads startups from a CSV or JSONL file with the columns id, problem, solution and
+target_group (optionally business_model, market_size and funding_needed), runs the
+generations concurrently and appends every result to <out>/results.jsonl as soon as
+it completes. Pitch decks are also written as PDFs to <out>/pdfs/, rendered in a
+process pool across all cores while further generations are still running.
+PDFs go through the content-hash cache of pdf_jobs, so identical decks in a
+cohort are rendered once.
+
+Re-running the same command resumes an interrupted batch: generations already
+recorded as successful in results.jsonl are skipped.
+
+Usage:
+    python batch_runner.py cohort.csv --out cohort_results --concurrency 8
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Set, Tuple
+from dotenv import load_dotenv
+from calculators import generate_business_model_canvas, generate_pitch_deck
+from pdf_jobs import submit_pdf_job
+
+KINDS = ("business_model_canvas", "pitch_deck")
+
+def load_startups(path: str) -> List[Dict[str, str]]:
+    """Load startups from a CSV or JSONL file, giving rows without an id their line number."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            startups = [json.loads(line) for line in f if line.strip()]
+        else:
+            startups = list(csv.DictReader(f))
+
+    for number, startup in enumerate(startups, 1):
+        startup["id"] = str(startup.get("id") or number)
+        missing = [field for field in ("problem", "solution", "target_group") if not startup.get(field)]
+        if missing:
+            raise ValueError(f"Startup {startup['id']} is missing: {', '.join(missing)}")
+    return startups
+
+def load_completed(results_path: str) -> Set[Tuple[str, str]]:
+    """Return the (startup id, kind) pairs already generated successfully."""
+    completed = set()
+    if not os.path.exists(results_path):
+        return completed
+    with open(results_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A batch killed mid-write can leave a truncated last line
+                continue
+            if record.get("status") == "ok":
+                completed.add((record["id"], record["kind"]))
+    return completed
+
+def run_generation(startup: Dict[str, str], kind: str, retries: int, regenerate: bool) -> Dict[str, Any]:
+    """Run one generation with exponential backoff and return its result record."""
+    inputs = {
+        "problem": startup["problem"],
+        "solution": startup["solution"],
+        "target_group": startup["target_group"]
+    }
+    started = time.time()
+
+    for attempt in range(retries + 1):
+        try:
+            if kind == "business_model_canvas":
+                result = generate_business_model_canvas(**inputs, regenerate=regenerate)
+            else:
+                result = generate_pitch_deck(
+                    **inputs,
+                    business_model=startup.get("business_model", ""),
+                    market_size=startup.get("market_size", ""),
+                    funding_needed=startup.get("funding_needed", ""),
+                    regenerate=regenerate
+                )
+            return {
+                "id": startup["id"],
+                "kind": kind,
+                "status": "ok",
+                "attempts": attempt + 1,
+                "seconds": round(time.time() - started, 2),
+                "result": result
+            }
+        except Exception as e:
+            error = str(e)
+            if attempt < retries:
+                time.sleep(2 ** attempt + random.random())
+
+    return {
+        "id": startup["id"],
+        "kind": kind,
+        "status": "error",
+        "attempts": retries + 1,
+        "seconds": round(time.time() - started, 2),
+        "error": error
+    }
+
+def run_batch(input_path: str, out_dir: str, kinds: List[str], concurrency: int = 8,
+              retries: int = 3, regenerate: bool = False) -> Dict[str, Any]:
+    """
+    Generate all requested results for a cohort, skipping ones already completed.
+
+    Args:
+        input_path (str): CSV or JSONL file with the startups
+        out_dir (str): Directory for results.jsonl and the PDFs
+        kinds (list): Generations to run per startup, see KINDS
+        concurrency (int): Maximum generations running at once
+        retries (int): Retries per generation after a failure
+        regenerate (bool): Bypass the result cache
+
+    Returns:
+        dict: Batch summary with counts, duration and throughput
+    """
+    startups = load_startups(input_path)
+    pdf_dir = os.path.join(out_dir, "pdfs")
+    os.makedirs(pdf_dir, exist_ok=True)
+    results_path = os.path.join(out_dir, "results.jsonl")
+    completed = load_completed(results_path)
+
+    jobs = [
+        (startup, kind)
+        for startup in startups
+        for kind in kinds
+        if (startup["id"], kind) not in completed
+    ]
+    print(f"{len(startups)} startups, {len(completed)} generations already done, {len(jobs)} to run")
+
+    summary = {"ok": 0, "error": 0, "skipped": len(completed)}
+    started = time.time()
+    with open(results_path, "a", encoding="utf-8") as results, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+
+        def write_record(record):
+            results.write(json.dumps(record) + "\n")
+            results.flush()
+            summary[record["status"]] += 1
+
+        def finish_pdfs(pending, wait):
+            """Write the records of rendered PDFs and return those still rendering."""
+            still_rendering = []
+            for record, pdf_path, pdf_job in pending:
+                if not wait and not pdf_job.done():
+                    still_rendering.append((record, pdf_path, pdf_job))
+                    continue
+                try:
+                    with open(pdf_path, "wb") as pdf:
+                        pdf.write(pdf_job.result())
+                    record["pdf"] = pdf_path
+                except Exception as e:
+                    # Not recorded as done, so a resumed batch generates and renders it again
+                    record.update(status="error", error=f"PDF rendering failed: {e}")
+                write_record(record)
+            return still_rendering
+
+        # Pitch deck records are written once their PDF has been rendered in the process pool
+        pending_pdfs = []
+        futures = [executor.submit(run_generation, startup, kind, retries, regenerate) for startup, kind in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            if record["status"] == "ok" and record["kind"] == "pitch_deck":
+                pdf_path = os.path.join(pdf_dir, f"{record['id']}_pitch_deck.pdf")
+                pending_pdfs.append((record, pdf_path, submit_pdf_job(record["result"])))
+            else:
+                write_record(record)
+            pending_pdfs = finish_pdfs(pending_pdfs, wait=False)
+
+            elapsed = time.time() - started
+            print(
+                f"[{done}/{len(jobs)}] {record['kind']} for {record['id']}: {record['status']} "
+                f"({record['seconds']}s, {done / elapsed * 60:.1f} generations/min)"
+            )
+        finish_pdfs(pending_pdfs, wait=True)
+
+    summary["seconds"] = round(time.time() - started, 1)
+    summary["per_minute"] = round(len(jobs) / summary["seconds"] * 60, 1) if jobs and summary["seconds"] else 0.0
+    return summary
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Generate Business Model Canvases and pitch decks for a cohort.")
+    parser.add_argument("input", help="CSV or JSONL file with id, problem, solution and target_group")
+    parser.add_argument("--out", default="batch_results", help="Output directory (default: batch_results)")
+    parser.add_argument("--kinds", default=",".join(KINDS), help="Comma-separated generations to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Generations running at once (default: 8)")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per failed generation (default: 3)")
+    parser.add_argument("--regenerate", action="store_true", help="Ignore cached results")
+    args = parser.parse_args()
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"Unknown kinds: {', '.join(unknown)}")
+
+    summary = run_batch(args.input, args.out, kinds, args.concurrency, args.retries, args.regenerate)
+    print(
+        f"Done: {summary['ok']} ok, {summary['error']} failed, {summary['skipped']} skipped "
+        f"in {summary['seconds']}s ({summary['per_minute']} generations/min)"
+    )
+    sys.exit(1 if summary["error"] else 0)
+
+if __name__ == "__main__":
+    main()
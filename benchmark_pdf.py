@@ -0,0 +1,96 @@
+"""Benchmark of pitch deck PDF rendering over synthetic decks.
+
+Renders synthetic decks shaped like generated ones (every field of
+PITCH_DECK_LAYOUT filled, lists of several bullet points) and reports the
+rendering throughput, latency percentiles and peak memory of one render.
+
+Usage:
+    python benchmark_pdf.py --decks 200 --items 4 --words 12
+"""
+
+import argparse
+import random
+import statistics
+import time
+import tracemalloc
+from typing import Any, Dict, List
+from pdf_generator import create_pitch_deck_pdf
+from pitch_deck_layout import PITCH_DECK_LAYOUT
+
+WORDS = (
+    "customers market product growth revenue team platform data pricing channel "
+    "investors traction retention launch pilot partners scale cost margin roadmap"
+).split()
+
+def synthetic_deck(rng: random.Random, items: int, words: int) -> Dict[str, Any]:
+    """A pitch deck with random text in every field of the layout."""
+    def sentence():
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    return {
+        layout["key"]: {
+            field: [sentence() for _ in range(items)] if kind == "list" else sentence()
+            for field, _, kind in layout["fields"]
+        }
+        for layout in PITCH_DECK_LAYOUT
+    }
+
+def run_benchmark(decks: int, items: int, words: int, warmup: int = 5, seed: int = 0) -> Dict[str, float]:
+    """
+    Render synthetic decks one after another and measure them.
+
+    Args:
+        decks (int): Decks rendered in the timed run
+        items (int): Bullet points per list field
+        words (int): Words per sentence
+        warmup (int): Untimed renders first, e.g. for font loading
+        seed (int): Random seed of the synthetic text
+
+    Returns:
+        dict: Throughput, latency percentiles, PDF size and peak memory
+    """
+    rng = random.Random(seed)
+    samples = [synthetic_deck(rng, items, words) for _ in range(min(decks, 20))]
+    for index in range(warmup):
+        create_pitch_deck_pdf(samples[index % len(samples)])
+
+    latencies: List[float] = []
+    size = 0
+    started = time.perf_counter()
+    for index in range(decks):
+        render_started = time.perf_counter()
+        size += len(create_pitch_deck_pdf(samples[index % len(samples)]))
+        latencies.append(time.perf_counter() - render_started)
+    elapsed = time.perf_counter() - started
+
+    # Peak memory of a single render, measured separately since tracing slows rendering down
+    tracemalloc.start()
+    create_pitch_deck_pdf(samples[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "decks_per_second": decks / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+        "average_kb": size / decks / 1024,
+        "peak_memory_mb": peak / 1024 / 1024
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pitch deck PDF rendering.")
+    parser.add_argument("--decks", type=int, default=200, help="Decks to render (default: 200)")
+    parser.add_argument("--items", type=int, default=4, help="Bullet points per list (default: 4)")
+    parser.add_argument("--words", type=int, default=12, help="Words per sentence (default: 12)")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.decks, args.items, args.words)
+    print(
+        f"{args.decks} decks: {result['decks_per_second']:.1f} decks/s, "
+        f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+        f"{result['average_kb']:.1f} KB per PDF, peak memory {result['peak_memory_mb']:.2f} MB per render"
+    )
+
+if __name__ == "__main__":
+    main()
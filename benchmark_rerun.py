@@ -0,0 +1,89 @@
+"""Benchmark of what a Streamlit rerun spends on the app's shared objects.
+
+Compares building the objects the app script used to create on every rerun
+(ToolLLM, ToolsManager and a TokenTracker that reads its usage store) with
+looking them up in the resource registry, as the script does now. With --app,
+it also times full reruns of the app script with Streamlit's AppTest.
+
+No requests are sent to the API; a placeholder key is used if none is set.
+
+Usage:
+    python benchmark_rerun.py --reruns 50
+    python benchmark_rerun.py --reruns 20 --app app.py
+"""
+
+import argparse
+import os
+import statistics
+import time
+from typing import Callable, Dict, List
+from resources import get_resource, warm_up_resources
+
+SHARED_RESOURCES = ("tool_llm", "tools_manager", "token_tracker")
+
+def rebuild_per_rerun():
+    """What the app script did on every rerun before the registry."""
+    from token_tracker import TokenTracker
+    from tool_llm import ToolLLM
+    from tools_manager import ToolsManager
+    ToolLLM()
+    ToolsManager()
+    TokenTracker()
+
+def lookup_per_rerun():
+    """What the app script does on every rerun with the registry."""
+    for name in SHARED_RESOURCES:
+        get_resource(name)
+
+def time_reruns(rerun: Callable[[], object], reruns: int) -> Dict[str, float]:
+    """
+    Call a function once untimed, then time it over a number of calls.
+
+    Args:
+        rerun (callable): What one rerun does
+        reruns (int): Timed calls
+
+    Returns:
+        dict: Mean, p50 and p95 latency in milliseconds
+    """
+    rerun()
+    latencies: List[float] = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        rerun()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    }
+
+def time_app_reruns(path: str, reruns: int) -> Dict[str, float]:
+    """Time full reruns of a Streamlit script after its first run."""
+    from streamlit.testing.v1 import AppTest
+    app = AppTest.from_file(path, default_timeout=120)
+    return time_reruns(app.run, reruns)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-rerun cost of the app's shared objects.")
+    parser.add_argument("--reruns", type=int, default=50, help="Timed reruns (default: 50)")
+    parser.add_argument("--app", help="Also time full reruns of this Streamlit script, e.g. app.py")
+    args = parser.parse_args()
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+    started = time.perf_counter()
+    warm_up_resources()
+    print(f"Warmup: {(time.perf_counter() - started) * 1000:.0f} ms once per process")
+
+    for label, rerun in (("Rebuilt per rerun", rebuild_per_rerun), ("Registry lookup", lookup_per_rerun)):
+        result = time_reruns(rerun, args.reruns)
+        print(f"{label}: mean {result['mean_ms']:.3f} ms, p50 {result['p50_ms']:.3f} ms, p95 {result['p95_ms']:.3f} ms")
+
+    if args.app:
+        result = time_app_reruns(args.app, args.reruns)
+        print(f"Full rerun of {args.app}: mean {result['mean_ms']:.1f} ms, "
+              f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
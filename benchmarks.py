@@ -0,0 +1,106 @@
+"""Percentile ranks of a startup's metrics against a reference dataset of peers.
+
+The reference dataset is a local CSV file with one row per startup and the
+columns stage, monthly_burn, runway_months and revenue_growth (monthly revenue
+growth in percent). It is loaded once per server process into one sorted NumPy
+array per metric and stage, so a percentile lookup is a binary search.
+
+Configuration (environment variables):
+    BENCHMARK_PATH: CSV file of the reference dataset (default: benchmarks.csv)
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+BENCHMARK_PATH = os.getenv("BENCHMARK_PATH", "benchmarks.csv")
+
+# Metric column -> display label
+BENCHMARK_METRICS = {
+    "monthly_burn": "Monthly Net Burn",
+    "runway_months": "Runway",
+    "revenue_growth": "Monthly Revenue Growth"
+}
+ALL_STAGES = "All stages"
+
+class BenchmarkIndex:
+    """Sorted metric values per stage of a reference dataset, for percentile lookups."""
+
+    def __init__(self, data: pd.DataFrame):
+        missing = [column for column in ("stage", *BENCHMARK_METRICS) if column not in data.columns]
+        if missing:
+            raise ValueError(f"Benchmark dataset is missing the columns: {', '.join(missing)}")
+
+        stages = data["stage"].astype(str).str.strip()
+        self._values: Dict[Tuple[str, str], np.ndarray] = {}
+        for metric in BENCHMARK_METRICS:
+            values = pd.to_numeric(data[metric], errors="coerce").to_numpy(dtype=float)
+            valid = ~np.isnan(values)
+            self._values[(metric, ALL_STAGES)] = np.sort(values[valid])
+            for stage in stages.unique():
+                self._values[(metric, stage)] = np.sort(values[valid & (stages == stage).to_numpy()])
+        self.stages: List[str] = sorted(stages.unique())
+        self.size = len(data)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "BenchmarkIndex":
+        """Load the reference dataset from a CSV file."""
+        return cls(pd.read_csv(path, usecols=lambda column: column in ("stage", *BENCHMARK_METRICS)))
+
+    def peers(self, metric: str, stage: str = ALL_STAGES) -> int:
+        """Number of startups with a value for the metric at a stage."""
+        return len(self._values.get((metric, stage), ()))
+
+    def percentile(self, metric: str, value: float, stage: str = ALL_STAGES) -> Optional[float]:
+        """
+        Percentile rank of a value among the peers at a stage.
+
+        Ties count half, so a value equal to every peer ranks at the 50th percentile.
+
+        Args:
+            metric (str): One of BENCHMARK_METRICS
+            value (float): The startup's value
+            stage (str): Stage to compare with, or ALL_STAGES
+
+        Returns:
+            float: Share of peers below the value in percent, or None without peers
+        """
+        values = self._values.get((metric, stage))
+        if values is None or not len(values):
+            return None
+        below = np.searchsorted(values, value, side="left")
+        at_or_below = np.searchsorted(values, value, side="right")
+        return float((below + at_or_below) / 2 / len(values) * 100)
+
+    def quantiles(self, metric: str, stage: str = ALL_STAGES, points=(25, 50, 75)) -> Optional[np.ndarray]:
+        """Values of the peers at the given percentiles, e.g. the quartiles."""
+        values = self._values.get((metric, stage))
+        if values is None or not len(values):
+            return None
+        return np.percentile(values, points)
+
+_index: Optional[BenchmarkIndex] = None
+_index_path: Optional[str] = None
+_lock = threading.Lock()
+
+def get_benchmark_index(path: Optional[str] = None) -> Optional[BenchmarkIndex]:
+    """
+    Get the process-wide benchmark index, loading it on first use.
+
+    Args:
+        path (str): CSV file of the reference dataset, BENCHMARK_PATH by default
+
+    Returns:
+        BenchmarkIndex: The loaded index, or None if the file does not exist
+    """
+    global _index, _index_path
+    path = path or BENCHMARK_PATH
+    with _lock:
+        if _index is None or _index_path != path:
+            if not os.path.exists(path):
+                return None
+            _index = BenchmarkIndex.from_csv(path)
+            _index_path = path
+        return _index
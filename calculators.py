@@ -1,160 +1,636 @@
-from langchain.chat_models import ChatOpenAI
-from typing import Dict, Any, List
+from llm_clients import get_chat_model
+from token_tracker import current_session_id, session_scope
+from rate_limiter import guard_llm
+from result_cache import get_result_cache
+from pitch_deck_layout import SLIDE_TITLES
+from json_stream import JSONObjectStream
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import json
+import os
+import threading
 
-def calculate_burn_rate(capital: float, monthly_expenses: float) -> Dict[str, Any]:
-    """Calculate burn rate and runway based on capital and monthly expenses."""
-    llm = ChatOpenAI(temperature=0)
-    
-    # Define the function schema
-    function_schema = {
-        "name": "calculate_burn_rate",
-        "description": "Calculate burn rate and runway for a startup",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "runway_months": {
-                    "type": "number",
-                    "description": "Number of months the startup can operate with current capital"
-                },
-                "burn_rate": {
-                    "type": "number",
-                    "description": "Monthly burn rate in currency units"
-                },
-                "warning_level": {
-                    "type": "string",
-                    "enum": ["critical", "warning", "healthy"],
-                    "description": "Warning level based on runway"
-                },
-                "recommendation": {
-                    "type": "string",
-                    "description": "Recommendation based on the calculation"
-                }
-            },
-            "required": ["runway_months", "burn_rate", "warning_level", "recommendation"]
-        }
+# Runway in months below which the warning levels apply
+CRITICAL_RUNWAY_MONTHS = 3
+WARNING_RUNWAY_MONTHS = 6
+
+BURN_RATE_RECOMMENDATIONS = {
+    "critical": (
+        "Runway is below 3 months. Start fundraising or bridge financing immediately, "
+        "cut non-essential spending and prioritise activities that bring in cash quickly."
+    ),
+    "warning": (
+        "Runway is between 3 and 6 months. Begin fundraising now, since rounds typically take "
+        "3-6 months, and review your largest expense categories for savings."
+    ),
+    "healthy": (
+        "Runway is above 6 months. Keep tracking burn monthly, plan your next raise well ahead "
+        "of time and invest in growth where it clearly pays back."
+    )
+}
+
+_recommendation_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="burn-rate-advice")
+
+def get_warning_level(runway_months: float) -> str:
+    """Classify runway into "critical", "warning" or "healthy"."""
+    if runway_months < CRITICAL_RUNWAY_MONTHS:
+        return "critical"
+    if runway_months < WARNING_RUNWAY_MONTHS:
+        return "warning"
+    return "healthy"
+
+def calculate_burn_rate(
+    capital: float,
+    monthly_expenses: float,
+    monthly_revenue: float = 0.0,
+    expense_growth: float = 0.0,
+    revenue_growth: float = 0.0,
+    one_off_items: Optional[List[Tuple[int, float]]] = None,
+    horizon_months: int = 120
+) -> Dict[str, Any]:
+    """
+    Calculate burn rate and runway locally by projecting cash month by month.
+
+    Args:
+        capital (float): Cash available today
+        monthly_expenses (float): Expenses in the first month
+        monthly_revenue (float): Revenue in the first month
+        expense_growth (float): Monthly expense growth rate, e.g. 0.05 for 5%
+        revenue_growth (float): Monthly revenue growth rate
+        one_off_items (list): (month, amount) pairs, month 1 being the first month;
+            positive amounts are one-off costs, negative amounts one-off inflows
+        horizon_months (int): How far ahead to project
+
+    Returns:
+        dict: runway_months (inf if cash lasts beyond the horizon), burn_rate (net burn
+        in the first month), warning_level and recommendation
+    """
+    one_offs = {}
+    for month, amount in one_off_items or []:
+        one_offs[int(month)] = one_offs.get(int(month), 0.0) + float(amount)
+
+    cash = float(capital)
+    runway_months = float("inf")
+    for month in range(1, horizon_months + 1):
+        expenses = monthly_expenses * (1 + expense_growth) ** (month - 1)
+        revenue = monthly_revenue * (1 + revenue_growth) ** (month - 1)
+        net_burn = expenses - revenue + one_offs.get(month, 0.0)
+        if net_burn > 0 and cash < net_burn:
+            # Cash runs out part-way through this month
+            runway_months = month - 1 + max(cash, 0.0) / net_burn
+            break
+        cash -= net_burn
+
+    if runway_months != float("inf"):
+        runway_months = round(runway_months, 1)
+    warning_level = get_warning_level(runway_months)
+
+    return {
+        "runway_months": runway_months,
+        "burn_rate": float(monthly_expenses - monthly_revenue),
+        "warning_level": warning_level,
+        "recommendation": BURN_RATE_RECOMMENDATIONS[warning_level]
     }
-    
-    # Create the prompt
-    prompt = f"""Calculate the burn rate and runway for a startup with:
-    - Capital: ${capital:,.2f}
-    - Monthly Expenses: ${monthly_expenses:,.2f}
-    
-    Consider:
-    - Runway should be calculated as capital divided by monthly expenses
-    - Warning levels:
-      * critical: < 3 months
-      * warning: 3-6 months
-      * healthy: > 6 months
-    - Provide a recommendation based on the warning level
-    
-    Return the result as a JSON object with the following structure:
-    {json.dumps(function_schema['parameters']['properties'], indent=2)}
+
+def request_burn_rate_recommendation(result: Dict[str, Any], capital: float) -> Future:
     """
-    
-    # Get the response
-    response = llm.invoke(prompt)
-    
-    try:
-        # Parse the response as JSON
-        result = json.loads(response.content)
-        
-        # Handle potential nested dictionary
-        if isinstance(result, dict) and 'result' in result:
-            result = result['result']
-        
-        # Ensure all numeric values are floats
-        if isinstance(result['runway_months'], (int, float)):
-            result['runway_months'] = float(result['runway_months'])
-        else:
-            raise ValueError("Invalid runway_months value")
-            
-        if isinstance(result['burn_rate'], (int, float)):
-            result['burn_rate'] = float(result['burn_rate'])
-        else:
-            raise ValueError("Invalid burn_rate value")
-            
-        return result
-    except (json.JSONDecodeError, KeyError, ValueError) as e:
-        # Fallback calculation
-        runway_months = round(capital / monthly_expenses, 1)
-        warning_level = "critical" if runway_months < 3 else "warning" if runway_months < 6 else "healthy"
-        recommendation = "Please recalculate with valid inputs."
-        
-        return {
-            "runway_months": float(runway_months),
-            "burn_rate": float(monthly_expenses),
-            "warning_level": warning_level,
-            "recommendation": recommendation
-        }
+    Ask the LLM for a written recommendation on a burn rate result in the background.
 
-def generate_business_model_canvas(problem: str, solution: str, target_group: str) -> Dict[str, Any]:
-    """Generate a Business Model Canvas based on the problem, solution, and target group."""
-    llm = ChatOpenAI(temperature=0.7)  # Increased temperature for more creative responses
-    
-    # Define the function schema
-    function_schema = {
-        "name": "generate_business_model_canvas",
-        "description": "Generate a Business Model Canvas for a startup",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "key_partners": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Key partners and suppliers needed to make the business model work"
+    Args:
+        result (dict): Result of calculate_burn_rate
+        capital (float): Cash available today
+
+    Returns:
+        Future: Resolves to the recommendation text
+    """
+    session_id = current_session_id()
+    runway = "more than 10 years" if result["runway_months"] == float("inf") else f"{result['runway_months']:.1f} months"
+    prompt = f"""You are a startup finance advisor. A startup has:
+    - Capital: ${capital:,.2f}
+    - Net monthly burn: ${result['burn_rate']:,.2f}
+    - Runway: {runway} ({result['warning_level']})
+
+    Give a short, specific recommendation (3-5 sentences) on what the founders should do next."""
+
+    def recommend() -> str:
+        with session_scope(session_id):
+            llm = guard_llm(get_chat_model(temperature=0))
+            return llm.invoke(prompt).content
+
+    return _recommendation_executor.submit(recommend)
+
+# Bump when a generation prompt or schema changes, so cached results are not reused
+BMC_PROMPT_VERSION = "2"
+PITCH_DECK_PROMPT_VERSION = "3"
+
+# Maximum number of pitch deck slides requested at the same time
+PITCH_DECK_CONCURRENCY = int(os.getenv("PITCH_DECK_CONCURRENCY", "4"))
+
+BMC_FUNCTION_SCHEMA = {
+    "name": "generate_business_model_canvas",
+    "description": "Generate a Business Model Canvas for a startup",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "key_partners": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Key partners and suppliers needed to make the business model work"
+            },
+            "key_activities": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Key activities needed to create and deliver the value proposition"
+            },
+            "key_resources": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Key resources needed to create and deliver the value proposition"
+            },
+            "value_proposition": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Products and services that create value for the target group"
+            },
+            "customer_relationships": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Types of relationships established with customers"
+            },
+            "channels": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "How the value proposition is delivered to customers"
+            },
+            "customer_segments": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Different groups of customers the business aims to reach"
+            },
+            "cost_structure": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Main costs incurred to operate the business model"
+            },
+            "revenue_streams": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "Ways the business generates revenue"
+            }
+        },
+        "required": [
+            "key_partners", "key_activities", "key_resources", "value_proposition",
+            "customer_relationships", "channels", "customer_segments",
+            "cost_structure", "revenue_streams"
+        ]
+    }
+}
+
+# Template used for sections the LLM could not produce
+BMC_FALLBACK = {
+    "key_partners": [
+        "Technology partners for core solution components",
+        "Local distribution and installation partners",
+        "Maintenance and support service providers"
+    ],
+    "key_activities": [
+        "Research and development of the core solution",
+        "Installation and setup of the system",
+        "Ongoing maintenance and support",
+        "Customer training and education"
+    ],
+    "key_resources": [
+        "Technical expertise and IP",
+        "Manufacturing and supply chain",
+        "Customer support team",
+        "Installation and maintenance equipment"
+    ],
+    "value_proposition": [
+        "Reliable and affordable solution to the core problem",
+        "Easy to implement and maintain",
+        "Scalable and adaptable to different needs",
+        "Comprehensive support and training"
+    ],
+    "customer_relationships": [
+        "Personal assistance and support",
+        "Training and education programs",
+        "Community building and knowledge sharing",
+        "Regular maintenance and updates"
+    ],
+    "channels": [
+        "Direct sales team",
+        "Partner network",
+        "Online platform",
+        "Local service centers"
+    ],
+    "customer_segments": [
+        "Primary target group as specified",
+        "Secondary markets with similar needs",
+        "Early adopters and innovators",
+        "Strategic partners and resellers"
+    ],
+    "cost_structure": [
+        "Research and development costs",
+        "Manufacturing and supply chain",
+        "Sales and marketing expenses",
+        "Customer support and maintenance"
+    ],
+    "revenue_streams": [
+        "Product sales and licensing",
+        "Subscription and service fees",
+        "Maintenance and support contracts",
+        "Training and consulting services"
+    ]
+}
+
+PITCH_DECK_FUNCTION_SCHEMA = {
+    "name": "generate_pitch_deck",
+    "description": "Generate a pitch deck outline for a startup",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            "title_slide": {
+                "type": "object",
+                "properties": {
+                    "company_name": {"type": "string"},
+                    "tagline": {"type": "string"},
+                    "logo_description": {"type": "string"}
                 },
-                "key_activities": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Key activities needed to create and deliver the value proposition"
+                "required": ["company_name", "tagline", "logo_description"]
+            },
+            "problem_slide": {
+                "type": "object",
+                "properties": {
+                    "main_problem": {"type": "string"},
+                    "key_pain_points": {"type": "array", "items": {"type": "string"}},
+                    "current_solutions": {"type": "array", "items": {"type": "string"}}
                 },
-                "key_resources": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Key resources needed to create and deliver the value proposition"
+                "required": ["main_problem", "key_pain_points", "current_solutions"]
+            },
+            "solution_slide": {
+                "type": "object",
+                "properties": {
+                    "main_solution": {"type": "string"},
+                    "key_features": {"type": "array", "items": {"type": "string"}},
+                    "unique_value": {"type": "string"}
                 },
-                "value_proposition": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Products and services that create value for the target group"
+                "required": ["main_solution", "key_features", "unique_value"]
+            },
+            "market_slide": {
+                "type": "object",
+                "properties": {
+                    "target_market": {"type": "string"},
+                    "market_size": {"type": "string"},
+                    "growth_potential": {"type": "string"},
+                    "market_trends": {"type": "array", "items": {"type": "string"}}
                 },
-                "customer_relationships": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Types of relationships established with customers"
+                "required": ["target_market", "market_size", "growth_potential", "market_trends"]
+            },
+            "business_model_slide": {
+                "type": "object",
+                "properties": {
+                    "revenue_model": {"type": "string"},
+                    "key_metrics": {"type": "array", "items": {"type": "string"}},
+                    "cost_structure": {"type": "array", "items": {"type": "string"}}
                 },
-                "channels": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "How the value proposition is delivered to customers"
+                "required": ["revenue_model", "key_metrics", "cost_structure"]
+            },
+            "go_to_market_slide": {
+                "type": "object",
+                "properties": {
+                    "strategy": {"type": "string"},
+                    "channels": {"type": "array", "items": {"type": "string"}},
+                    "timeline": {"type": "array", "items": {"type": "string"}}
                 },
-                "customer_segments": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Different groups of customers the business aims to reach"
+                "required": ["strategy", "channels", "timeline"]
+            },
+            "team_slide": {
+                "type": "object",
+                "properties": {
+                    "key_roles": {"type": "array", "items": {"type": "string"}},
+                    "team_strengths": {"type": "array", "items": {"type": "string"}},
+                    "hiring_plan": {"type": "array", "items": {"type": "string"}}
                 },
-                "cost_structure": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Main costs incurred to operate the business model"
+                "required": ["key_roles", "team_strengths", "hiring_plan"]
+            },
+            "financials_slide": {
+                "type": "object",
+                "properties": {
+                    "funding_needed": {"type": "string"},
+                    "use_of_funds": {"type": "array", "items": {"type": "string"}},
+                    "financial_projections": {"type": "array", "items": {"type": "string"}}
                 },
-                "revenue_streams": {
-                    "type": "array",
-                    "items": {"type": "string"},
-                    "description": "Ways the business generates revenue"
-                }
+                "required": ["funding_needed", "use_of_funds", "financial_projections"]
             },
-            "required": [
-                "key_partners", "key_activities", "key_resources", "value_proposition",
-                "customer_relationships", "channels", "customer_segments",
-                "cost_structure", "revenue_streams"
+            "call_to_action": {
+                "type": "object",
+                "properties": {
+                    "next_steps": {"type": "array", "items": {"type": "string"}},
+                    "contact_info": {"type": "string"},
+                    "investment_terms": {"type": "string"}
+                },
+                "required": ["next_steps", "contact_info", "investment_terms"]
+            }
+        },
+        "required": [
+            "title_slide", "problem_slide", "solution_slide", "market_slide",
+            "business_model_slide", "go_to_market_slide", "team_slide",
+            "financials_slide", "call_to_action"
+        ]
+    }
+}
+
+def _fallback_pitch_deck(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "") -> Dict[str, Any]:
+    """Build a template pitch deck, used for slides the LLM could not produce."""
+    # Generate a company name based on the solution
+    words = solution.split()
+    company_name = "".join(word.capitalize() for word in words[:2])
+
+    # Return a template structure with all required fields
+    return {
+        "title_slide": {
+            "company_name": company_name,
+            "tagline": f"Solving {problem[:50]}...",
+            "logo_description": "A modern, minimalist logo representing the solution"
+        },
+        "problem_slide": {
+            "main_problem": problem,
+            "key_pain_points": [
+                "Current solutions are too expensive",
+                "Existing options lack reliability",
+                "Complex infrastructure requirements"
+            ],
+            "current_solutions": [
+                "Traditional internet providers",
+                "Complex mesh networks",
+                "Expensive satellite solutions"
+            ]
+        },
+        "solution_slide": {
+            "main_solution": solution,
+            "key_features": [
+                "Solar-powered operation",
+                "Easy installation",
+                "Simple management interface",
+                "Reliable connectivity"
+            ],
+            "unique_value": "Affordable, reliable internet access for businesses in developing regions"
+        },
+        "market_slide": {
+            "target_market": target_group,
+            "market_size": market_size or "Growing market in developing regions",
+            "growth_potential": "High growth potential as digital adoption increases",
+            "market_trends": [
+                "Increasing digital transformation",
+                "Growing demand for connectivity",
+                "Rising adoption of renewable energy"
             ]
+        },
+        "business_model_slide": {
+            "revenue_model": business_model or "Hardware sales + subscription service",
+            "key_metrics": [
+                "Number of installations",
+                "Monthly recurring revenue",
+                "Customer retention rate"
+            ],
+            "cost_structure": [
+                "Hardware manufacturing",
+                "Installation and maintenance",
+                "Customer support",
+                "Marketing and sales"
+            ]
+        },
+        "go_to_market_slide": {
+            "strategy": "Direct sales + partner network",
+            "channels": [
+                "Local business associations",
+                "Technology partners",
+                "Direct sales team",
+                "Online platform"
+            ],
+            "timeline": [
+                "Q1: Initial market entry",
+                "Q2: Partner network expansion",
+                "Q3: Scale operations",
+                "Q4: Market leadership"
+            ]
+        },
+        "team_slide": {
+            "key_roles": [
+                "CEO/Founder",
+                "CTO",
+                "Operations Director",
+                "Sales Manager"
+            ],
+            "team_strengths": [
+                "Technical expertise",
+                "Market knowledge",
+                "Local presence",
+                "Industry experience"
+            ],
+            "hiring_plan": [
+                "Sales team expansion",
+                "Technical support staff",
+                "Local operations team"
+            ]
+        },
+        "financials_slide": {
+            "funding_needed": funding_needed or "$2M Series A",
+            "use_of_funds": [
+                "Product development",
+                "Market expansion",
+                "Team growth",
+                "Operations scaling"
+            ],
+            "financial_projections": [
+                "Year 1: $1M revenue",
+                "Year 2: $5M revenue",
+                "Year 3: $15M revenue"
+            ]
+        },
+        "call_to_action": {
+            "next_steps": [
+                "Schedule a detailed presentation",
+                "Review financial projections",
+                "Discuss partnership opportunities"
+            ],
+            "contact_info": "contact@company.com",
+            "investment_terms": "Series A: $2M for 20% equity"
+        }
+    }
+
+# Counters for structured-output generation, reported by get_generation_stats()
+GENERATION_STATS = {
+    "generations": 0,         # canvases and decks generated, not served from the cache
+    "llm_calls": 0,           # completions requested, including repairs
+    "parse_failures": 0,      # completions whose arguments were not valid JSON
+    "invalid_sections": 0,    # sections missing or failing validation
+    "repair_calls": 0,        # follow-up completions for invalid sections only
+    "fallback_sections": 0    # sections filled from the template after all repairs
+}
+_stats_lock = threading.Lock()
+
+def _count(stat: str, amount: int = 1):
+    with _stats_lock:
+        GENERATION_STATS[stat] += amount
+
+def get_generation_stats() -> Dict[str, Any]:
+    """Return the generation counters with parse-failure and retry rates."""
+    with _stats_lock:
+        stats = dict(GENERATION_STATS)
+    stats["parse_failure_rate"] = stats["parse_failures"] / stats["llm_calls"] if stats["llm_calls"] else 0.0
+    stats["retry_rate"] = stats["repair_calls"] / stats["generations"] if stats["generations"] else 0.0
+    return stats
+
+def _is_valid(value: Any, schema: Dict[str, Any], min_items: int = 1) -> bool:
+    """Check a value against the subset of JSON schema used by the function schemas."""
+    expected = schema.get("type")
+    if expected == "string":
+        return isinstance(value, str) and bool(value.strip())
+    if expected == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if expected == "array":
+        return (
+            isinstance(value, list)
+            and len(value) >= min_items
+            and all(_is_valid(item, schema.get("items", {})) for item in value)
+        )
+    if expected == "object":
+        return isinstance(value, dict) and all(
+            field in value and _is_valid(value[field], schema["properties"][field])
+            for field in schema.get("required", [])
+        )
+    return True
+
+def _parse_function_arguments(message) -> Optional[Dict[str, Any]]:
+    """Extract the JSON arguments of a function call (or JSON content) from a chat message."""
+    function_call = message.additional_kwargs.get("function_call")
+    raw = function_call.get("arguments") if function_call else message.content
+    try:
+        result = json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+    # Handle potential nested dictionary
+    if isinstance(result, dict) and 'result' in result:
+        result = result['result']
+    return result if isinstance(result, dict) else None
+
+def _section_schema(function_schema: Dict[str, Any], sections: List[str]) -> Dict[str, Any]:
+    """Narrow a function schema down to the given top-level sections."""
+    properties = function_schema["parameters"]["properties"]
+    return {
+        "name": function_schema["name"],
+        "description": function_schema["description"],
+        "parameters": {
+            "type": "object",
+            "properties": {section: properties[section] for section in sections},
+            "required": list(sections)
         }
     }
-    
-    # Create the prompt
-    prompt = f"""You are a business model expert. Generate a detailed Business Model Canvas for a startup with the following information:
+
+def _generate_structured(
+    llm,
+    prompt: str,
+    function_schema: Dict[str, Any],
+    fallback: Dict[str, Any],
+    min_items: int = 1,
+    max_repairs: int = 2
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Generate a result through function calling, validating it section by section.
+
+    Valid sections are kept. Only the sections that are missing or invalid are
+    requested again, up to max_repairs times, before falling back to the template.
+    The caller counts the generation, since a result may be built from several calls.
+
+    Args:
+        llm: Chat model to call
+        prompt (str): The generation prompt
+        function_schema (dict): Function schema describing the result
+        fallback (dict): Template values for sections that never validate
+        min_items (int): Minimum number of items in array sections
+        max_repairs (int): Maximum number of follow-up calls for invalid sections
+
+    Returns:
+        tuple: (result with one entry per required section, number of sections
+        taken from the template)
+    """
+    required = function_schema["parameters"]["required"]
+    properties = function_schema["parameters"]["properties"]
+    result = {}
+    pending = list(required)
+    request = prompt
+
+    for attempt in range(max_repairs + 1):
+        schema = _section_schema(function_schema, pending)
+        structured_llm = guard_llm(llm, functions=[schema], function_call={"name": schema["name"]})
+        response = structured_llm.invoke(request)
+        _count("llm_calls")
+
+        parsed = _parse_function_arguments(response)
+        if parsed is None:
+            _count("parse_failures")
+            raw = response.additional_kwargs.get("function_call", {}).get("arguments", response.content)
+            print(f"Error parsing {function_schema['name']} response: {raw}")
+            parsed = {}
+
+        for section in pending:
+            if section in parsed and _is_valid(parsed[section], properties[section], min_items):
+                result[section] = parsed[section]
+
+        pending = [section for section in pending if section not in result]
+        if not pending:
+            break
+        _count("invalid_sections", len(pending))
+        if attempt < max_repairs:
+            _count("repair_calls")
+            request = (
+                f"{prompt}\n\nThe following sections are still missing or incomplete: "
+                f"{', '.join(pending)}. Generate only these sections."
+            )
+
+    for section in pending:
+        print(f"Using template for section {section} of {function_schema['name']}")
+        result[section] = fallback[section]
+    _count("fallback_sections", len(pending))
+
+    return {section: result[section] for section in required}, len(pending)
+
+def _generate_cached(kind: str, inputs: Dict[str, Any], prompt_version: str, temperature: float,
+                     generate, regenerate: bool = False) -> Dict[str, Any]:
+    """
+    Return a cached generation for the same inputs, or generate and cache it.
+
+    Args:
+        kind (str): Cache namespace, e.g. "business_model_canvas"
+        inputs (dict): The user inputs of the generation
+        prompt_version (str): Version of the prompt
+        temperature (float): Sampling temperature
+        generate: Callable(llm) returning (result, fallback_sections)
+        regenerate (bool): Skip the cached result and replace it
+
+    Returns:
+        dict: The generated result
+    """
+    llm = get_chat_model(temperature=temperature)
+    cache = get_result_cache()
+    key = cache.make_key(kind, inputs, llm.model_name, prompt_version, temperature)
+
+    if not regenerate:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    result, fallback_sections = generate(llm)
+    # Results patched with template sections are not worth keeping
+    if fallback_sections == 0:
+        cache.put(key, kind, result)
+    return result
+
+def _business_model_canvas_prompt(problem: str, solution: str, target_group: str) -> str:
+    """Build the Business Model Canvas generation prompt."""
+    return f"""You are a business model expert. Generate a detailed Business Model Canvas for a startup with the following information:
 
 Problem Statement:
 {problem}
@@ -173,9 +649,6 @@ Instructions:
 5. Include both qualitative and quantitative elements where relevant
 6. Ensure all sections are logically connected and support the overall business model
 
-Return the result as a JSON object with the following structure:
-{json.dumps(function_schema['parameters']['properties'], indent=2)}
-
 Make sure to:
 - Be specific and detailed in each section
 - Provide concrete examples and actionable items
@@ -183,193 +656,31 @@ Make sure to:
 - Think about both short-term and long-term aspects
 - Include both strategic and operational elements
 """
-    
-    # Get the response
-    response = llm.invoke(prompt)
-    
-    try:
-        # Parse the response as JSON
-        result = json.loads(response.content)
-        
-        # Handle potential nested dictionary
-        if isinstance(result, dict) and 'result' in result:
-            result = result['result']
-        
-        # Validate that all required sections are present and are lists
-        for section in function_schema['parameters']['required']:
-            if section not in result or not isinstance(result[section], list):
-                raise ValueError(f"Invalid or missing section: {section}")
-            
-            # Ensure each section has at least 2 items
-            if len(result[section]) < 2:
-                raise ValueError(f"Section {section} has insufficient items")
-        
-        return result
-    except (json.JSONDecodeError, KeyError, ValueError) as e:
-        print(f"Error generating BMC: {str(e)}")
-        print(f"Response content: {response.content}")
-        
-        # Return a more helpful template
-        return {
-            "key_partners": [
-                "Technology partners for core solution components",
-                "Local distribution and installation partners",
-                "Maintenance and support service providers"
-            ],
-            "key_activities": [
-                "Research and development of the core solution",
-                "Installation and setup of the system",
-                "Ongoing maintenance and support",
-                "Customer training and education"
-            ],
-            "key_resources": [
-                "Technical expertise and IP",
-                "Manufacturing and supply chain",
-                "Customer support team",
-                "Installation and maintenance equipment"
-            ],
-            "value_proposition": [
-                "Reliable and affordable solution to the core problem",
-                "Easy to implement and maintain",
-                "Scalable and adaptable to different needs",
-                "Comprehensive support and training"
-            ],
-            "customer_relationships": [
-                "Personal assistance and support",
-                "Training and education programs",
-                "Community building and knowledge sharing",
-                "Regular maintenance and updates"
-            ],
-            "channels": [
-                "Direct sales team",
-                "Partner network",
-                "Online platform",
-                "Local service centers"
-            ],
-            "customer_segments": [
-                "Primary target group as specified",
-                "Secondary markets with similar needs",
-                "Early adopters and innovators",
-                "Strategic partners and resellers"
-            ],
-            "cost_structure": [
-                "Research and development costs",
-                "Manufacturing and supply chain",
-                "Sales and marketing expenses",
-                "Customer support and maintenance"
-            ],
-            "revenue_streams": [
-                "Product sales and licensing",
-                "Subscription and service fees",
-                "Maintenance and support contracts",
-                "Training and consulting services"
-            ]
-        }
 
-def generate_pitch_deck(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "") -> Dict[str, Any]:
-    """Generate a pitch deck outline based on the business information."""
-    llm = ChatOpenAI(temperature=0.7)
-    
-    # Define the function schema
-    function_schema = {
-        "name": "generate_pitch_deck",
-        "description": "Generate a pitch deck outline for a startup",
-        "parameters": {
-            "type": "object",
-            "properties": {
-                "title_slide": {
-                    "type": "object",
-                    "properties": {
-                        "company_name": {"type": "string"},
-                        "tagline": {"type": "string"},
-                        "logo_description": {"type": "string"}
-                    },
-                    "required": ["company_name", "tagline", "logo_description"]
-                },
-                "problem_slide": {
-                    "type": "object",
-                    "properties": {
-                        "main_problem": {"type": "string"},
-                        "key_pain_points": {"type": "array", "items": {"type": "string"}},
-                        "current_solutions": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["main_problem", "key_pain_points", "current_solutions"]
-                },
-                "solution_slide": {
-                    "type": "object",
-                    "properties": {
-                        "main_solution": {"type": "string"},
-                        "key_features": {"type": "array", "items": {"type": "string"}},
-                        "unique_value": {"type": "string"}
-                    },
-                    "required": ["main_solution", "key_features", "unique_value"]
-                },
-                "market_slide": {
-                    "type": "object",
-                    "properties": {
-                        "target_market": {"type": "string"},
-                        "market_size": {"type": "string"},
-                        "growth_potential": {"type": "string"},
-                        "market_trends": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["target_market", "market_size", "growth_potential", "market_trends"]
-                },
-                "business_model_slide": {
-                    "type": "object",
-                    "properties": {
-                        "revenue_model": {"type": "string"},
-                        "key_metrics": {"type": "array", "items": {"type": "string"}},
-                        "cost_structure": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["revenue_model", "key_metrics", "cost_structure"]
-                },
-                "go_to_market_slide": {
-                    "type": "object",
-                    "properties": {
-                        "strategy": {"type": "string"},
-                        "channels": {"type": "array", "items": {"type": "string"}},
-                        "timeline": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["strategy", "channels", "timeline"]
-                },
-                "team_slide": {
-                    "type": "object",
-                    "properties": {
-                        "key_roles": {"type": "array", "items": {"type": "string"}},
-                        "team_strengths": {"type": "array", "items": {"type": "string"}},
-                        "hiring_plan": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["key_roles", "team_strengths", "hiring_plan"]
-                },
-                "financials_slide": {
-                    "type": "object",
-                    "properties": {
-                        "funding_needed": {"type": "string"},
-                        "use_of_funds": {"type": "array", "items": {"type": "string"}},
-                        "financial_projections": {"type": "array", "items": {"type": "string"}}
-                    },
-                    "required": ["funding_needed", "use_of_funds", "financial_projections"]
-                },
-                "call_to_action": {
-                    "type": "object",
-                    "properties": {
-                        "next_steps": {"type": "array", "items": {"type": "string"}},
-                        "contact_info": {"type": "string"},
-                        "investment_terms": {"type": "string"}
-                    },
-                    "required": ["next_steps", "contact_info", "investment_terms"]
-                }
-            },
-            "required": [
-                "title_slide", "problem_slide", "solution_slide", "market_slide",
-                "business_model_slide", "go_to_market_slide", "team_slide",
-                "financials_slide", "call_to_action"
-            ]
-        }
-    }
-    
-    # Create the prompt
-    prompt = f"""You are a pitch deck expert. Generate a comprehensive pitch deck outline for a startup with the following information:
+def generate_business_model_canvas(problem: str, solution: str, target_group: str, regenerate: bool = False) -> Dict[str, Any]:
+    """Generate a Business Model Canvas based on the problem, solution, and target group.
+
+    Results are cached per input; pass regenerate=True to get a fresh one.
+    """
+    prompt = _business_model_canvas_prompt(problem, solution, target_group)
+
+    def generate(llm):
+        _count("generations")
+        # Each section should have at least 2 items
+        return _generate_structured(llm, prompt, BMC_FUNCTION_SCHEMA, BMC_FALLBACK, min_items=2)
+
+    return _generate_cached(
+        "business_model_canvas",
+        {"problem": problem, "solution": solution, "target_group": target_group},
+        BMC_PROMPT_VERSION,
+        0.7,  # Increased temperature for more creative responses
+        generate,
+        regenerate=regenerate
+    )
+
+def _pitch_deck_prompt(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "") -> str:
+    """Build the pitch deck generation prompt."""
+    return f"""You are a pitch deck expert. Generate a comprehensive pitch deck outline for a startup with the following information:
 
 Problem Statement:
 {problem}
@@ -393,9 +704,6 @@ Instructions:
 5. Make the content specific to the business context
 6. Ensure all slides are logically connected
 
-Return the result as a JSON object with the following structure:
-{json.dumps(function_schema['parameters']['properties'], indent=2)}
-
 Make sure to:
 - Create a memorable company name and tagline
 - Highlight the most compelling aspects of the problem and solution
@@ -404,150 +712,167 @@ Make sure to:
 - Make the pitch deck professional and investor-ready
 - Include ALL required fields in the response
 """
-    
-    # Get the response
-    response = llm.invoke(prompt)
-    
+
+def _pitch_deck_slide_prompt(prompt: str, slide_key: str) -> str:
+    """Narrow the pitch deck prompt down to a single slide."""
+    return (
+        f"{prompt}\n"
+        f"The slides are written separately. Generate only the {SLIDE_TITLES[slide_key]} slide ({slide_key}), "
+        "consistent with the information above."
+        + ("" if slide_key == "title_slide" else " Refer to the startup as \"the company\" rather than inventing a name.")
+    )
+
+def _pitch_deck_cache_key(llm, problem: str, solution: str, target_group: str, business_model: str, market_size: str, funding_needed: str) -> str:
+    """Cache key of a pitch deck, shared by the parallel and streamed generators."""
+    inputs = {
+        "problem": problem,
+        "solution": solution,
+        "target_group": target_group,
+        "business_model": business_model,
+        "market_size": market_size,
+        "funding_needed": funding_needed
+    }
+    return get_result_cache().make_key("pitch_deck", inputs, llm.model_name, PITCH_DECK_PROMPT_VERSION, 0.7)
+
+def generate_pitch_deck_slides(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "", regenerate: bool = False, max_concurrency: Optional[int] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate the pitch deck slides concurrently, one request per slide.
+
+    Args:
+        problem, solution, target_group, business_model, market_size, funding_needed:
+            The business information, as for generate_pitch_deck
+        regenerate (bool): Skip the cached deck and replace it
+        max_concurrency (int, optional): Maximum slides requested at once,
+            defaults to PITCH_DECK_CONCURRENCY
+
+    Yields:
+        tuple: (slide key, slide) in order of completion; a cached deck is yielded at once
+    """
+    slide_keys = PITCH_DECK_FUNCTION_SCHEMA["parameters"]["required"]
+    llm = get_chat_model(temperature=0.7)
+    cache = get_result_cache()
+    key = _pitch_deck_cache_key(llm, problem, solution, target_group, business_model, market_size, funding_needed)
+
+    cached = None if regenerate else cache.get(key)
+    if cached is not None:
+        for slide_key in slide_keys:
+            yield slide_key, cached[slide_key]
+        return
+
+    prompt = _pitch_deck_prompt(problem, solution, target_group, business_model, market_size, funding_needed)
+    fallback = _fallback_pitch_deck(problem, solution, target_group, business_model, market_size, funding_needed)
+    # Worker threads have no Streamlit context, so pass the session on explicitly
+    session_id = current_session_id()
+
+    def generate_slide(slide_key: str):
+        with session_scope(session_id):
+            schema = _section_schema(PITCH_DECK_FUNCTION_SCHEMA, [slide_key])
+            return _generate_structured(llm, _pitch_deck_slide_prompt(prompt, slide_key), schema, fallback)
+
+    deck = {}
+    fallback_sections = 0
+    _count("generations")
+    executor = ThreadPoolExecutor(
+        max_workers=max_concurrency or PITCH_DECK_CONCURRENCY,
+        thread_name_prefix="pitch-deck-slide"
+    )
     try:
-        # Parse the response as JSON
-        result = json.loads(response.content)
-        
-        # Handle potential nested dictionary
-        if isinstance(result, dict) and 'result' in result:
-            result = result['result']
-        
-        # Validate that all required sections are present and have required fields
-        for section in function_schema['parameters']['required']:
-            if section not in result:
-                raise ValueError(f"Missing section: {section}")
-            
-            # Check required fields in each section
-            section_schema = function_schema['parameters']['properties'][section]
-            for field in section_schema['required']:
-                if field not in result[section]:
-                    raise ValueError(f"Missing field {field} in section {section}")
-        
-        return result
-    except (json.JSONDecodeError, KeyError, ValueError) as e:
-        print(f"Error generating pitch deck: {str(e)}")
-        print(f"Response content: {response.content}")
-        
-        # Generate a company name based on the solution
-        words = solution.split()
-        company_name = "".join(word.capitalize() for word in words[:2])
-        
-        # Return a template structure with all required fields
-        return {
-            "title_slide": {
-                "company_name": company_name,
-                "tagline": f"Solving {problem[:50]}...",
-                "logo_description": "A modern, minimalist logo representing the solution"
-            },
-            "problem_slide": {
-                "main_problem": problem,
-                "key_pain_points": [
-                    "Current solutions are too expensive",
-                    "Existing options lack reliability",
-                    "Complex infrastructure requirements"
-                ],
-                "current_solutions": [
-                    "Traditional internet providers",
-                    "Complex mesh networks",
-                    "Expensive satellite solutions"
-                ]
-            },
-            "solution_slide": {
-                "main_solution": solution,
-                "key_features": [
-                    "Solar-powered operation",
-                    "Easy installation",
-                    "Simple management interface",
-                    "Reliable connectivity"
-                ],
-                "unique_value": "Affordable, reliable internet access for businesses in developing regions"
-            },
-            "market_slide": {
-                "target_market": target_group,
-                "market_size": market_size or "Growing market in developing regions",
-                "growth_potential": "High growth potential as digital adoption increases",
-                "market_trends": [
-                    "Increasing digital transformation",
-                    "Growing demand for connectivity",
-                    "Rising adoption of renewable energy"
-                ]
-            },
-            "business_model_slide": {
-                "revenue_model": business_model or "Hardware sales + subscription service",
-                "key_metrics": [
-                    "Number of installations",
-                    "Monthly recurring revenue",
-                    "Customer retention rate"
-                ],
-                "cost_structure": [
-                    "Hardware manufacturing",
-                    "Installation and maintenance",
-                    "Customer support",
-                    "Marketing and sales"
-                ]
-            },
-            "go_to_market_slide": {
-                "strategy": "Direct sales + partner network",
-                "channels": [
-                    "Local business associations",
-                    "Technology partners",
-                    "Direct sales team",
-                    "Online platform"
-                ],
-                "timeline": [
-                    "Q1: Initial market entry",
-                    "Q2: Partner network expansion",
-                    "Q3: Scale operations",
-                    "Q4: Market leadership"
-                ]
-            },
-            "team_slide": {
-                "key_roles": [
-                    "CEO/Founder",
-                    "CTO",
-                    "Operations Director",
-                    "Sales Manager"
-                ],
-                "team_strengths": [
-                    "Technical expertise",
-                    "Market knowledge",
-                    "Local presence",
-                    "Industry experience"
-                ],
-                "hiring_plan": [
-                    "Sales team expansion",
-                    "Technical support staff",
-                    "Local operations team"
-                ]
-            },
-            "financials_slide": {
-                "funding_needed": funding_needed or "$2M Series A",
-                "use_of_funds": [
-                    "Product development",
-                    "Market expansion",
-                    "Team growth",
-                    "Operations scaling"
-                ],
-                "financial_projections": [
-                    "Year 1: $1M revenue",
-                    "Year 2: $5M revenue",
-                    "Year 3: $15M revenue"
-                ]
-            },
-            "call_to_action": {
-                "next_steps": [
-                    "Schedule a detailed presentation",
-                    "Review financial projections",
-                    "Discuss partnership opportunities"
-                ],
-                "contact_info": "contact@company.com",
-                "investment_terms": "Series A: $2M for 20% equity"
-            }
-        }
+        futures = {executor.submit(generate_slide, slide_key): slide_key for slide_key in slide_keys}
+        for future in as_completed(futures):
+            slide_key = futures[future]
+            slide, missing = future.result()
+            deck[slide_key] = slide[slide_key]
+            fallback_sections += missing
+            yield slide_key, deck[slide_key]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Decks patched with template slides are not worth keeping
+    if fallback_sections == 0:
+        cache.put(key, "pitch_deck", {slide_key: deck[slide_key] for slide_key in slide_keys})
+
+def stream_pitch_deck(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "", regenerate: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Generate the pitch deck in a single streamed request, yielding slides as they arrive.
+
+    The completion is parsed incrementally, so each slide is yielded as soon as
+    its JSON object is complete. Slides that are missing, invalid or cut off by a
+    malformed tail are repaired afterwards without discarding the parsed ones; a
+    slide recovered from a truncated tail is yielded again once repaired.
+
+    Args:
+        problem, solution, target_group, business_model, market_size, funding_needed:
+            The business information, as for generate_pitch_deck
+        regenerate (bool): Skip the cached deck and replace it
+
+    Yields:
+        tuple: (slide key, slide) in order of arrival; a cached deck is yielded at once
+    """
+    slide_keys = PITCH_DECK_FUNCTION_SCHEMA["parameters"]["required"]
+    properties = PITCH_DECK_FUNCTION_SCHEMA["parameters"]["properties"]
+    llm = get_chat_model(temperature=0.7, stream_usage=True)
+    cache = get_result_cache()
+    key = _pitch_deck_cache_key(llm, problem, solution, target_group, business_model, market_size, funding_needed)
+
+    cached = None if regenerate else cache.get(key)
+    if cached is not None:
+        for slide_key in slide_keys:
+            yield slide_key, cached[slide_key]
+        return
+
+    prompt = _pitch_deck_prompt(problem, solution, target_group, business_model, market_size, funding_needed)
+    fallback = _fallback_pitch_deck(problem, solution, target_group, business_model, market_size, funding_needed)
+    stream_prompt = (
+        f"{prompt}\nReturn the result as a JSON object with one key per slide, in this order, "
+        f"following this structure:\n{json.dumps(properties, indent=2)}"
+    )
+
+    deck = {}
+    parser = JSONObjectStream()
+    json_llm = guard_llm(llm, response_format={"type": "json_object"})
+    _count("generations")
+    _count("llm_calls")
+
+    def accept(members):
+        for slide_key, slide in members:
+            if slide_key in properties and slide_key not in deck and _is_valid(slide, properties[slide_key]):
+                deck[slide_key] = slide
+                yield slide_key, slide
+
+    for chunk in json_llm.stream(stream_prompt):
+        yield from accept(parser.feed(chunk.content))
+    yield from accept(parser.close())
+
+    if parser.errors:
+        _count("parse_failures")
+        print(f"Error parsing streamed pitch deck: {'; '.join(parser.errors)}")
+
+    fallback_sections = 0
+    # A slide rebuilt from a cut-off tail is shown meanwhile but regenerated like a missing one
+    missing = [slide_key for slide_key in slide_keys if slide_key not in deck or slide_key in parser.recovered]
+    if missing:
+        _count("invalid_sections", len(missing))
+        _count("repair_calls")
+        repaired, fallback_sections = _generate_structured(
+            llm, prompt, _section_schema(PITCH_DECK_FUNCTION_SCHEMA, missing), fallback
+        )
+        for slide_key in missing:
+            deck[slide_key] = repaired[slide_key]
+            yield slide_key, deck[slide_key]
+
+    if fallback_sections == 0:
+        cache.put(key, "pitch_deck", {slide_key: deck[slide_key] for slide_key in slide_keys})
+
+def generate_pitch_deck(problem: str, solution: str, target_group: str, business_model: str = "", market_size: str = "", funding_needed: str = "", regenerate: bool = False) -> Dict[str, Any]:
+    """Generate a pitch deck outline based on the business information.
+
+    The slides are generated concurrently, see generate_pitch_deck_slides().
+    Results are cached per input; pass regenerate=True to get a fresh one.
+    """
+    slides = dict(generate_pitch_deck_slides(
+        problem, solution, target_group, business_model, market_size, funding_needed, regenerate=regenerate
+    ))
+    return {slide_key: slides[slide_key] for slide_key in PITCH_DECK_FUNCTION_SCHEMA["parameters"]["required"]}
 
 def calculate_runway(current_cash: float, burn_rate: float) -> float:
     """Calculate runway in months based on current cash and burn rate."""
@@ -0,0 +1,95 @@
+"""Streaming export of a chat history as JSONL, Markdown or gzipped JSON.
+
+Every exporter is a generator over the stored messages that yields the file
+one chunk at a time, so an export holds one message in memory rather than the
+whole conversation. Each message carries its role, text and time, and answers
+also carry their sources and the token usage of their turn. For a Streamlit
+download, export_to_file() collects the chunks on disk; Streamlit then serves
+the finished file from memory.
+"""
+
+import io
+import json
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple
+from chat_store import ChatMessage
+
+def message_record(message: ChatMessage) -> Dict[str, Any]:
+    """The exported fields of a message."""
+    record = {
+        "role": message.role,
+        "content": message.content,
+        "created": datetime.fromtimestamp(message.created).isoformat(timespec="seconds")
+    }
+    # Extras never replace the message's own fields
+    for key, value in message.metadata.items():
+        record.setdefault(key, value)
+    return record
+
+def export_jsonl(messages: Iterable[ChatMessage]) -> Iterator[bytes]:
+    """One JSON object per line and message."""
+    for message in messages:
+        yield (json.dumps(message_record(message), ensure_ascii=False) + "\n").encode("utf-8")
+
+def export_markdown(messages: Iterable[ChatMessage]) -> Iterator[bytes]:
+    """A readable transcript with sources and token usage below each answer."""
+    yield "# Chat History\n\n".encode("utf-8")
+    for message in messages:
+        record = message_record(message)
+        speaker = "🧑 You" if message.role == "human" else "🤖 Startup Mentor"
+        lines = [f"### {speaker} · {record['created'].replace('T', ' ')}", "", message.content, ""]
+        sources = record.get("sources")
+        if sources:
+            lines.append("**Sources:**")
+            lines.extend(f"{i}. {source['source']}: *{source['preview']}*" for i, source in enumerate(sources, 1))
+            lines.append("")
+        tokens = record.get("tokens")
+        if tokens:
+            lines.append(
+                f"*{tokens['input_tokens'] + tokens['output_tokens']:,} tokens "
+                f"({tokens['input_tokens']:,} in, {tokens['output_tokens']:,} out), ${tokens['cost']:.4f}*"
+            )
+        yield ("\n".join(lines).rstrip() + "\n\n").encode("utf-8")
+
+def export_json_gzip(messages: Iterable[ChatMessage]) -> Iterator[bytes]:
+    """A gzipped JSON array of the messages, compressed as it is written."""
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    separator = "[\n"
+    for message in messages:
+        chunk = compressor.compress(
+            (separator + json.dumps(message_record(message), ensure_ascii=False)).encode("utf-8")
+        )
+        separator = ",\n"
+        if chunk:
+            yield chunk
+    if separator == "[\n":
+        yield compressor.compress(b"[")
+    yield compressor.compress(b"\n]\n") + compressor.flush()
+
+class ExportFormat(NamedTuple):
+    label: str
+    file_name: str
+    mime: str
+    exporter: Callable[[Iterable[ChatMessage]], Iterator[bytes]]
+
+EXPORT_FORMATS = {
+    "jsonl": ExportFormat("JSON Lines", "chat_history.jsonl", "application/x-ndjson", export_jsonl),
+    "markdown": ExportFormat("Markdown", "chat_history.md", "text/markdown", export_markdown),
+    "json_gzip": ExportFormat("JSON (gzip)", "chat_history.json.gz", "application/gzip", export_json_gzip)
+}
+
+def export_to_file(chunks: Iterable[bytes]) -> io.RawIOBase:
+    """
+    Write exported chunks to an anonymous temporary file, rewound for reading.
+
+    The export itself stays on disk rather than in memory, e.g. as data for
+    st.download_button. Streamlit still reads the finished file into memory to
+    serve the download, so that step grows with the size of the export.
+    """
+    file = tempfile.TemporaryFile(buffering=0)
+    for chunk in chunks:
+        file.write(chunk)
+    file.seek(0)
+    return file
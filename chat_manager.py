@@ -1,38 +1,69 @@
 import streamlit as st
-import json
+import os
+import uuid
 from langchain_core.messages import HumanMessage, AIMessage, BaseMessage
-from typing import Sequence
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+from chat_export import EXPORT_FORMATS
+from chat_store import ChatMessage, get_chat_store
+
+# Messages shown per page of the chat, and sent to the workflow as history
+CHAT_PAGE_SIZE = int(os.getenv("CHAT_PAGE_SIZE", "20"))
 
 class ChatState:
     messages: Sequence[BaseMessage]
 
 class ChatManager:
+    """
+    Chat of the current session, persisted in the chat store.
+
+    The session is identified by the ?chat=<id> query parameter, so a reload or
+    reconnect with the same URL continues the conversation. Nothing is kept in
+    session_state but the session id: messages stay in the store's compact form
+    and become LangChain messages only for a workflow call.
+    """
+
     def __init__(self):
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-        self.messages = st.session_state.messages
+        if "chat_session_id" not in st.session_state:
+            session_id = st.query_params.get("chat")
+            if not session_id:
+                session_id = uuid.uuid4().hex
+                st.query_params["chat"] = session_id
+            st.session_state.chat_session_id = session_id
+        self.session_id = st.session_state.chat_session_id
+        self.store = get_chat_store()
 
-    def get_messages(self):
-        return self.messages
+    def get_recent(self, limit: int, before_id: Optional[int] = None) -> List[ChatMessage]:
+        """The last messages as stored, oldest first."""
+        return self.store.recent(self.session_id, limit, before_id)
+
+    def get_messages(self, limit: int = CHAT_PAGE_SIZE) -> List[BaseMessage]:
+        """The last messages as LangChain messages, for the workflow."""
+        return [
+            HumanMessage(content=m.content) if m.role == "human" else AIMessage(content=m.content)
+            for m in self.get_recent(limit)
+        ]
 
     def add_user_message(self, content: str):
         """Add a user message to the chat."""
-        self.messages.append(HumanMessage(content=content))
-        st.session_state.messages = self.messages
+        self.store.append(self.session_id, "human", content)
+
+    def add_ai_message(self, content: str, metadata: Optional[Dict[str, Any]] = None):
+        """Add an AI message to the chat, with extras such as its sources."""
+        self.store.append(self.session_id, "ai", content, metadata)
+
+    def export_messages(self, export_format: str = "jsonl") -> Iterator[bytes]:
+        """
+        Stream the whole chat history in an export format.
 
-    def add_ai_message(self, content: str):
-        """Add an AI message to the chat."""
-        self.messages.append(AIMessage(content=content))
-        st.session_state.messages = self.messages
+        Args:
+            export_format (str): A key of EXPORT_FORMATS
 
-    def export_messages(self):
-        """Export messages as JSON."""
-        return json.dumps([
-            {"role": "human" if isinstance(m, HumanMessage) else "ai", "content": m.content}
-            for m in self.get_messages()
-        ], indent=2)
+        Returns:
+            Iterator[bytes]: Chunks of the exported file
+        """
+        return EXPORT_FORMATS[export_format].exporter(self.store.iter_messages(self.session_id))
 
     def clear_messages(self):
         """Clear all messages."""
-        st.session_state.messages = []
-        self.messages = st.session_state.messages 
\ No newline at end of file
+        self.store.clear(self.session_id)
+        st.session_state.chat_pages = 1
@@ -0,0 +1,198 @@
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from storage import connect
+
+# Seconds between sweeps for idle sessions
+IDLE_SWEEP_INTERVAL = 60
+
+class ChatMessage:
+    """One stored chat message; slotted, with the metadata kept as its JSON text until read."""
+
+    __slots__ = ("id", "role", "content", "_metadata", "created")
+
+    def __init__(self, id: int, role: str, content: str, metadata: Optional[str], created: float):
+        self.id = id
+        self.role = role
+        self.content = content
+        self._metadata = metadata
+        self.created = created
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Extras of the message, e.g. the sources of an answer."""
+        return json.loads(self._metadata) if self._metadata else {}
+
+    def nbytes(self) -> int:
+        """Approximate memory held by the message."""
+        return sys.getsizeof(self) + sys.getsizeof(self.content) + (sys.getsizeof(self._metadata) if self._metadata else 0)
+
+class _SessionWindow:
+    """The last messages of a session kept in memory."""
+
+    __slots__ = ("messages", "complete", "last_access")
+
+    def __init__(self, messages: List[ChatMessage], complete: bool):
+        self.messages = messages
+        # Whether the messages are the whole history of the session
+        self.complete = complete
+        self.last_access = time.time()
+
+class ChatStore:
+    """
+    Chat history of all sessions in a SQLite file, read one page at a time.
+
+    Messages are appended with an increasing id, so a page of a session is an
+    index range scan no matter how long the conversation has grown. The last
+    messages of active sessions are also kept in memory, which serves the
+    latest page on a rerun without a query; sessions idle for longer than the
+    idle timeout are dropped from memory and read from the file again when
+    they come back.
+
+    Configuration (environment variables):
+        CHAT_STORE_PATH: SQLite file of the chat history (default: chat_history.db)
+        CHAT_CACHE_MESSAGES: messages kept in memory per active session (default: 50)
+        CHAT_IDLE_TIMEOUT: seconds until an idle session is dropped from memory (default: 900)
+    """
+
+    def __init__(self, path=None, cache_messages=None, idle_timeout=None):
+        self.path = path or os.getenv("CHAT_STORE_PATH", "chat_history.db")
+        self.cache_messages = cache_messages or int(os.getenv("CHAT_CACHE_MESSAGES", "50"))
+        self.idle_timeout = idle_timeout or float(os.getenv("CHAT_IDLE_TIMEOUT", "900"))
+        self._lock = threading.Lock()
+        self._windows: Dict[str, _SessionWindow] = {}
+        self._last_sweep = time.time()
+        self._conn = connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT,
+                created REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_session ON chat_messages (session_id, id)")
+
+    def _query(self, session_id: str, limit: int, before_id: Optional[int] = None) -> List[ChatMessage]:
+        """The last messages of a session from the file, oldest first; called with the lock held."""
+        rows = self._conn.execute(
+            "SELECT id, role, content, metadata, created FROM chat_messages "
+            "WHERE session_id = ? AND id < ? ORDER BY id DESC LIMIT ?",
+            (session_id, before_id if before_id is not None else 2 ** 63 - 1, limit)
+        ).fetchall()
+        return [ChatMessage(*row) for row in reversed(rows)]
+
+    def _window(self, session_id: str) -> _SessionWindow:
+        """The in-memory window of a session, loaded if needed; called with the lock held."""
+        now = time.time()
+        if now - self._last_sweep > IDLE_SWEEP_INTERVAL:
+            self._last_sweep = now
+            for idle in [sid for sid, window in self._windows.items() if now - window.last_access > self.idle_timeout]:
+                del self._windows[idle]
+
+        window = self._windows.get(session_id)
+        if window is None:
+            messages = self._query(session_id, self.cache_messages)
+            window = self._windows[session_id] = _SessionWindow(messages, len(messages) < self.cache_messages)
+        window.last_access = now
+        return window
+
+    def append(self, session_id: str, role: str, content: str, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Append a message to a session.
+
+        Args:
+            session_id (str): The chat session
+            role (str): "human" or "ai"
+            content (str): The message text
+            metadata (dict): JSON-serializable extras, e.g. the sources of an answer
+
+        Returns:
+            int: Id of the stored message
+        """
+        metadata_json = json.dumps(metadata) if metadata else None
+        created = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO chat_messages (session_id, role, content, metadata, created) VALUES (?, ?, ?, ?, ?)",
+                (session_id, role, content, metadata_json, created)
+            )
+            window = self._windows.get(session_id)
+            if window is not None:
+                window.messages.append(ChatMessage(cursor.lastrowid, role, content, metadata_json, created))
+                if len(window.messages) > self.cache_messages:
+                    del window.messages[:-self.cache_messages]
+                    window.complete = False
+        return cursor.lastrowid
+
+    def count(self, session_id: str) -> int:
+        """Number of messages in a session."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chat_messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+
+    def recent(self, session_id: str, limit: int, before_id: Optional[int] = None) -> List[ChatMessage]:
+        """
+        The last messages of a session, oldest first.
+
+        Args:
+            session_id (str): The chat session
+            limit (int): Maximum number of messages
+            before_id (int): Only messages older than this id, to page backwards
+
+        Returns:
+            list: ChatMessage objects
+        """
+        with self._lock:
+            if before_id is None:
+                window = self._window(session_id)
+                if limit <= len(window.messages) or window.complete:
+                    return window.messages[-limit:] if limit else []
+            return self._query(session_id, limit, before_id)
+
+    def iter_messages(self, session_id: str, batch_size: int = 500) -> Iterator[ChatMessage]:
+        """All messages of a session, oldest first, read in batches."""
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, role, content, metadata, created FROM chat_messages "
+                    "WHERE session_id = ? AND id > ? ORDER BY id LIMIT ?",
+                    (session_id, last_id, batch_size)
+                ).fetchall()
+            for row in rows:
+                yield ChatMessage(*row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1][0]
+
+    def clear(self, session_id: str):
+        """Delete all messages of a session."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chat_messages WHERE session_id = ?", (session_id,))
+            self._windows[session_id] = _SessionWindow([], True)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """Approximate bytes held in memory per active session."""
+        with self._lock:
+            return {
+                session_id: sum(message.nbytes() for message in window.messages)
+                for session_id, window in self._windows.items()
+            }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_chat_store() -> ChatStore:
+    """Return the process-wide chat store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ChatStore()
+        return _store
@@ -3,7 +3,15 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from typing import NamedTuple, Tuple
 import numpy as np
+from token_tracker import get_token_tracker
+from calculators import get_generation_stats
+from chat_store import get_chat_store
+from benchmarks import ALL_STAGES, BENCHMARK_METRICS, BENCHMARK_PATH, get_benchmark_index
+from ledger_import import LedgerImportError, import_ledger
+from projection import project_cash, scenario_grid, sensitivity_grid, simulate_runway
+from plotly.subplots import make_subplots
 
 def calculate_runway(monthly_expenses, current_cash, monthly_revenue):
     """Calculate runway and other financial metrics."""
@@ -24,31 +32,36 @@ def calculate_runway(monthly_expenses, current_cash, monthly_revenue):
         'monthly_burn_rate': monthly_burn_rate
     }
 
-def generate_cash_projection(current_cash, monthly_expenses, monthly_revenue, months=12):
+def generate_cash_projection(current_cash, monthly_expenses, monthly_revenue, months=12,
+                             expense_growth=0.0, revenue_growth=0.0, hires=None, funding=None):
     """Generate cash projection over time."""
-    dates = [(datetime.now() + timedelta(days=30*x)).strftime('%Y-%m-%d') for x in range(months+1)]
-    cash_balance = [current_cash]
-    
-    for _ in range(months):
-        current_cash = current_cash - (monthly_expenses - monthly_revenue)
-        cash_balance.append(max(0, current_cash))
-    
+    projection = project_cash(current_cash, monthly_expenses, monthly_revenue, months,
+                              expense_growth, revenue_growth, hires, funding)
     return pd.DataFrame({
-        'Date': dates,
-        'Cash Balance': cash_balance
+        'Date': projection_dates(months),
+        'Cash Balance': np.maximum(projection['cash'][0], 0)
     })
 
-def generate_expense_breakdown(monthly_expenses):
-    """Generate a breakdown of expenses by category."""
-    # Example expense categories and their typical percentages
-    categories = {
-        'Salaries': 0.6,
-        'Infrastructure': 0.15,
-        'Marketing': 0.1,
-        'Operations': 0.1,
-        'Other': 0.05
-    }
-    
+def projection_dates(months):
+    """Dates of month 0 (today) through the end of the projection horizon."""
+    return [(datetime.now() + timedelta(days=30*x)).strftime('%Y-%m-%d') for x in range(months+1)]
+
+def format_runway(runway_months, months):
+    """Format a runway, showing runways beyond the horizon as a lower bound."""
+    return f"{runway_months:.1f} months" if runway_months <= months else f"> {months} months"
+
+# Example expense categories and their typical percentages
+EXPENSE_CATEGORIES = {
+    'Salaries': 0.6,
+    'Infrastructure': 0.15,
+    'Marketing': 0.1,
+    'Operations': 0.1,
+    'Other': 0.05
+}
+
+def generate_expense_breakdown(monthly_expenses, categories=None):
+    """Generate a breakdown of expenses by category, using imported category shares if given."""
+    categories = categories or EXPENSE_CATEGORIES
     return pd.DataFrame({
         'Category': list(categories.keys()),
         'Amount': [monthly_expenses * pct for pct in categories.values()]
@@ -63,9 +76,22 @@ def get_risk_zone(runway_months):
     else:
         return "Danger Zone", "red"
 
-def display_risk_zone(runway_months):
-    """Display the risk zone indicator."""
-    risk_zone, color = get_risk_zone(runway_months)
+def display_risk_zone(runway_months, months, simulated_runway=None, prob_zero=None):
+    """
+    Display the risk zone indicator.
+
+    With a Monte Carlo simulation, the zone is set by the pessimistic (P10)
+    simulated runway, which the indicator shows with the chance of running out of
+    cash within the warning window, instead of relying on the point estimate alone.
+    """
+    if simulated_runway is None:
+        zone_runway, label = runway_months, "runway"
+    else:
+        # An actual simulated runway, since interpolating between infinite runways gives NaN
+        zone_runway, label = np.percentile(simulated_runway, 10, method="lower"), "runway (P10)"
+    risk_zone, color = get_risk_zone(zone_runway)
+    window = min(6, len(prob_zero) - 1) if prob_zero is not None else 0
+    odds = f" · {prob_zero[window]:.0%} chance of running out of cash within {window} months" if window else ""
     
     # Create a custom HTML/CSS for the risk zone indicator
     st.markdown(f"""
@@ -81,35 +107,258 @@ def display_risk_zone(runway_months):
     }}
     </style>
     <div class="risk-zone">
-        {risk_zone} - {runway_months:.1f} months runway
+        {risk_zone} - {format_runway(zone_runway, months)} {label}{odds}
     </div>
     """, unsafe_allow_html=True)
 
+class Scenario(NamedTuple):
+    """Inputs of one dashboard projection; hashable, so it keys the figure caches."""
+    current_cash: float
+    monthly_expenses: float
+    monthly_revenue: float
+    months: int
+    expense_growth: float
+    revenue_growth: float
+    hires: Tuple[Tuple[int, float], ...]
+    funding: Tuple[Tuple[int, float], ...]
+
+class Uncertainty(NamedTuple):
+    """Monte Carlo inputs of the dashboard simulation."""
+    revenue_volatility: float
+    churn: float
+    churn_volatility: float
+    expense_volatility: float
+    paths: int
+
+# Memoized projections and figures are shared by all sessions of the server process.
+# Figures carry today's dates on their x axis, so they expire after an hour.
+CACHE_ENTRIES = 256
+CACHE_TTL = 3600
+GRID_STEPS = 21
+
+def event_rows(table, month_column, amount_column):
+    """(month, amount) pairs of the complete rows of a data editor table."""
+    table = table.dropna(subset=[month_column, amount_column])
+    return tuple(zip(table[month_column].astype(int).tolist(), table[amount_column].astype(float).tolist()))
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def compute_projection(scenario, spread):
+    """Project the base case (row 0) and the grid of growth scenarios around it in one pass."""
+    expense_growth, revenue_growth = scenario_grid(scenario.expense_growth, scenario.revenue_growth, spread, GRID_STEPS)
+    return project_cash(
+        scenario.current_cash, scenario.monthly_expenses, scenario.monthly_revenue, scenario.months,
+        np.concatenate([[scenario.expense_growth], expense_growth]),
+        np.concatenate([[scenario.revenue_growth], revenue_growth]),
+        scenario.hires, scenario.funding
+    )
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def compute_simulation(scenario, uncertainty):
+    """Run the Monte Carlo simulation around the base case."""
+    return simulate_runway(*scenario, *uncertainty)
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def cash_projection_figure(scenario, spread, uncertainty):
+    """Cash chart with the base case, scenario range, simulated bands and probability of zero cash."""
+    dates = projection_dates(scenario.months)
+    cash = np.maximum(compute_projection(scenario, spread)['cash'], 0)
+    simulation = compute_simulation(scenario, uncertainty)
+    
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+    fig.add_trace(go.Scatter(x=dates, y=cash[1:].max(axis=0), mode='lines',
+                             line=dict(width=0), showlegend=False, hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=dates, y=cash[1:].min(axis=0), mode='lines', line=dict(width=0),
+                             fill='tonexty', fillcolor='rgba(99, 110, 250, 0.2)', name='Scenario Range'))
+    fig.add_trace(go.Scatter(x=dates, y=np.maximum(simulation['p90'], 0), mode='lines',
+                             line=dict(width=1, dash='dot', color='seagreen'), name='P90'))
+    fig.add_trace(go.Scatter(x=dates, y=np.maximum(simulation['p10'], 0), mode='lines',
+                             line=dict(width=1, dash='dot', color='seagreen'), fill='tonexty',
+                             fillcolor='rgba(46, 139, 87, 0.15)', name='P10'))
+    fig.add_trace(go.Scatter(x=dates, y=np.maximum(simulation['p50'], 0), mode='lines',
+                             line=dict(color='seagreen'), name='P50 (simulated)'))
+    fig.add_trace(go.Scatter(x=dates, y=cash[0], mode='lines', name='Base Case'))
+    fig.add_trace(go.Scatter(x=dates, y=simulation['prob_zero'] * 100, mode='lines',
+                             line=dict(color='crimson', dash='dash'), name='Probability of Zero Cash'),
+                  secondary_y=True)
+    fig.update_layout(title='Cash Balance Over Time', xaxis_title='Date')
+    fig.update_yaxes(title_text='Cash Balance ($)', secondary_y=False)
+    fig.update_yaxes(title_text='Probability of Zero Cash (%)', range=[0, 100], secondary_y=True)
+    fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Zero Cash")
+    return fig
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def expense_breakdown_figure(monthly_expenses, expense_shares):
+    """Pie chart of monthly expenses by category."""
+    return px.pie(generate_expense_breakdown(monthly_expenses, dict(expense_shares)), values='Amount',
+                  names='Category', title='Monthly Expenses Breakdown')
+
+@st.cache_data(max_entries=CACHE_ENTRIES, show_spinner=False)
+def ledger_history_figures(monthly, categories):
+    """Monthly burn history and expenses by category of an imported ledger."""
+    months = monthly.index.astype(str)
+    burn_fig = go.Figure()
+    burn_fig.add_trace(go.Bar(x=months, y=monthly['expenses'], name='Expenses', marker_color='indianred'))
+    burn_fig.add_trace(go.Bar(x=months, y=monthly['revenue'], name='Revenue', marker_color='seagreen'))
+    burn_fig.add_trace(go.Scatter(x=months, y=monthly['net_burn'], mode='lines+markers', name='Net Burn'))
+    burn_fig.update_layout(barmode='group', title='Monthly Burn History',
+                           xaxis_title='Month', yaxis_title='Amount ($)')
+    
+    category_fig = px.bar(categories.set_axis(months), title='Expenses by Category',
+                          labels={'index': 'Month', 'value': 'Expenses ($)', 'variable': 'Category'})
+    return burn_fig, category_fig
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def runway_grid_figure(scenario, spread):
+    """Heatmap of the runway of every scenario in the growth grid."""
+    offsets = np.linspace(-spread, spread, GRID_STEPS)
+    runway = compute_projection(scenario, spread)['runway'][1:]
+    return px.imshow(
+        np.minimum(runway, scenario.months).reshape(GRID_STEPS, GRID_STEPS),
+        x=[f"{(scenario.revenue_growth + offset) * 100:.1f}%" for offset in offsets],
+        y=[f"{(scenario.expense_growth + offset) * 100:.1f}%" for offset in offsets],
+        origin='lower',
+        color_continuous_scale='RdYlGn',
+        title='Runway by Growth Scenario',
+        labels={'x': 'Revenue Growth', 'y': 'Expense Growth', 'color': 'Runway (months)'}
+    )
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def expense_trend_figure(scenario):
+    """Line chart of the projected expenses and revenue of the base case."""
+    projection = project_cash(*scenario)
+    trend = pd.DataFrame({
+        'Month': range(1, scenario.months + 1),
+        'Expenses': projection['expenses'][0],
+        'Revenue': projection['revenue'][0]
+    })
+    return px.line(trend, x='Month', y=['Expenses', 'Revenue'],
+                   title='Projected Expenses and Revenue',
+                   labels={'value': 'Amount ($)', 'variable': ''})
+
+@st.cache_data(max_entries=CACHE_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+def sensitivity_figures(scenario, expense_shares, relative_range, growth_range):
+    """Tornado chart and driver grid heatmap of the runway sensitivity analysis."""
+    grid = sensitivity_grid(*scenario, expense_shares, relative_range, growth_range)
+    base_runway = min(grid['base_runway'], scenario.months)
+    runway = np.minimum(grid['runway'], scenario.months)
+    
+    # Tornado: runway at the lowest and highest level of each driver, widest swing on top
+    tornado = pd.DataFrame({
+        'Driver': grid['drivers'],
+        'Low': runway[:, 0] - base_runway,
+        'High': runway[:, -1] - base_runway
+    })
+    tornado['Swing'] = (tornado['High'] - tornado['Low']).abs()
+    tornado = tornado.sort_values('Swing')
+    
+    tornado_fig = go.Figure()
+    tornado_fig.add_trace(go.Bar(y=tornado['Driver'], x=tornado['Low'], base=base_runway, orientation='h',
+                                 name='Driver Lowered', marker_color='indianred'))
+    tornado_fig.add_trace(go.Bar(y=tornado['Driver'], x=tornado['High'], base=base_runway, orientation='h',
+                                 name='Driver Raised', marker_color='seagreen'))
+    tornado_fig.update_layout(barmode='overlay', title='What Moves Runway the Most',
+                              xaxis_title='Runway (months)', yaxis_title='')
+    tornado_fig.add_vline(x=base_runway, line_dash="dash", annotation_text="Base Case")
+    
+    grid_fig = px.imshow(
+        runway,
+        x=[f"{level:+.0%}" for level in grid['levels']],
+        y=list(grid['drivers']),
+        color_continuous_scale='RdYlGn',
+        aspect='auto',
+        title='Runway by Driver Level (share of the range)',
+        labels={'x': 'Driver Level', 'y': 'Driver', 'color': 'Runway (months)'}
+    )
+    return tornado_fig, grid_fig
+
+@st.fragment
 def display_burn_rate_dashboard():
-    """Display the burn rate dashboard with visualizations."""
+    """
+    Display the burn rate dashboard with visualizations.
+
+    Runs as a fragment, so changing an input reruns only the dashboard instead
+    of the whole app, and rebuilds only the projections and figures whose inputs
+    changed.
+    """
     st.header("📊 Burn Rate Dashboard")
     
+    ledger = display_ledger_import()
+    expense_shares = tuple((ledger or {}).get('category_shares', EXPENSE_CATEGORIES).items())
+    
     # Input section
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Financial Inputs")
-        monthly_expenses = st.number_input("Monthly Expenses ($)", min_value=0, value=50000)
+        monthly_expenses = st.number_input(
+            "Monthly Expenses ($)", min_value=0,
+            value=round(ledger['monthly_expenses']) if ledger else 50000
+        )
         current_cash = st.number_input("Current Cash Balance ($)", min_value=0, value=200000)
-        monthly_revenue = st.number_input("Monthly Revenue ($)", min_value=0, value=10000)
+        monthly_revenue = st.number_input(
+            "Monthly Revenue ($)", min_value=0,
+            value=round(ledger['monthly_revenue']) if ledger else 10000
+        )
+        expense_growth = st.slider("Monthly Expense Growth (%)", -10.0, 20.0, 5.0, 0.5) / 100
+        revenue_growth = st.slider("Monthly Revenue Growth (%)", -10.0, 30.0, 0.0, 0.5) / 100
+        months = st.slider("Projection Horizon (months)", 12, 60, 24, 6)
+    
+    with st.expander("Hiring Plan and Funding Events"):
+        hires = st.data_editor(
+            pd.DataFrame({
+                "Start Month": pd.Series(dtype="int"),
+                "Monthly Cost ($)": pd.Series(dtype="float"),
+                "Role": pd.Series(dtype="str")
+            }),
+            num_rows="dynamic",
+            key="dashboard_hires"
+        )
+        funding = st.data_editor(
+            pd.DataFrame({
+                "Month": pd.Series(dtype="int"),
+                "Amount ($)": pd.Series(dtype="float"),
+                "Source": pd.Series(dtype="str")
+            }),
+            num_rows="dynamic",
+            key="dashboard_funding"
+        )
+    scenario = Scenario(
+        float(current_cash), float(monthly_expenses), float(monthly_revenue), months,
+        expense_growth, revenue_growth,
+        event_rows(hires, "Start Month", "Monthly Cost ($)"),
+        event_rows(funding, "Month", "Amount ($)")
+    )
+    
+    # Base case plus a grid of growth scenarios around it, projected in one pass
+    spread = st.slider("Scenario Range (± growth points)", 0.0, 10.0, 3.0, 0.5) / 100
+    projection = compute_projection(scenario, spread)
+    runway = projection['runway'][0]
+    
+    # Monte Carlo simulation around the base case
+    with st.expander("Monte Carlo Simulation"):
+        col_a, col_b = st.columns(2)
+        with col_a:
+            revenue_volatility = st.slider("Revenue Growth Volatility (± points/month)", 0.0, 20.0, 3.0, 0.5) / 100
+            churn = st.slider("Mean Monthly Revenue Churn (%)", 0.0, 20.0, 2.0, 0.5) / 100
+        with col_b:
+            churn_volatility = st.slider("Churn Volatility (± points/month)", 0.0, 10.0, 1.0, 0.5) / 100
+            expense_volatility = st.slider("Monthly Expense Variance (± %)", 0.0, 30.0, 5.0, 1.0) / 100
+        paths = st.select_slider("Simulated Paths", [1000, 5000, 10000, 20000, 50000], value=10000)
+    uncertainty = Uncertainty(revenue_volatility, churn, churn_volatility, expense_volatility, paths)
+    simulation = compute_simulation(scenario, uncertainty)
     
     # Calculate metrics
     metrics = calculate_runway(monthly_expenses, current_cash, monthly_revenue)
     
     # Display risk zone
-    display_risk_zone(metrics['runway_months'])
+    display_risk_zone(runway, months, simulation['runway'], simulation['prob_zero'])
     
     # Display key metrics
     with col2:
         st.subheader("Key Metrics")
         st.metric(
-            label="Runway",
-            value=f"{metrics['runway_months']:.1f} months",
+            label="Projected Runway",
+            value=format_runway(runway, months),
             delta=f"{metrics['monthly_burn_rate']:.1f}% monthly burn rate"
         )
         st.metric(
@@ -117,52 +366,200 @@ def display_burn_rate_dashboard():
             value=f"${metrics['net_monthly_burn']:,.2f}",
             delta="per month"
         )
-    
-    # Generate data for visualizations
-    cash_projection = generate_cash_projection(current_cash, monthly_expenses, monthly_revenue)
-    expense_breakdown = generate_expense_breakdown(monthly_expenses)
+        st.metric(
+            label="Runway Without Growth",
+            value=format_runway(metrics['runway_months'], months)
+        )
+        st.metric(
+            label="Simulated Runway (P10 / P50 / P90)",
+            value=" / ".join(
+                format_runway(value, months).replace(" months", "")
+                for value in np.percentile(simulation['runway'], [10, 50, 90], method="lower")
+            ),
+            delta="months"
+        )
+        st.metric(
+            label="Scenarios Running Out of Cash",
+            value=f"{np.isfinite(projection['runway'][1:]).mean():.0%}",
+            delta=f"within {months} months"
+        )
     
     # Visualizations
     st.subheader("Cash Projection")
-    fig = px.line(cash_projection, x='Date', y='Cash Balance',
-                  title='Cash Balance Over Time',
-                  labels={'Cash Balance': 'Cash Balance ($)', 'Date': 'Date'})
-    fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Zero Cash")
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(cash_projection_figure(scenario, spread, uncertainty), use_container_width=True)
     
     # Expense breakdown
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.pie(expense_breakdown, values='Amount', names='Category',
-                     title='Monthly Expenses Breakdown')
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(expense_breakdown_figure(monthly_expenses, expense_shares), use_container_width=True)
     
     with col2:
-        # Monthly runway bar chart
-        months = list(range(1, 13))
-        runway_data = pd.DataFrame({
-            'Month': months,
-            'Runway': [metrics['runway_months'] - i for i in months]
-        })
-        runway_data['Runway'] = runway_data['Runway'].clip(lower=0)
-        
-        fig = px.bar(runway_data, x='Month', y='Runway',
-                     title='Estimated Runway by Month',
-                     labels={'Runway': 'Remaining Months', 'Month': 'Month'})
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(runway_grid_figure(scenario, spread), use_container_width=True)
     
     # Expense growth trend
     st.subheader("Expense Growth Trend")
-    months = list(range(1, 13))
-    growth_rate = 0.05  # 5% monthly growth
-    expenses = [monthly_expenses * (1 + growth_rate) ** i for i in range(12)]
+    st.plotly_chart(expense_trend_figure(scenario), use_container_width=True)
+    
+    if ledger:
+        st.subheader("Imported Transactions")
+        burn_fig, category_fig = ledger_history_figures(ledger['monthly'], ledger['categories'])
+        st.plotly_chart(burn_fig, use_container_width=True)
+        st.plotly_chart(category_fig, use_container_width=True)
+    
+    display_sensitivity_analysis(scenario, expense_shares)
+    display_benchmarks({
+        'monthly_burn': metrics['net_monthly_burn'],
+        'runway_months': runway,
+        'revenue_growth': revenue_growth * 100
+    })
+
+def display_benchmarks(values):
+    """Display percentile ranks of the startup's metrics against peers at the same stage."""
+    st.subheader("Peer Benchmarks")
+    try:
+        index = get_benchmark_index()
+    except (ValueError, OSError) as e:
+        st.error(f"Could not load the benchmark dataset: {e}")
+        return
+    if index is None:
+        st.info(
+            f"No benchmark dataset found at `{BENCHMARK_PATH}`. Provide a CSV with the columns "
+            f"stage, {', '.join(BENCHMARK_METRICS)} (one row per startup) and set BENCHMARK_PATH "
+            "to compare your metrics with peers."
+        )
+        return
+    
+    stage = st.selectbox("Stage", [ALL_STAGES] + index.stages, key="benchmark_stage")
+    columns = st.columns(len(BENCHMARK_METRICS))
+    for column, (metric, label) in zip(columns, BENCHMARK_METRICS.items()):
+        percentile = index.percentile(metric, values[metric], stage)
+        if percentile is None:
+            column.metric(label, "No peers")
+            continue
+        median = index.quantiles(metric, stage, (50,))[0]
+        column.metric(
+            label,
+            f"P{percentile:.0f}",
+            delta=f"peer median {median:,.1f}",
+            delta_color="off",
+            help=f"Higher than {percentile:.0f}% of {index.peers(metric, stage):,} startups"
+        )
+
+def display_ledger_import():
+    """
+    Display the bank/ledger import and return the imported summary, if any.
+
+    The summary is kept in the session, so the file is parsed only once per upload
+    rather than on every rerun of the dashboard.
+    """
+    with st.expander("Import Bank Transactions"):
+        st.caption(
+            "Upload a CSV or OFX/QFX export of your bank account or ledger. Monthly expenses, "
+            "revenue and the expense breakdown are then taken from your recent transactions."
+        )
+        upload = st.file_uploader("Transaction Export", type=["csv", "ofx", "qfx"], key="ledger_upload")
+        if upload is None:
+            st.session_state.pop('ledger_import', None)
+            return None
+        
+        file_id = getattr(upload, 'file_id', upload.name)
+        imported = st.session_state.get('ledger_import')
+        if imported is None or imported[0] != file_id:
+            try:
+                with st.spinner("Importing transactions..."):
+                    imported = (file_id, import_ledger(upload, upload.name))
+            except (LedgerImportError, ValueError, UnicodeDecodeError) as e:
+                st.error(f"Could not import {upload.name}: {e}")
+                return None
+            st.session_state.ledger_import = imported
+        
+        ledger = imported[1]
+        months = ledger['monthly'].index
+        averaged = ledger['averaged_months']
+        partial = f" {ledger['partial_month']} is still in progress and left out." if ledger['partial_month'] else ""
+        st.success(
+            f"Imported {ledger['transactions']:,} transactions from {months.min()} to {months.max()}. "
+            f"Runway inputs use the average of {averaged.min()} to {averaged.max()}.{partial}"
+        )
+        return ledger
+
+def display_sensitivity_analysis(scenario, expense_shares):
+    """Display which runway drivers matter most as a tornado chart and a sensitivity grid."""
+    st.subheader("Runway Sensitivity")
+    col1, col2 = st.columns(2)
+    with col1:
+        relative_range = st.slider("Amount and Category Range (± %)", 5, 50, 20, 5) / 100
+    with col2:
+        growth_range = st.slider("Growth Rate Range (± points)", 0.5, 10.0, 2.0, 0.5) / 100
     
-    fig = px.line(x=months, y=expenses,
-                  title='Projected Expense Growth',
-                  labels={'x': 'Month', 'y': 'Expenses ($)'})
+    tornado_fig, grid_fig = sensitivity_figures(scenario, expense_shares, relative_range, growth_range)
+    st.plotly_chart(tornado_fig, use_container_width=True)
+    st.plotly_chart(grid_fig, use_container_width=True)
+
+def display_usage_analytics():
+    """Display token usage over time from the precomputed usage rollups."""
+    st.header("🔢 Token Usage Analytics")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        period = st.selectbox(
+            "Period",
+            ["Last 24 hours", "Last 7 days", "Last 30 days", "Last 90 days"],
+            index=1,
+            key="usage_period"
+        )
+    with col2:
+        granularity = st.selectbox("Granularity", ["Hourly", "Daily"], key="usage_granularity")
+
+    days = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30, "Last 90 days": 90}[period]
+    start = datetime.now() - timedelta(days=days)
+    tracker = get_token_tracker()
+    series = tracker.get_usage_series("hour" if granularity == "Hourly" else "day", start=start)
+
+    if not series:
+        st.info("No token usage recorded in this period yet.")
+        return
+
+    usage = pd.DataFrame(series)
+
+    # Key metrics
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Tokens", f"{usage['tokens'].sum():,}")
+    col2.metric("Cost", f"${usage['cost'].sum():.4f}")
+    col3.metric("LLM Calls", f"{usage['calls'].sum():,}")
+    col4.metric(
+        "Tokens per Call (p50 / p95)",
+        f"{tracker.get_tokens_percentile(50, start=start):,.0f} / "
+        f"{tracker.get_tokens_percentile(95, start=start):,.0f}"
+    )
+
+    fig = px.bar(usage, x='period', y='tokens', color='model',
+                 title=f"Tokens per {'Hour' if granularity == 'Hourly' else 'Day'} by Model",
+                 labels={'period': 'Time', 'tokens': 'Tokens', 'model': 'Model'})
+    st.plotly_chart(fig, use_container_width=True)
+
+    by_model = usage.groupby('model', as_index=False)[['calls', 'tokens', 'cost']].sum()
+    fig = px.pie(by_model, values='cost', names='model', title='Cost by Model')
     st.plotly_chart(fig, use_container_width=True)
 
+    # Structured-output health of the canvas and pitch deck generators (this server process)
+    stats = get_generation_stats()
+    st.subheader("Generation Quality")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Generations", f"{stats['generations']:,}")
+    col2.metric("Parse Failure Rate", f"{stats['parse_failure_rate']:.1%}")
+    col3.metric("Repair Calls per Generation", f"{stats['retry_rate']:.2f}")
+
+    # Chat messages held in memory by active sessions (this server process); idle ones are dropped
+    memory = get_chat_store().memory_usage()
+    st.subheader("Chat Memory")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sessions in Memory", f"{len(memory):,}")
+    col2.metric("Total", f"{sum(memory.values()) / 1024:,.1f} KB")
+    col3.metric("This Session", f"{memory.get(st.session_state.get('chat_session_id'), 0) / 1024:,.1f} KB")
+
 def display_dashboard():
     """Main function to display the dashboard."""
-    display_burn_rate_dashboard() 
\ No newline at end of file
+    display_burn_rate_dashboard()
+    display_usage_analytics() 
\ No newline at end of file
@@ -0,0 +1,116 @@
+import json
+from typing import Any, List, Tuple
+
+class JSONObjectStream:
+    """
+    Incremental parser for a JSON object that arrives in chunks.
+
+    Each top-level member is emitted as a (key, value) pair as soon as it is
+    syntactically complete, without waiting for the rest of the document.
+    Text before the opening brace (e.g. a Markdown code fence) is ignored.
+
+    Example:
+        stream = JSONObjectStream()
+        for chunk in chunks:
+            for key, value in stream.feed(chunk):
+                ...
+        for key, value in stream.close():
+            ...
+
+    Members returned by close() were rebuilt from a cut-off document; their keys
+    are listed in recovered, since their last string may end mid-sentence.
+    """
+
+    def __init__(self):
+        self.errors: List[str] = []
+        self.recovered: List[str] = []
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+        self._done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of text and return the members it completed.
+
+        Args:
+            chunk (str): The next piece of the JSON document
+
+        Returns:
+            list: (key, value) pairs completed by this chunk, in document order
+        """
+        members = []
+        self._text += chunk
+        text = self._text
+
+        while self._pos < len(text) and not self._done:
+            char = text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                if self._stack:
+                    self._in_string = True
+            elif char in "{[":
+                self._stack.append(char)
+                if len(self._stack) == 1:
+                    if char != "{":
+                        self.errors.append("Document is not a JSON object")
+                        self._done = True
+                    self._member_start = self._pos + 1
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if not self._stack:
+                    # Closing brace of the document ends the last member
+                    self._emit(self._text[self._member_start:self._pos], members)
+                    self._done = True
+            elif char == "," and len(self._stack) == 1:
+                self._emit(text[self._member_start:self._pos], members)
+                self._member_start = self._pos + 1
+            self._pos += 1
+
+        return members
+
+    def close(self) -> List[Tuple[str, Any]]:
+        """
+        Finish the stream and try to recover the member cut off by a truncated document.
+
+        Returns:
+            list: The recovered member, if any; its key is added to recovered
+        """
+        members = []
+        if self._done or self._member_start is None:
+            return members
+        self._done = True
+
+        tail = self._text[self._member_start:]
+        if self._in_string:
+            tail += '"'
+        tail = tail.rstrip()
+        if tail.endswith(","):
+            tail = tail[:-1]
+        # Close every bracket still open inside the member
+        for opener in reversed(self._stack[1:]):
+            tail = tail.rstrip().rstrip(",") + ("}" if opener == "{" else "]")
+        self._emit(tail, members, recovering=True)
+        self.recovered.extend(key for key, _ in members)
+        return members
+
+    def _emit(self, member: str, members: List[Tuple[str, Any]], recovering: bool = False):
+        """Parse a single '"key": value' member and add it to members."""
+        if not member.strip():
+            return
+        try:
+            parsed = json.loads("{" + member + "}")
+        except json.JSONDecodeError as e:
+            self.errors.append(f"{'Unrecoverable tail' if recovering else 'Malformed member'}: {e}")
+            return
+        members.extend(parsed.items())
@@ -0,0 +1,250 @@
+"""Import of bank and ledger transaction exports into monthly burn metrics.
+
+Transactions are read in chunks and folded into running monthly totals right
+away, so memory stays bounded by the number of months and categories rather
+than the number of rows. Supported formats:
+    CSV: delimiter, decimal separator and the date, amount and description
+        columns are detected from the header (English and German bank exports),
+        with either one signed amount column or separate debit/credit columns.
+    OFX/QFX: <STMTTRN> blocks with DTPOSTED, TRNAMT, NAME and MEMO.
+
+Outflows are categorized with EXPENSE_RULES (first match wins, otherwise
+"Other"). Inflows count as revenue unless they match FUNDING_PATTERN.
+"""
+
+import csv
+import io
+import re
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# (category, pattern) rules for outflows, matched case-insensitively at word starts in the description
+EXPENSE_RULES = [
+    ("Salaries", r"payroll|salary|salaries|wage|gusto|deel|rippling|lohn|gehalt|sozialversicherung|krankenkasse"),
+    ("Infrastructure", r"aws|amazon web services|google cloud|gcp|azure|heroku|vercel|digitalocean|github|atlassian|slack|openai|hetzner|software|saas"),
+    ("Marketing", r"google ads|adwords|facebook|meta ads|linkedin|twitter|hubspot|mailchimp|marketing|advertising|werbung"),
+    ("Operations", r"rent|miete|office|wework|insurance|versicherung|legal|lawyer|anwalt|accounting|steuerberater|utilities|travel|uber|lufthansa|bahn"),
+]
+FUNDING_PATTERN = r"investment|investor|seed|series [a-z]|safe|convertible|loan|darlehen|grant|foerderung|förderung|capital increase|kapitalerhöhung"
+
+CHUNK_ROWS = 200_000
+OFX_BLOCK_BYTES = 4 * 1024 * 1024
+
+DATE_COLUMNS = ("date", "transaction date", "booking date", "posted date", "posting date", "value date",
+                "buchungstag", "buchungsdatum", "datum", "valuta", "wertstellung")
+AMOUNT_COLUMNS = ("amount", "transaction amount", "value", "betrag", "umsatz", "betrag (eur)")
+DEBIT_COLUMNS = ("debit", "withdrawal", "withdrawals", "money out", "soll", "ausgang")
+CREDIT_COLUMNS = ("credit", "deposit", "deposits", "money in", "haben", "eingang")
+DESCRIPTION_COLUMNS = ("description", "memo", "payee", "name", "details", "narrative", "counterparty",
+                       "verwendungszweck", "buchungstext", "beguenstigter/zahlungspflichtiger",
+                       "auftraggeber/empfänger", "empfänger")
+
+class LedgerImportError(Exception):
+    """Raised when a file cannot be read as a transaction export."""
+
+def _find_column(columns: List[str], candidates: Tuple[str, ...]) -> Optional[str]:
+    """Return the first column whose normalized name is one of the candidates."""
+    normalized = {column.strip().lower(): column for column in columns}
+    for candidate in candidates:
+        if candidate in normalized:
+            return normalized[candidate]
+    return None
+
+def categorize(descriptions: pd.Series, amounts: np.ndarray) -> np.ndarray:
+    """
+    Assign a category to each transaction.
+
+    Each distinct description is matched against the rules only once, which
+    keeps categorization fast for exports with many recurring payees.
+
+    Args:
+        descriptions (Series): Transaction descriptions
+        amounts (array): Signed amounts, negative for outflows
+
+    Returns:
+        array: Category per transaction, "Revenue" or "Funding" for inflows
+    """
+    codes, uniques = pd.factorize(descriptions.fillna("").astype(str).str.lower(), sort=False)
+    uniques = pd.Series(uniques)
+    expense_category = np.select(
+        [uniques.str.contains(rf"\b(?:{pattern})", regex=True).to_numpy() for _, pattern in EXPENSE_RULES],
+        [category for category, _ in EXPENSE_RULES],
+        default="Other"
+    )
+    inflow_category = np.where(
+        uniques.str.contains(rf"\b(?:{FUNDING_PATTERN})", regex=True).to_numpy(), "Funding", "Revenue"
+    )
+    return np.where(amounts < 0, expense_category[codes], inflow_category[codes])
+
+def _aggregate(dates: pd.Series, amounts: np.ndarray, descriptions: pd.Series) -> pd.Series:
+    """Sum one chunk of transactions by (month, category), as positive amounts."""
+    valid = dates.notna().to_numpy() & np.isfinite(amounts)
+    dates, amounts, descriptions = dates[valid], amounts[valid], descriptions[valid]
+    months = dates.to_numpy().astype("datetime64[M]")
+    categories = categorize(descriptions, amounts)
+    return pd.Series(np.abs(amounts)).groupby([months, categories]).sum()
+
+def _parse_amounts(values: pd.Series, decimal: str) -> np.ndarray:
+    """Convert amounts that pandas could not read as numbers, e.g. with currency symbols."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    text = values.astype(str).str.replace(r"[^\d,.\-+()]", "", regex=True)
+    # Accounting notation: (12.50) is an outflow
+    text = text.str.replace(r"^\((.*)\)$", r"-\1", regex=True)
+    if decimal == ",":
+        text = text.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    else:
+        text = text.str.replace(",", "", regex=False)
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float)
+
+def _csv_chunks(file: IO[bytes], chunk_rows: int) -> Iterator[Tuple[pd.Series, np.ndarray, pd.Series]]:
+    """Yield (dates, signed amounts, descriptions) for each chunk of a CSV export."""
+    sample = file.read(64 * 1024).decode("utf-8-sig", errors="replace")
+    file.seek(0)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+    except csv.Error:
+        delimiter = ","
+    # Semicolon-separated exports (common in Germany) use a decimal comma
+    decimal, thousands = (",", ".") if delimiter == ";" else (".", ",")
+
+    header = next(csv.reader(io.StringIO(sample), delimiter=delimiter), [])
+    date_column = _find_column(header, DATE_COLUMNS)
+    amount_column = _find_column(header, AMOUNT_COLUMNS)
+    debit_column = _find_column(header, DEBIT_COLUMNS)
+    credit_column = _find_column(header, CREDIT_COLUMNS)
+    description_column = _find_column(header, DESCRIPTION_COLUMNS)
+    if date_column is None or (amount_column is None and debit_column is None and credit_column is None):
+        raise LedgerImportError(f"Could not find date and amount columns in: {', '.join(header)}")
+
+    columns = [column for column in (date_column, amount_column, debit_column, credit_column, description_column) if column]
+    text_columns = {column: str for column in (date_column, description_column) if column}
+    day_first = None
+    reader = pd.read_csv(
+        file, sep=delimiter, usecols=columns, chunksize=chunk_rows, encoding="utf-8-sig",
+        decimal=decimal, thousands=thousands, dtype=text_columns,
+        on_bad_lines="skip", encoding_errors="replace"
+    )
+    for chunk in reader:
+        if day_first is None:
+            # Dotted dates (31.01.2024) are day-first; ISO and US (01/31/2024) dates are not
+            first = chunk[date_column].dropna()
+            day_first = not first.empty and re.match(r"\d{1,2}\.\d{1,2}\.", first.iloc[0]) is not None
+        dates = pd.to_datetime(chunk[date_column], errors="coerce", dayfirst=day_first)
+
+        if amount_column:
+            amounts = _parse_amounts(chunk[amount_column], decimal)
+        else:
+            debit = _parse_amounts(chunk[debit_column], decimal) if debit_column else np.nan
+            credit = _parse_amounts(chunk[credit_column], decimal) if credit_column else np.nan
+            amounts = np.nan_to_num(credit) - np.abs(np.nan_to_num(debit))
+            # Rows without an amount in either column are not transactions
+            amounts[np.isnan(debit) & np.isnan(credit)] = np.nan
+
+        descriptions = chunk[description_column] if description_column else pd.Series("", index=chunk.index)
+        yield dates.reset_index(drop=True), amounts, descriptions.reset_index(drop=True)
+
+def _ofx_chunks(file: IO[bytes], chunk_rows: int) -> Iterator[Tuple[pd.Series, np.ndarray, pd.Series]]:
+    """Yield (dates, signed amounts, descriptions) for each chunk of an OFX/QFX export."""
+    transaction = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.S | re.I)
+    field = re.compile(r"<(DTPOSTED|TRNAMT|NAME|MEMO)>([^<\r\n]*)", re.I)
+    buffer = ""
+    rows = {"DTPOSTED": [], "TRNAMT": [], "NAME": [], "MEMO": []}
+
+    def flush():
+        dates = pd.to_datetime(pd.Series(rows["DTPOSTED"]).str[:8], format="%Y%m%d", errors="coerce")
+        amounts = pd.to_numeric(pd.Series(rows["TRNAMT"]), errors="coerce").to_numpy(dtype=float)
+        descriptions = pd.Series(rows["NAME"]) + " " + pd.Series(rows["MEMO"])
+        for values in rows.values():
+            values.clear()
+        return dates, amounts, descriptions
+
+    while True:
+        block = file.read(OFX_BLOCK_BYTES)
+        if block:
+            buffer += block.decode("utf-8", errors="replace")
+        end = 0
+        for match in transaction.finditer(buffer):
+            values = dict((name.upper(), value.strip()) for name, value in field.findall(match.group(1)))
+            for name in rows:
+                rows[name].append(values.get(name, ""))
+            end = match.end()
+        buffer = buffer[end:]
+        if len(rows["TRNAMT"]) >= chunk_rows or (not block and rows["TRNAMT"]):
+            yield flush()
+        if not block:
+            break
+
+def import_ledger(file: IO[bytes], filename: str, chunk_rows: int = CHUNK_ROWS,
+                  average_months: int = 3, as_of: Optional[pd.Timestamp] = None) -> Dict[str, Any]:
+    """
+    Import a transaction export and aggregate it into monthly burn metrics.
+
+    Args:
+        file: Binary file object of the export (e.g. a Streamlit upload)
+        filename (str): Name of the file, whose extension selects the format
+        chunk_rows (int): Transactions parsed and aggregated at a time
+        average_months (int): Most recent complete months averaged for the runway inputs
+        as_of (Timestamp, optional): Date of the export, defaults to now; a last
+            month that has not ended by then is left out of the averages
+
+    Returns:
+        dict:
+            monthly (DataFrame): expenses, revenue, funding and net_burn per month
+            categories (DataFrame): Expenses per month (rows) and category (columns)
+            transactions (int): Number of transactions imported
+            monthly_expenses, monthly_revenue (float): Averages of the averaged months
+            category_shares (dict): Share of each expense category over those months
+            averaged_months (PeriodIndex): The months the averages are taken over
+            partial_month (Period): The month in progress left out of the averages, or None
+    """
+    chunks = _ofx_chunks if filename.lower().endswith((".ofx", ".qfx")) else _csv_chunks
+
+    totals = None
+    transactions = 0
+    for dates, amounts, descriptions in chunks(file, chunk_rows):
+        transactions += int((dates.notna().to_numpy() & np.isfinite(amounts)).sum())
+        chunk_totals = _aggregate(dates, amounts, descriptions)
+        totals = chunk_totals if totals is None else totals.add(chunk_totals, fill_value=0)
+    if totals is None or totals.empty:
+        raise LedgerImportError("The file contains no transactions with a valid date and amount.")
+
+    by_category = totals.unstack(fill_value=0.0).sort_index()
+    by_category.index = pd.DatetimeIndex(by_category.index).to_period("M")
+    # Fill months without transactions so averages and charts see them
+    by_category = by_category.reindex(
+        pd.period_range(by_category.index.min(), by_category.index.max(), freq="M"), fill_value=0.0
+    )
+    inflows = [category for category in ("Revenue", "Funding") if category in by_category]
+    categories = by_category.drop(columns=inflows)
+
+    monthly = pd.DataFrame({
+        "expenses": categories.sum(axis=1),
+        "revenue": by_category.get("Revenue", 0.0),
+        "funding": by_category.get("Funding", 0.0)
+    })
+    monthly["net_burn"] = monthly["expenses"] - monthly["revenue"]
+
+    # An export taken mid-month has only part of the current month; it would understate the averages
+    partial_month = monthly.index[-1]
+    if len(monthly) == 1 or partial_month < pd.Period(as_of or pd.Timestamp.now(), freq="M"):
+        partial_month = None
+    complete = monthly if partial_month is None else monthly.iloc[:-1]
+    recent = complete.tail(average_months)
+    recent_categories = categories.loc[recent.index].sum()
+    total_expenses = recent_categories.sum()
+    return {
+        "monthly": monthly,
+        "categories": categories,
+        "transactions": transactions,
+        "monthly_expenses": float(recent["expenses"].mean()),
+        "monthly_revenue": float(recent["revenue"].mean()),
+        "category_shares": {
+            category: float(amount / total_expenses)
+            for category, amount in recent_categories.items()
+            if total_expenses and amount
+        },
+        "averaged_months": recent.index,
+        "partial_month": partial_month
+    }
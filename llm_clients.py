@@ -0,0 +1,89 @@
+"""Process-wide registry of chat model clients.
+
+All modules get their ChatOpenAI instances from get_chat_model(), so clients
+are built once per model and parameter set, and every client sends its
+requests over one pooled keep-alive HTTP connection pool instead of setting
+up new connections and TLS handshakes per request.
+
+Configuration (environment variables):
+    LLM_TIMEOUT: seconds to wait for a response (default: 60)
+    LLM_CONNECT_TIMEOUT: seconds to wait for a connection (default: 10)
+    LLM_POOL_SIZE: maximum open connections to the API (default: 20)
+    LLM_KEEPALIVE_EXPIRY: seconds an idle connection is kept open (default: 60)
+    LLM_MAX_RETRIES: retries for failed requests (default: 2)
+"""
+
+import os
+import threading
+from typing import Any, Dict, Tuple
+import httpx
+from langchain_openai import ChatOpenAI
+from token_tracker import usage_callback
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+_clients: Dict[Tuple[Any, ...], ChatOpenAI] = {}
+_http_client = None
+_lock = threading.Lock()
+
+def get_http_client() -> httpx.Client:
+    """Return the shared HTTP client with the keep-alive connection pool."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=LLM_POOL_SIZE,
+                    max_keepalive_connections=LLM_POOL_SIZE,
+                    keepalive_expiry=LLM_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT)
+            )
+        return _http_client
+
+def close_http_client():
+    """Close the shared HTTP client; the next request opens a new pool, with new chat model clients."""
+    global _http_client
+    with _lock:
+        http_client, _http_client = _http_client, None
+        # The cached clients send their requests over the closed pool
+        _clients.clear()
+    if http_client is not None:
+        http_client.close()
+
+def get_chat_model(model: str = "gpt-3.5-turbo", temperature: float = 0.0, **params: Any) -> ChatOpenAI:
+    """
+    Get the shared chat model client for a model and parameter set.
+
+    Args:
+        model (str): OpenAI model name
+        temperature (float): Sampling temperature
+        **params: Further ChatOpenAI parameters, part of the registry key
+
+    Returns:
+        ChatOpenAI: Client with token usage tracking and the shared connection pool
+    """
+    key = (model, temperature, tuple(sorted(params.items())))
+    with _lock:
+        client = _clients.get(key)
+    if client is not None:
+        return client
+
+    http_client = get_http_client()
+    with _lock:
+        if key not in _clients:
+            _clients[key] = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=http_client,
+                timeout=LLM_TIMEOUT,
+                max_retries=LLM_MAX_RETRIES,
+                callbacks=[usage_callback],
+                **params
+            )
+        return _clients[key]
@@ -0,0 +1,151 @@
+"""Background PDF rendering in a process pool, with a content-hash cache.
+
+ReportLab rendering is CPU-bound, so it runs in worker processes rather than in
+the Streamlit script thread, where it would hold up the page and compete for
+the GIL with every other session. The pool is shared by all sessions of a
+server process. submit_pdf_job() returns a PdfJob handle whose id can be kept
+in session_state and looked up again on later reruns with get_pdf_job().
+
+Jobs are keyed by a hash of the canonical deck JSON, so submitting an unchanged
+deck again returns the existing job and its PDF instead of rendering anew. The
+most recently used jobs are kept in memory; with PDF_CACHE_DIR set, rendered
+PDFs are also stored on disk and survive server restarts.
+
+Workers are spawned, and a spawned process imports the main module of its
+parent; under Streamlit that is the app script, so the script keeps its page
+under an if __name__ == "__main__" guard and a worker only gets its definitions.
+
+Configuration (environment variables):
+    PDF_RENDER_WORKERS: worker processes (default: number of CPUs)
+    PDF_JOB_RETENTION: finished jobs kept in memory (default: 256)
+    PDF_CACHE_DIR: directory of the on-disk PDF cache (default: none)
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from pdf_generator import create_pitch_deck_pdf
+
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", "0")) or os.cpu_count() or 1
+PDF_JOB_RETENTION = int(os.getenv("PDF_JOB_RETENTION", "256"))
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", "")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_jobs: "OrderedDict[str, PdfJob]" = OrderedDict()
+_lock = threading.Lock()
+
+class PdfJob:
+    """Handle of a PDF rendering job running in the process pool, or of a cached PDF."""
+
+    def __init__(self, key: str, future: Future):
+        self.id = key
+        self.future = future
+        self.created = time.time()
+
+    def done(self) -> bool:
+        """Whether the job has finished, successfully or not."""
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None) -> bytes:
+        """The rendered PDF; raises the rendering error if the job failed."""
+        return self.future.result(timeout)
+
+def get_pdf_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool, starting it on first use."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Spawned workers do not inherit the server's threads and locks
+            _executor = ProcessPoolExecutor(
+                max_workers=PDF_RENDER_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _executor
+
+def shutdown_pdf_executor():
+    """Stop the worker processes; queued jobs are cancelled and a later job starts a new pool."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def pdf_cache_key(pitch_deck: Dict[str, Any]) -> str:
+    """Hash of the canonical JSON of a pitch deck; equal decks have equal keys."""
+    canonical = json.dumps(pitch_deck, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _cache_path(key: str) -> Optional[str]:
+    return os.path.join(PDF_CACHE_DIR, f"{key}.pdf") if PDF_CACHE_DIR else None
+
+def _read_cached_pdf(key: str) -> Optional[bytes]:
+    """The PDF of a key from the on-disk cache, if enabled and present."""
+    path = _cache_path(key)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path, "rb") as pdf:
+        return pdf.read()
+
+def _write_cached_pdf(key: str, future: Future):
+    """Store a finished render in the on-disk cache; runs as a done callback."""
+    path = _cache_path(key)
+    if path is None or future.cancelled() or future.exception() is not None:
+        return
+    try:
+        os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first, so readers never see a partial PDF
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as pdf:
+            pdf.write(future.result())
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not cache PDF {key}: {str(e)}")
+
+def submit_pdf_job(pitch_deck: Dict[str, Any]) -> PdfJob:
+    """
+    Render a pitch deck PDF in the background, unless it is already rendered or rendering.
+
+    Args:
+        pitch_deck (dict): The pitch deck, as for create_pitch_deck_pdf
+
+    Returns:
+        PdfJob: Handle of the job, with the deck's cache key as id; a job that
+            failed is submitted again
+    """
+    key = pdf_cache_key(pitch_deck)
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None and not (job.done() and job.future.exception() is not None):
+            _jobs.move_to_end(key)
+            return job
+
+    cached = _read_cached_pdf(key)
+    if cached is not None:
+        future = Future()
+        future.set_result(cached)
+        job = PdfJob(key, future)
+    else:
+        executor = get_pdf_executor()
+        with _lock:
+            job = PdfJob(key, executor.submit(create_pitch_deck_pdf, pitch_deck))
+        job.future.add_done_callback(lambda future: _write_cached_pdf(key, future))
+
+    with _lock:
+        # Another session may have submitted the same deck meanwhile; either job is fine
+        _jobs[key] = job
+        _jobs.move_to_end(key)
+        # Forget the least recently used finished jobs; running ones stay until they finish
+        for job_id in [job_id for job_id, old in _jobs.items() if old.done()][:max(0, len(_jobs) - PDF_JOB_RETENTION)]:
+            del _jobs[job_id]
+    return job
+
+def get_pdf_job(job_id: str) -> Optional[PdfJob]:
+    """Look up a job by id; None if it is unknown or has been forgotten."""
+    with _lock:
+        return _jobs.get(job_id)
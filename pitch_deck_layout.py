@@ -0,0 +1,96 @@
+"""Slide layout of the pitch deck, shared by the Tools tab and the PDF export.
+
+Each slide lists its fields in display order as (field, label, kind), where kind is:
+    heading: the slide's main heading (title slide only)
+    tagline: an emphasized line under the heading
+    text: a plain paragraph
+    labeled: a "Label: value" line
+    list: a label followed by bullet points
+"""
+
+PITCH_DECK_LAYOUT = [
+    {
+        "key": "title_slide",
+        "title": None,
+        "fields": [
+            ("company_name", None, "heading"),
+            ("tagline", None, "tagline"),
+            ("logo_description", "Logo", "labeled")
+        ]
+    },
+    {
+        "key": "problem_slide",
+        "title": "Problem",
+        "fields": [
+            ("main_problem", None, "text"),
+            ("key_pain_points", "Key Pain Points", "list"),
+            ("current_solutions", "Current Solutions", "list")
+        ]
+    },
+    {
+        "key": "solution_slide",
+        "title": "Solution",
+        "fields": [
+            ("main_solution", None, "text"),
+            ("key_features", "Key Features", "list"),
+            ("unique_value", "Unique Value", "labeled")
+        ]
+    },
+    {
+        "key": "market_slide",
+        "title": "Market",
+        "fields": [
+            ("target_market", "Target Market", "labeled"),
+            ("market_size", "Market Size", "labeled"),
+            ("growth_potential", "Growth Potential", "labeled"),
+            ("market_trends", "Market Trends", "list")
+        ]
+    },
+    {
+        "key": "business_model_slide",
+        "title": "Business Model",
+        "fields": [
+            ("revenue_model", "Revenue Model", "labeled"),
+            ("key_metrics", "Key Metrics", "list"),
+            ("cost_structure", "Cost Structure", "list")
+        ]
+    },
+    {
+        "key": "go_to_market_slide",
+        "title": "Go-to-Market Strategy",
+        "fields": [
+            ("strategy", "Strategy", "labeled"),
+            ("channels", "Channels", "list"),
+            ("timeline", "Timeline", "list")
+        ]
+    },
+    {
+        "key": "team_slide",
+        "title": "Team",
+        "fields": [
+            ("key_roles", "Key Roles", "list"),
+            ("team_strengths", "Team Strengths", "list"),
+            ("hiring_plan", "Hiring Plan", "list")
+        ]
+    },
+    {
+        "key": "financials_slide",
+        "title": "Financials",
+        "fields": [
+            ("funding_needed", "Funding Needed", "labeled"),
+            ("use_of_funds", "Use of Funds", "list"),
+            ("financial_projections", "Financial Projections", "list")
+        ]
+    },
+    {
+        "key": "call_to_action",
+        "title": "Call to Action",
+        "fields": [
+            ("next_steps", "Next Steps", "list"),
+            ("contact_info", "Contact Info", "labeled"),
+            ("investment_terms", "Investment Terms", "labeled")
+        ]
+    }
+]
+
+SLIDE_TITLES = {slide["key"]: slide["title"] or "Title" for slide in PITCH_DECK_LAYOUT}
@@ -0,0 +1,253 @@
+"""Vectorized cash projection engine for the burn rate dashboard.
+
+Projects cash, expenses, revenue and net burn month by month for any number of
+scenarios at once. Every scenario shares the starting position, hiring plan and
+funding events but may have its own revenue and expense growth rates, so a whole
+grid of what-if scenarios is one set of array operations instead of a Python
+loop per month and scenario. The starting cash, expenses and revenue may also
+vary per scenario, which the sensitivity analysis uses to perturb every input
+in a single pass.
+
+Conventions:
+    - Month 0 is today; months 1..horizon are the projected month ends.
+    - Growth rates are monthly fractions (0.05 = 5% per month).
+    - Hires are (start month, monthly cost) steps added to expenses from that month on.
+    - Funding events are (month, amount) inflows received in that month.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+
+def _step_series(events: Optional[Iterable[Tuple[int, float]]], months: int, cumulative: bool) -> np.ndarray:
+    """Spread (month, amount) events over the horizon, optionally as permanent steps."""
+    series = np.zeros(months)
+    for month, amount in events or ():
+        month = int(month)
+        if 1 <= month <= months:
+            series[month - 1] += amount
+    return np.cumsum(series) if cumulative else series
+
+def project_cash(current_cash: Any, monthly_expenses: Any, monthly_revenue: Any = 0.0,
+                 months: int = 12, expense_growth: Any = 0.0, revenue_growth: Any = 0.0,
+                 hires: Optional[Iterable[Tuple[int, float]]] = None,
+                 funding: Optional[Iterable[Tuple[int, float]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Project cash over a horizon for one or many growth scenarios.
+
+    Args:
+        current_cash (float or array): Cash balance today, per scenario
+        monthly_expenses (float or array): Current monthly expenses, per scenario
+        monthly_revenue (float or array): Current monthly revenue, per scenario
+        months (int): Projection horizon in months
+        expense_growth (float or array): Monthly expense growth per scenario
+        revenue_growth (float or array): Monthly revenue growth per scenario
+        hires (iterable): (start month, monthly cost) hiring steps
+        funding (iterable): (month, amount) funding events
+
+    Returns:
+        dict: Arrays with one row per scenario (broadcast from the array arguments):
+            cash (scenarios, months + 1): Balance at each month end, month 0 first
+            expenses, revenue, net_burn (scenarios, months): Monthly flows
+            runway (scenarios,): Months until cash first drops below zero, inf if
+                it lasts the whole horizon
+    """
+    current_cash, monthly_expenses, monthly_revenue, expense_growth, revenue_growth = (
+        values[:, None] for values in np.broadcast_arrays(*(
+            np.atleast_1d(np.asarray(values, dtype=float))
+            for values in (current_cash, monthly_expenses, monthly_revenue, expense_growth, revenue_growth)
+        ))
+    )
+    elapsed = np.arange(months)
+
+    expenses = monthly_expenses * (1 + expense_growth) ** elapsed
+    expenses += _step_series(hires, months, cumulative=True)
+    revenue = monthly_revenue * (1 + revenue_growth) ** elapsed
+    net_burn = expenses - revenue
+
+    cash = np.empty((len(expenses), months + 1))
+    cash[:, :1] = current_cash
+    cash[:, 1:] = current_cash + np.cumsum(_step_series(funding, months, cumulative=False) - net_burn, axis=1)
+
+    return {
+        "cash": cash,
+        "expenses": expenses,
+        "revenue": revenue,
+        "net_burn": net_burn,
+        "runway": runway_months(cash)
+    }
+
+def runway_months(cash: np.ndarray) -> np.ndarray:
+    """
+    Months until each cash path first drops below zero.
+
+    The crossing is interpolated linearly within the month, so a path that goes
+    from 10,000 to -10,000 during month 4 has a runway of 3.5 months.
+
+    Args:
+        cash (array): Balances of shape (paths, months + 1), month 0 first
+
+    Returns:
+        array: Runway per path, inf for paths that never run out of cash
+    """
+    cash = np.atleast_2d(cash)
+    negative = cash < 0
+    ran_out = negative.any(axis=1)
+    first = np.where(ran_out, negative.argmax(axis=1), 1)
+
+    rows = np.arange(len(cash))
+    before = cash[rows, np.maximum(first - 1, 0)]
+    after = cash[rows, first]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(before > after, before / (before - after), 0.0)
+    runway = np.maximum(first - 1 + np.clip(fraction, 0.0, 1.0), 0.0)
+    return np.where(ran_out, runway, np.inf)
+
+def scenario_grid(expense_growth: float, revenue_growth: float, spread: float,
+                  steps: int = 21) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Growth rates of a steps x steps grid of scenarios centred on the base case.
+
+    Args:
+        expense_growth (float): Base monthly expense growth
+        revenue_growth (float): Base monthly revenue growth
+        spread (float): Largest deviation from the base rates in either direction
+        steps (int): Grid points per axis
+
+    Returns:
+        tuple: (expense growth, revenue growth) of the grid, flattened row by row
+            with expense growth varying slowest
+    """
+    offsets = np.linspace(-spread, spread, steps)
+    expense, revenue = np.meshgrid(expense_growth + offsets, revenue_growth + offsets, indexing="ij")
+    return expense.ravel(), revenue.ravel()
+
+@lru_cache(maxsize=128)
+def sensitivity_grid(current_cash: float, monthly_expenses: float, monthly_revenue: float, months: int,
+                     expense_growth: float, revenue_growth: float,
+                     hires: Tuple[Tuple[int, float], ...] = (), funding: Tuple[Tuple[int, float], ...] = (),
+                     expense_shares: Tuple[Tuple[str, float], ...] = (), relative_range: float = 0.2,
+                     growth_range: float = 0.02, steps: int = 9) -> Dict[str, Any]:
+    """
+    Runway for each input perturbed on its own across a grid of levels.
+
+    Cash, expenses and revenue are scaled by up to relative_range in either
+    direction; growth rates move by up to growth_range points. Each expense
+    category is scaled by up to relative_range, which changes total expenses
+    by its share of them. All drivers x steps scenarios are projected in one
+    vectorized call, and results are cached per input tuple, so all arguments
+    must be hashable. The returned arrays are read-only because they are shared
+    between callers.
+
+    Args:
+        current_cash, monthly_expenses, monthly_revenue, months, expense_growth,
+        revenue_growth, hires, funding: The base case, as for project_cash
+        expense_shares (tuple): (category, share of expenses) pairs
+        relative_range (float): Largest relative change of amounts and expense categories
+        growth_range (float): Largest absolute change of growth rates
+        steps (int): Levels per driver, from the lowest to the highest perturbation
+
+    Returns:
+        dict:
+            drivers (tuple): Driver names, one per row of runway
+            levels (steps,): Perturbation levels from -1 (lowest) to 1 (highest)
+            runway (drivers, steps): Runway with each driver at each level
+            base_runway (float): Runway of the unperturbed base case
+    """
+    levels = np.linspace(-1, 1, steps)
+    drivers = (
+        ("Cash", "cash", 1.0, relative_range),
+        ("Expenses", "expenses", 1.0, relative_range),
+        ("Revenue", "revenue", 1.0, relative_range),
+        ("Expense Growth", "expense_growth", None, growth_range),
+        ("Revenue Growth", "revenue_growth", None, growth_range)
+    ) + tuple(
+        (f"{category} Costs", "expenses", share, relative_range)
+        for category, share in expense_shares
+    )
+
+    base = {
+        "cash": current_cash,
+        "expenses": monthly_expenses,
+        "revenue": monthly_revenue,
+        "expense_growth": expense_growth,
+        "revenue_growth": revenue_growth
+    }
+    inputs = {name: np.full((len(drivers), steps), value, dtype=float) for name, value in base.items()}
+    for row, (_, name, share, spread) in enumerate(drivers):
+        if share is None:
+            inputs[name][row] += levels * spread
+        else:
+            inputs[name][row] *= 1 + share * levels * spread
+
+    runway = project_cash(
+        inputs["cash"].ravel(), inputs["expenses"].ravel(), inputs["revenue"].ravel(), months,
+        inputs["expense_growth"].ravel(), inputs["revenue_growth"].ravel(), hires, funding
+    )["runway"].reshape(len(drivers), steps)
+    base_runway = project_cash(current_cash, monthly_expenses, monthly_revenue, months,
+                               expense_growth, revenue_growth, hires, funding)["runway"][0]
+
+    levels.setflags(write=False)
+    runway.setflags(write=False)
+    return {
+        "drivers": tuple(driver[0] for driver in drivers),
+        "levels": levels,
+        "runway": runway,
+        "base_runway": float(base_runway)
+    }
+
+def simulate_runway(current_cash: float, monthly_expenses: float, monthly_revenue: float = 0.0,
+                    months: int = 12, expense_growth: float = 0.0, revenue_growth: float = 0.0,
+                    hires: Optional[Iterable[Tuple[int, float]]] = None,
+                    funding: Optional[Iterable[Tuple[int, float]]] = None,
+                    revenue_volatility: float = 0.03, churn: float = 0.02, churn_volatility: float = 0.01,
+                    expense_volatility: float = 0.05, paths: int = 10000,
+                    seed: Optional[int] = 0) -> Dict[str, np.ndarray]:
+    """
+    Monte Carlo simulation of cash paths with stochastic revenue and expenses.
+
+    Each month, revenue grows by a normally distributed gross growth rate and
+    loses a normally distributed churn rate (never negative). The gross growth
+    is centred on revenue_growth + churn, so revenue_growth stays the expected
+    net growth of the base case. Expenses follow the base case (growth and
+    hires) times normally distributed monthly noise.
+
+    Args:
+        current_cash, monthly_expenses, monthly_revenue, months, expense_growth,
+        revenue_growth, hires, funding: The base case, as for project_cash
+        revenue_volatility (float): Standard deviation of monthly revenue growth
+        churn (float): Mean monthly revenue churn
+        churn_volatility (float): Standard deviation of monthly churn
+        expense_volatility (float): Standard deviation of monthly expenses, relative to the base case
+        paths (int): Number of simulated paths
+        seed (int): Random seed, so the same inputs give the same bands; None for a fresh draw
+
+    Returns:
+        dict:
+            p10, p50, p90 (months + 1,): Cash percentiles at each month end, month 0 first
+            prob_zero (months + 1,): Share of paths that have run out of cash by each month
+            runway (paths,): Runway of every path, inf if it lasts the whole horizon
+    """
+    rng = np.random.default_rng(seed)
+    base = project_cash(current_cash, monthly_expenses, monthly_revenue, months,
+                        expense_growth, revenue_growth, hires, funding)
+
+    growth = rng.normal(revenue_growth + churn, revenue_volatility, (paths, months))
+    growth -= np.maximum(rng.normal(churn, churn_volatility, (paths, months)), 0)
+    # Month 1 earns today's revenue, like the base case
+    growth[:, 0] = 0
+    revenue = monthly_revenue * np.cumprod(np.maximum(1 + growth, 0), axis=1)
+    expenses = base["expenses"] * np.maximum(1 + rng.normal(0, expense_volatility, (paths, months)), 0)
+
+    cash = np.empty((paths, months + 1))
+    cash[:, 0] = current_cash
+    cash[:, 1:] = current_cash + np.cumsum(_step_series(funding, months, cumulative=False) + revenue - expenses, axis=1)
+
+    p10, p50, p90 = np.percentile(cash, [10, 50, 90], axis=0)
+    return {
+        "p10": p10,
+        "p50": p50,
+        "p90": p90,
+        "prob_zero": (np.minimum.accumulate(cash, axis=1) < 0).mean(axis=0),
+        "runway": runway_months(cash)
+    }
@@ -0,0 +1,261 @@
+import os
+import threading
+import time
+from typing import Any, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import RunnableLambda
+from storage import connect
+from token_tracker import current_session_id, get_token_tracker, response_usage
+
+class BudgetExceededError(Exception):
+    """Raised when an LLM call is rejected by the rate limiter or a daily budget."""
+
+class RateLimiter:
+    """
+    Token-bucket rate limiting and daily token budgets, per session and global.
+
+    Bucket levels live in the token usage database, so every worker process
+    draws from the same buckets. A call draws its estimated tokens when it is
+    admitted and is settled against the usage the API reports once it ends, so
+    a long completion leaves the buckets in debt. Daily budgets are checked
+    against the usage actually recorded by the TokenTracker.
+
+    Configuration (environment variables, 0 disables a limit):
+        TOKEN_RATE_GLOBAL: tokens per minute across all sessions
+        TOKEN_RATE_SESSION: tokens per minute for a single session
+        DAILY_TOKEN_BUDGET_GLOBAL: tokens per day across all sessions
+        DAILY_TOKEN_BUDGET_SESSION: tokens per day for a single session
+        TOKEN_BUDGET_POLICY: "queue", "degrade" or "reject"
+        TOKEN_BUDGET_MAX_WAIT: seconds a queued call may wait for the rate limit
+        TOKEN_BUDGET_FALLBACK_MODEL: cheaper model used by the "degrade" policy
+    """
+
+    POLICIES = ("queue", "degrade", "reject")
+
+    def __init__(self, tracker=None):
+        self.tracker = tracker or get_token_tracker()
+        self.global_rate = int(os.getenv("TOKEN_RATE_GLOBAL", "90000"))
+        self.session_rate = int(os.getenv("TOKEN_RATE_SESSION", "20000"))
+        self.global_daily_budget = int(os.getenv("DAILY_TOKEN_BUDGET_GLOBAL", "0"))
+        self.session_daily_budget = int(os.getenv("DAILY_TOKEN_BUDGET_SESSION", "200000"))
+        self.policy = os.getenv("TOKEN_BUDGET_POLICY", "queue")
+        self.max_wait = float(os.getenv("TOKEN_BUDGET_MAX_WAIT", "30"))
+        self.fallback_model = os.getenv("TOKEN_BUDGET_FALLBACK_MODEL", "gpt-4o-mini")
+        if self.policy not in self.POLICIES:
+            raise ValueError(f"Unknown token budget policy: {self.policy}")
+
+        self._lock = threading.Lock()
+        self._conn = connect(self.tracker.usage_db)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+
+    def estimate_tokens(self, text: str, max_output_tokens: int = 500) -> int:
+        """Roughly estimate the tokens a call will use (about 4 characters per token)."""
+        return len(text) // 4 + max_output_tokens
+
+    def _buckets(self, session_id: Optional[str]):
+        """Return (key, tokens per minute) for every bucket that applies to a call."""
+        buckets = []
+        if self.global_rate > 0:
+            buckets.append(("global", self.global_rate))
+        if self.session_rate > 0 and session_id is not None:
+            buckets.append((f"session:{session_id}", self.session_rate))
+        return buckets
+
+    @staticmethod
+    def _level(row, per_minute: int, now: float) -> float:
+        """Tokens in a bucket now, refilled since its stored level; a new bucket is full."""
+        if row is None:
+            return per_minute
+        return min(per_minute, row[0] + (now - row[1]) * per_minute / 60)
+
+    def _take(self, session_id: Optional[str], tokens: int) -> float:
+        """
+        Try to draw tokens from all applicable buckets at once.
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise the seconds to wait before retrying
+        """
+        buckets = self._buckets(session_id)
+        if not buckets:
+            return 0.0
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                levels = {}
+                wait = 0.0
+                for key, per_minute in buckets:
+                    row = self._conn.execute(
+                        "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                    ).fetchone()
+                    level = self._level(row, per_minute, now)
+                    # A single call larger than the bucket only has to wait for a full bucket
+                    needed = min(tokens, per_minute)
+                    if level < needed:
+                        wait = max(wait, (needed - level) * 60 / per_minute)
+                    levels[key] = (level, needed)
+
+                for key, (level, needed) in levels.items():
+                    new_level = level - needed if wait == 0 else level
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                        (key, new_level, now)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def settle(self, session_id: Optional[str], drawn: int, actual: int):
+        """
+        Charge the buckets the difference between a call's actual and drawn tokens.
+
+        Args:
+            session_id (str, optional): Session that made the call
+            drawn (int): Tokens drawn when the call was admitted, 0 if it was degraded
+            actual (int): Input and output tokens the API reported for the call
+        """
+        buckets = self._buckets(session_id)
+        if not buckets:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for key, per_minute in buckets:
+                    row = self._conn.execute(
+                        "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                    ).fetchone()
+                    # A bucket may go below zero; later calls then wait until the debt is refilled
+                    level = min(per_minute, self._level(row, per_minute, now) - (actual - min(drawn, per_minute)))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                        (key, level, now)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _over_daily_budget(self, session_id: Optional[str]) -> Optional[str]:
+        """Return a description of the exhausted daily budget, if any."""
+        if self.global_daily_budget > 0 and self.tracker.get_daily_tokens() >= self.global_daily_budget:
+            return "The daily token budget for this service has been used up."
+        if (self.session_daily_budget > 0 and session_id is not None
+                and self.tracker.get_daily_tokens(session_id) >= self.session_daily_budget):
+            return "Your daily token budget has been used up."
+        return None
+
+    def admit(self, model: str, prompt_text: str, session_id: Optional[str] = None) -> Tuple[str, int]:
+        """
+        Check an LLM call against the rate limits and daily budgets before it is sent.
+
+        Args:
+            model (str): The model the call was going to use
+            prompt_text (str): The prompt, used to estimate the tokens of the call
+            session_id (str, optional): Session making the call, defaults to the current session
+
+        Returns:
+            tuple: (model to send the call to, which is the fallback model when
+            degraded; tokens drawn from the buckets, to settle once the call ends)
+
+        Raises:
+            BudgetExceededError: If the call is rejected
+        """
+        if session_id is None:
+            session_id = current_session_id()
+
+        reason = self._over_daily_budget(session_id)
+        if reason is not None:
+            return self._degrade_or_reject(model, reason), 0
+
+        tokens = self.estimate_tokens(prompt_text)
+        deadline = time.time() + self.max_wait
+        while True:
+            wait = self._take(session_id, tokens)
+            if wait == 0:
+                return model, tokens
+            if self.policy != "queue" or time.time() + wait > deadline:
+                return self._degrade_or_reject(
+                    model, "Too many requests right now, please try again in a moment."
+                ), 0
+            time.sleep(wait)
+
+    def _degrade_or_reject(self, model: str, reason: str) -> str:
+        """Apply the over-budget policy for calls that cannot be admitted as they are."""
+        if self.policy == "degrade" and model != self.fallback_model:
+            return self.fallback_model
+        raise BudgetExceededError(reason)
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, creating it on first use."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+def _prompt_text(prompt: Any) -> str:
+    """Flatten a prompt (string, PromptValue or message list) into text for estimation."""
+    if isinstance(prompt, str):
+        return prompt
+    if hasattr(prompt, "to_string"):
+        return prompt.to_string()
+    if isinstance(prompt, (list, tuple)):
+        return "\n".join(str(getattr(message, "content", message)) for message in prompt)
+    return str(prompt)
+
+class _SettleUsage(BaseCallbackHandler):
+    """Settles one admitted call against the rate limiter once its usage is known."""
+
+    def __init__(self, limiter: RateLimiter, session_id: Optional[str], drawn: int):
+        self.limiter = limiter
+        self.session_id = session_id
+        self.drawn = drawn
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        usage = response_usage(response)
+        # Without reported usage the estimate stands
+        if usage:
+            actual = sum(input_tokens + output_tokens for _, input_tokens, output_tokens in usage)
+            self.limiter.settle(self.session_id, self.drawn, actual)
+
+def guard_llm(llm, **bind_kwargs):
+    """
+    Wrap a chat model so every call is admitted by the rate limiter before it is sent.
+
+    The wrapper can be invoked or streamed like the model itself, or used inside
+    a chain. When the "degrade" policy applies, the call is sent to the fallback
+    model instead.
+
+    Args:
+        llm: The chat model to wrap
+        **bind_kwargs: Extra arguments for every call, e.g. functions=[...]
+    """
+    model = getattr(llm, "model_name", None) or getattr(llm, "model", "unknown")
+
+    def admit_call(prompt: Any):
+        limiter = get_rate_limiter()
+        session_id = current_session_id()
+        admitted_model, drawn = limiter.admit(model, _prompt_text(prompt), session_id)
+        call_kwargs = dict(bind_kwargs)
+        if admitted_model != model:
+            call_kwargs["model"] = admitted_model
+        # RunnableLambda invokes or streams a returned runnable with the same input
+        bound = llm.bind(**call_kwargs) if call_kwargs else llm
+        return bound.with_config(callbacks=[_SettleUsage(limiter, session_id, drawn)])
+
+    return RunnableLambda(admit_call, name=f"guarded_{model}")
@@ -0,0 +1,191 @@
+"""Process-wide registry of long-lived resources with lifecycle hooks.
+
+Streamlit re-executes the app script on every interaction, so whatever the
+script builds at its top level is built again on every rerun. Resources
+registered here are built once per server process, on first use or by
+warm_up_resources(), and shared by all sessions; session_state only holds what
+belongs to one session (language, chat id, paging).
+
+Each resource has a factory and optional hooks, all called with the instance:
+    warmup: work done ahead of the first request, e.g. reading a usage history
+    health: a check that raises if the resource is not usable
+    shutdown: cleanup at process exit, in reverse order of creation
+"""
+
+import atexit
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Hook = Optional[Callable[[Any], Any]]
+
+class Resource:
+    """A registered resource: its factory and lifecycle hooks."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], warmup: Hook = None,
+                 health: Hook = None, shutdown: Hook = None):
+        self.name = name
+        self.factory = factory
+        self.warmup = warmup
+        self.health = health
+        self.shutdown = shutdown
+
+class ResourceRegistry:
+    """Named singletons, built on first use and shut down together."""
+
+    def __init__(self):
+        self._resources: Dict[str, Resource] = {}
+        self._instances: Dict[str, Any] = {}
+        self._order: List[str] = []
+        # Reentrant, since a factory may get the resources it depends on
+        self._lock = threading.RLock()
+        self._warmed_up = False
+
+    def register(self, name: str, factory: Callable[[], Any], warmup: Hook = None,
+                 health: Hook = None, shutdown: Hook = None):
+        """Register a resource; registering a name again replaces it if it was not built yet."""
+        with self._lock:
+            if name in self._instances:
+                raise ValueError(f"Resource {name} is already in use")
+            self._resources[name] = Resource(name, factory, warmup, health, shutdown)
+
+    def get(self, name: str) -> Any:
+        """Return a resource, building it on first use."""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._resources:
+                    raise KeyError(f"Unknown resource: {name}")
+                self._instances[name] = self._resources[name].factory()
+                self._order.append(name)
+            return self._instances[name]
+
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Build every resource and run its warmup hook, once per process.
+
+        Returns:
+            dict: Seconds spent per resource; empty if the registry was already warmed up
+        """
+        with self._lock:
+            if self._warmed_up:
+                return {}
+            self._warmed_up = True
+            timings = {}
+            for name, resource in list(self._resources.items()):
+                started = time.perf_counter()
+                try:
+                    instance = self.get(name)
+                    if resource.warmup is not None:
+                        resource.warmup(instance)
+                except Exception as e:
+                    # A resource that fails here is built again on first use
+                    print(f"Warmup of {name} failed: {str(e)}")
+                timings[name] = time.perf_counter() - started
+            return timings
+
+    def health(self) -> Dict[str, str]:
+        """Status per resource: "ok", "not started" or the error of its health check."""
+        with self._lock:
+            resources = list(self._resources.values())
+            instances = dict(self._instances)
+        status = {}
+        for resource in resources:
+            if resource.name not in instances:
+                status[resource.name] = "not started"
+                continue
+            try:
+                if resource.health is not None:
+                    resource.health(instances[resource.name])
+                status[resource.name] = "ok"
+            except Exception as e:
+                status[resource.name] = f"error: {str(e)}"
+        return status
+
+    def shutdown(self):
+        """Run the shutdown hooks in reverse order of creation and forget the instances."""
+        with self._lock:
+            for name in reversed(self._order):
+                resource = self._resources[name]
+                if resource.shutdown is None:
+                    continue
+                try:
+                    resource.shutdown(self._instances[name])
+                except Exception as e:
+                    print(f"Shutdown of {name} failed: {str(e)}")
+            self._instances.clear()
+            self._order.clear()
+            self._warmed_up = False
+
+_registry = ResourceRegistry()
+atexit.register(_registry.shutdown)
+
+def get_registry() -> ResourceRegistry:
+    """Return the process-wide resource registry."""
+    return _registry
+
+def get_resource(name: str) -> Any:
+    """Return a process-wide resource, building it on first use."""
+    return _registry.get(name)
+
+def warm_up_resources() -> Dict[str, float]:
+    """Build and warm up all resources, once per process; see ResourceRegistry.warm_up."""
+    return _registry.warm_up()
+
+# The application's resources. Modules are imported by the factories, so
+# importing this module stays cheap and free of import cycles.
+
+def _token_tracker():
+    from token_tracker import get_token_tracker
+    return get_token_tracker()
+
+def _http_client():
+    from llm_clients import get_http_client
+    return get_http_client()
+
+def _close_http_client():
+    from llm_clients import close_http_client
+    close_http_client()
+
+def _check_http_client(client):
+    if client.is_closed:
+        raise RuntimeError("HTTP client is closed")
+
+def _chat_store():
+    from chat_store import get_chat_store
+    return get_chat_store()
+
+def _pdf_executor():
+    from pdf_jobs import get_pdf_executor
+    return get_pdf_executor()
+
+def _shutdown_pdf_executor():
+    from pdf_jobs import shutdown_pdf_executor
+    shutdown_pdf_executor()
+
+def _workflow():
+    from workflow_manager import create_workflow
+    return create_workflow()
+
+def _tool_llm():
+    from tool_llm import ToolLLM
+    return ToolLLM()
+
+def _tools_manager():
+    from tools_manager import ToolsManager
+    return ToolsManager()
+
+_registry.register(
+    "token_tracker", _token_tracker,
+    # Folds the usage history into the totals ahead of the first usage display
+    warmup=lambda tracker: tracker.load_usage(),
+    health=lambda tracker: tracker.get_usage_summary()
+)
+_registry.register("http_client", _http_client, health=_check_http_client, shutdown=lambda client: _close_http_client())
+_registry.register("chat_store", _chat_store, health=lambda store: store.count(""))
+_registry.register("pdf_executor", _pdf_executor, shutdown=lambda executor: _shutdown_pdf_executor())
+_registry.register("workflow", _workflow)
+_registry.register("tool_llm", _tool_llm)
+_registry.register("tools_manager", _tools_manager)
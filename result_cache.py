@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from storage import connect
+
+class ResultCache:
+    """
+    Disk-backed cache for generated results, shared by all sessions and processes.
+
+    Entries expire after a TTL, and the least recently used entries are evicted
+    once the cache holds more than max_entries results.
+
+    Configuration (environment variables):
+        GENERATION_CACHE_PATH: SQLite file of the cache
+        GENERATION_CACHE_TTL: seconds an entry stays valid (default: 7 days)
+        GENERATION_CACHE_MAX_ENTRIES: maximum number of cached results
+    """
+
+    def __init__(self, path=None, ttl_seconds=None, max_entries=None):
+        self.path = path or os.getenv("GENERATION_CACHE_PATH", "generation_cache.db")
+        self.ttl_seconds = ttl_seconds or int(os.getenv("GENERATION_CACHE_TTL", str(7 * 24 * 3600)))
+        self.max_entries = max_entries or int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "1000"))
+        self._lock = threading.Lock()
+        self._conn = connect(self.path)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results (last_access)")
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> str:
+        """Normalize free-text input so trivially different inputs share an entry."""
+        return " ".join((text or "").split()).casefold()
+
+    def make_key(self, kind: str, inputs: Dict[str, Optional[str]], model: str,
+                 prompt_version: str, temperature: float) -> str:
+        """
+        Build the cache key for a generation.
+
+        Args:
+            kind (str): What is generated, e.g. "business_model_canvas"
+            inputs (dict): The user inputs of the generation
+            model (str): Model name
+            prompt_version (str): Version of the prompt, bumped when the prompt changes
+            temperature (float): Sampling temperature
+
+        Returns:
+            str: Hex digest identifying the generation
+        """
+        payload = json.dumps({
+            "kind": kind,
+            "inputs": {name: self.normalize(value) for name, value in inputs.items()},
+            "model": model,
+            "prompt_version": prompt_version,
+            "temperature": temperature
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for a key, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, kind: str, value: Dict[str, Any]):
+        """Store a result and evict expired and least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO results (key, kind, value, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, json.dumps(value), now, now)
+                )
+                self._conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl_seconds,))
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN ("
+                    "SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_result_cache() -> ResultCache:
+    """Return the process-wide result cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
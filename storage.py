@@ -0,0 +1,22 @@
+import sqlite3
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite connection suitable for sharing between Streamlit sessions.
+
+    The database runs in WAL mode so readers never block the single writer,
+    and the busy timeout lets several worker processes append to the same
+    file without failing on a transient lock.
+
+    Args:
+        path (str): Path to the database file
+
+    Returns:
+        sqlite3.Connection: Connection in autocommit mode
+    """
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
@@ -0,0 +1,27 @@
+import time
+import chat_store
+from chat_store import ChatStore
+
+def test_idle_sessions_release_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(chat_store, "IDLE_SWEEP_INTERVAL", 0)
+    store = ChatStore(str(tmp_path / "chat.db"), cache_messages=5, idle_timeout=0.05)
+    for i in range(20):
+        store.append("idle", "human", f"message {i}")
+    store.recent("idle", 5)
+    assert store.memory_usage()["idle"] > 0
+
+    time.sleep(0.1)
+    store.recent("active", 5)
+    assert list(store.memory_usage()) == ["active"]
+
+    # The history is still in the file when the session comes back
+    assert [m.content for m in store.recent("idle", 2)] == ["message 18", "message 19"]
+
+def test_active_session_memory_is_bounded(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"), cache_messages=5)
+    store.recent("session", 5)
+    store.append("session", "human", "x" * 1000)
+    one_message = store.memory_usage()["session"]
+    for _ in range(50):
+        store.append("session", "human", "x" * 1000)
+    assert store.memory_usage()["session"] <= 5 * one_message
@@ -0,0 +1,32 @@
+import io
+import pandas as pd
+from ledger_import import import_ledger
+
+EXPORT = """Date,Description,Debit,Credit
+2026-07-03,Payroll,10000,
+2026-07-20,Customer,,4000
+2026-08-03,Payroll,10000,
+2026-08-20,Customer,,4000
+2026-09-03,Payroll,10000,
+2026-09-20,Customer,,4000
+2026-10-03,Payroll,10000,
+2026-10-06,Pending,,
+"""
+
+def _import(as_of):
+    return import_ledger(io.BytesIO(EXPORT.encode()), "export.csv", as_of=pd.Timestamp(as_of))
+
+def test_month_in_progress_is_left_out_of_averages():
+    ledger = _import("2026-10-19")
+    assert str(ledger["partial_month"]) == "2026-10"
+    assert list(ledger["averaged_months"].astype(str)) == ["2026-07", "2026-08", "2026-09"]
+    assert ledger["monthly_expenses"] == 10000
+    assert ledger["monthly_revenue"] == 4000
+
+def test_ended_last_month_is_averaged():
+    ledger = _import("2026-11-02")
+    assert ledger["partial_month"] is None
+    assert list(ledger["averaged_months"].astype(str)) == ["2026-08", "2026-09", "2026-10"]
+
+def test_rows_without_amount_are_not_transactions():
+    assert _import("2026-10-19")["transactions"] == 7
@@ -0,0 +1,18 @@
+import json
+from types import SimpleNamespace
+from unit_economics import answer_unit_economics_call, format_unit_economics, unit_economics
+
+def _function_call(name, **arguments):
+    return SimpleNamespace(content="", additional_kwargs={
+        "function_call": {"name": name, "arguments": json.dumps(arguments)}
+    })
+
+def test_chat_function_call_runs_local_calculator():
+    message = _function_call("calculate_unit_economics", arpu=100, gross_margin=70, monthly_churn=5, cac=600)
+    expected = format_unit_economics(unit_economics(arpu=100.0, gross_margin=0.7, monthly_churn=0.05, cac=600.0))
+    assert answer_unit_economics_call(message) == expected
+    assert "**LTV:** $1,400.00" in expected
+
+def test_other_replies_are_left_to_the_model():
+    assert answer_unit_economics_call(SimpleNamespace(content="Hi", additional_kwargs={})) is None
+    assert answer_unit_economics_call(_function_call("something_else", arpu=1)) is None
@@ -1,96 +1,468 @@
-import tiktoken
 from datetime import datetime
 import json
+import math
 import os
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from storage import connect
+
+HISTOGRAM_BUCKETS_PER_DOUBLING = 8
 
 class TokenTracker:
-    def __init__(self):
+    def __init__(self, usage_db="token_usage.db", usage_file="token_usage.json"):
         """Initialize the token tracker."""
-        self.encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        self._encoding = None
+        # Prices in $ per 1K tokens, matched against the model name the API reports
         self.costs = {
-            "gpt-3.5-turbo": {
-                "input": 0.0000015,  # $0.0015 per 1K tokens
-                "output": 0.000002   # $0.002 per 1K tokens
-            }
+            "gpt-3.5-turbo": {"input": 0.0015, "output": 0.002},
+            "gpt-4o-mini": {"input": 0.00015, "output": 0.0006},
+            "gpt-4o": {"input": 0.0025, "output": 0.01},
+            "gpt-4-turbo": {"input": 0.01, "output": 0.03},
+            "gpt-4": {"input": 0.03, "output": 0.06}
+        }
+        self.usage_db = usage_db
+        self.usage_file = usage_file
+        self._lock = threading.Lock()
+        self._conn = connect(self.usage_db)
+        self._create_schema()
+        self._import_legacy_usage()
+        self._backfill_rollups()
+        self.usage = {
+            "total_tokens": 0,
+            "total_cost": 0.0,
+            "daily_usage": {},
+            "model_usage": {}
         }
-        self.usage_file = "token_usage.json"
+        self._last_event_id = 0
         self.load_usage()
-    
+
+    def _create_schema(self):
+        """Create the append-only usage log if it does not exist yet."""
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts TEXT NOT NULL,
+                day TEXT NOT NULL,
+                model TEXT NOT NULL,
+                input_tokens INTEGER NOT NULL,
+                output_tokens INTEGER NOT NULL,
+                tokens INTEGER NOT NULL,
+                cost REAL NOT NULL
+            )
+        """)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(usage_events)")]
+        if "session_id" not in columns:
+            self._conn.execute("ALTER TABLE usage_events ADD COLUMN session_id TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_usage_events_day_session ON usage_events (day, session_id)"
+        )
+
+        # Rollups are updated in the same transaction as each event, so dashboard
+        # queries never have to scan the raw event log.
+        for table, period in (("usage_hourly", "hour"), ("usage_daily", "day")):
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {table} (
+                    {period} TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    calls INTEGER NOT NULL,
+                    input_tokens INTEGER NOT NULL,
+                    output_tokens INTEGER NOT NULL,
+                    tokens INTEGER NOT NULL,
+                    cost REAL NOT NULL,
+                    PRIMARY KEY ({period}, model)
+                )
+            """)
+        # Log-scale histogram of tokens per call, used for percentile queries
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS usage_histogram (
+                day TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                calls INTEGER NOT NULL,
+                PRIMARY KEY (day, bucket)
+            )
+        """)
+
+    def _import_legacy_usage(self):
+        """Seed an empty log with the totals from the old JSON usage file."""
+        if not os.path.exists(self.usage_file):
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM usage_events LIMIT 1").fetchone() is None:
+                    with open(self.usage_file, 'r') as f:
+                        legacy = json.load(f)
+                    models = list(legacy.get("model_usage", {}))
+                    model = models[0] if len(models) == 1 else "unknown"
+                    for day, usage in sorted(legacy.get("daily_usage", {}).items()):
+                        self._conn.execute(
+                            "INSERT INTO usage_events (ts, day, model, input_tokens, output_tokens, tokens, cost) "
+                            "VALUES (?, ?, ?, 0, 0, ?, ?)",
+                            (f"{day}T00:00:00", day, model, usage["tokens"], usage["cost"])
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _backfill_rollups(self):
+        """Build the rollup tables from the event log if they predate it."""
+        with self._lock:
+            # Check inside the write transaction, so only one of several starting processes backfills
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._conn.execute("SELECT 1 FROM usage_daily LIMIT 1").fetchone() is None:
+                    events = self._conn.execute(
+                        "SELECT ts, model, input_tokens, output_tokens, tokens, cost FROM usage_events ORDER BY id"
+                    ).fetchall()
+                    for ts, model, input_tokens, output_tokens, tokens, cost in events:
+                        self._update_rollups(datetime.fromisoformat(ts), model, input_tokens, output_tokens, tokens, cost)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _histogram_bucket(tokens):
+        """Map a token count to a histogram bucket (8 buckets per doubling, about 9% wide)."""
+        if tokens < 1:
+            return 0
+        return int(math.log2(tokens) * HISTOGRAM_BUCKETS_PER_DOUBLING) + 1
+
+    def _update_rollups(self, when, model, input_tokens, output_tokens, tokens, cost):
+        """Add one event to the hourly, daily and histogram rollups (caller holds a transaction)."""
+        values = (model, 1, input_tokens, output_tokens, tokens, cost)
+        for table, period, key in (
+            ("usage_hourly", "hour", when.strftime("%Y-%m-%d %H:00")),
+            ("usage_daily", "day", when.strftime("%Y-%m-%d"))
+        ):
+            self._conn.execute(
+                f"INSERT INTO {table} ({period}, model, calls, input_tokens, output_tokens, tokens, cost) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT({period}, model) DO UPDATE SET "
+                "calls = calls + excluded.calls, "
+                "input_tokens = input_tokens + excluded.input_tokens, "
+                "output_tokens = output_tokens + excluded.output_tokens, "
+                "tokens = tokens + excluded.tokens, "
+                "cost = cost + excluded.cost",
+                (key,) + values
+            )
+        self._conn.execute(
+            "INSERT INTO usage_histogram (day, bucket, calls) VALUES (?, ?, 1) "
+            "ON CONFLICT(day, bucket) DO UPDATE SET calls = calls + 1",
+            (when.strftime("%Y-%m-%d"), self._histogram_bucket(tokens))
+        )
+
     def load_usage(self):
-        """Load usage data from file."""
-        if os.path.exists(self.usage_file):
-            with open(self.usage_file, 'r') as f:
-                self.usage = json.load(f)
-        else:
-            self.usage = {
-                "total_tokens": 0,
-                "total_cost": 0.0,
-                "daily_usage": {},
-                "model_usage": {}
-            }
-    
-    def save_usage(self):
-        """Save usage data to file."""
-        with open(self.usage_file, 'w') as f:
-            json.dump(self.usage, f)
-    
+        """Fold usage events appended since the last call into the in-memory totals.
+
+        Only rows newer than the last seen event are read, so refreshing is
+        cheap regardless of how long the history is, and writes from other
+        sessions or processes are picked up.
+        """
+        with self._lock:
+            last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM usage_events").fetchone()[0]
+            if last_id <= self._last_event_id:
+                return
+            rows = self._conn.execute(
+                "SELECT day, model, SUM(tokens), SUM(cost) FROM usage_events "
+                "WHERE id > ? AND id <= ? GROUP BY day, model",
+                (self._last_event_id, last_id)
+            ).fetchall()
+            for day, model, tokens, cost in rows:
+                self._add_to_usage(day, model, tokens, cost)
+            self._last_event_id = last_id
+
+    def _add_to_usage(self, day, model, tokens, cost):
+        """Add tokens and cost to the cached aggregate."""
+        self.usage["total_tokens"] += tokens
+        self.usage["total_cost"] += cost
+
+        daily = self.usage["daily_usage"].setdefault(day, {"tokens": 0, "cost": 0.0})
+        daily["tokens"] += tokens
+        daily["cost"] += cost
+
+        per_model = self.usage["model_usage"].setdefault(model, {"tokens": 0, "cost": 0.0})
+        per_model["tokens"] += tokens
+        per_model["cost"] += cost
+
     def count_tokens(self, text):
-        """Count tokens in a text string."""
-        return len(self.encoding.encode(text))
-    
+        """Count tokens in a text string.
+
+        Only needed for callers that have no usage data from the API, so the
+        tokenizer is loaded on first use.
+        """
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
+        return len(self._encoding.encode(text))
+
+    def get_model_costs(self, model):
+        """Find the price entry for a model, e.g. "gpt-4o-mini-2024-07-18" -> "gpt-4o-mini"."""
+        if model in self.costs:
+            return self.costs[model]
+        matches = [name for name in self.costs if model.startswith(name)]
+        if not matches:
+            return None
+        return self.costs[max(matches, key=len)]
+
     def calculate_cost(self, model, input_tokens, output_tokens):
         """Calculate cost for token usage."""
-        if model not in self.costs:
+        costs = self.get_model_costs(model)
+        if costs is None:
             return 0.0
-        
-        input_cost = (input_tokens / 1000) * self.costs[model]["input"]
-        output_cost = (output_tokens / 1000) * self.costs[model]["output"]
+
+        input_cost = (input_tokens / 1000) * costs["input"]
+        output_cost = (output_tokens / 1000) * costs["output"]
         return input_cost + output_cost
-    
+
     def track_usage(self, model, input_text, output_text):
-        """Track token usage and costs."""
-        input_tokens = self.count_tokens(input_text)
-        output_tokens = self.count_tokens(output_text)
+        """Track token usage for a call by tokenizing its input and output locally."""
+        return self.record_usage(model, self.count_tokens(input_text), self.count_tokens(output_text))
+
+    def record_usage(self, model, input_tokens, output_tokens, session_id=None):
+        """Record token counts reported by the API and return (total_tokens, cost)."""
         total_tokens = input_tokens + output_tokens
         cost = self.calculate_cost(model, input_tokens, output_tokens)
-        
-        # Update total usage
-        self.usage["total_tokens"] += total_tokens
-        self.usage["total_cost"] += cost
-        
-        # Update daily usage
-        today = datetime.now().strftime("%Y-%m-%d")
-        if today not in self.usage["daily_usage"]:
-            self.usage["daily_usage"][today] = {
-                "tokens": 0,
-                "cost": 0.0
-            }
-        self.usage["daily_usage"][today]["tokens"] += total_tokens
-        self.usage["daily_usage"][today]["cost"] += cost
-        
-        # Update model usage
-        if model not in self.usage["model_usage"]:
-            self.usage["model_usage"][model] = {
-                "tokens": 0,
-                "cost": 0.0
-            }
-        self.usage["model_usage"][model]["tokens"] += total_tokens
-        self.usage["model_usage"][model]["cost"] += cost
-        
-        self.save_usage()
+
+        now = datetime.now()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT INTO usage_events (ts, day, model, input_tokens, output_tokens, tokens, cost, session_id) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (now.isoformat(timespec="seconds"), now.strftime("%Y-%m-%d"), model,
+                     input_tokens, output_tokens, total_tokens, cost, session_id)
+                )
+                self._update_rollups(now, model, input_tokens, output_tokens, total_tokens, cost)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            # Fold our own event in directly when nothing else was appended in between
+            if cursor.lastrowid == self._last_event_id + 1:
+                self._add_to_usage(now.strftime("%Y-%m-%d"), model, total_tokens, cost)
+                self._last_event_id = cursor.lastrowid
+
         return total_tokens, cost
-    
+
     def get_usage_summary(self):
         """Get a summary of token usage and costs."""
+        self.load_usage()
+        today = datetime.now().strftime("%Y-%m-%d")
         return {
             "total_tokens": self.usage["total_tokens"],
             "total_cost": self.usage["total_cost"],
-            "today_tokens": self.usage["daily_usage"].get(
-                datetime.now().strftime("%Y-%m-%d"), 
-                {"tokens": 0}
-            )["tokens"],
-            "today_cost": self.usage["daily_usage"].get(
-                datetime.now().strftime("%Y-%m-%d"), 
-                {"cost": 0.0}
-            )["cost"]
-        } 
\ No newline at end of file
+            "today_tokens": self.usage["daily_usage"].get(today, {"tokens": 0})["tokens"],
+            "today_cost": self.usage["daily_usage"].get(today, {"cost": 0.0})["cost"]
+        }
+
+    def get_usage_series(self, granularity="hour", start=None, end=None, model=None):
+        """
+        Query token usage over time from the precomputed rollups.
+
+        Args:
+            granularity (str): "hour" or "day"
+            start (datetime, optional): Start of the range (inclusive)
+            end (datetime, optional): End of the range (exclusive)
+            model (str, optional): Only return usage for this model
+
+        Returns:
+            list: One dict per period and model with calls, tokens and cost
+        """
+        if granularity == "hour":
+            table, key_format = "usage_hourly", "%Y-%m-%d %H:00"
+        elif granularity == "day":
+            table, key_format = "usage_daily", "%Y-%m-%d"
+        else:
+            raise ValueError(f"Unknown granularity: {granularity}")
+
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{granularity} >= ?")
+            params.append(start.strftime(key_format))
+        if end is not None:
+            conditions.append(f"{granularity} < ?")
+            params.append(end.strftime(key_format))
+        if model is not None:
+            conditions.append("model = ?")
+            params.append(model)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {granularity}, model, calls, input_tokens, output_tokens, tokens, cost "
+                f"FROM {table} {where} ORDER BY {granularity}, model",
+                params
+            ).fetchall()
+        return [
+            {
+                "period": period,
+                "model": row_model,
+                "calls": calls,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "tokens": tokens,
+                "cost": cost
+            }
+            for period, row_model, calls, input_tokens, output_tokens, tokens, cost in rows
+        ]
+
+    def get_tokens_percentile(self, percentile, start=None, end=None):
+        """
+        Estimate a percentile of tokens per LLM call from the daily histograms.
+
+        Args:
+            percentile (float): Percentile between 0 and 100, e.g. 95
+            start (datetime, optional): First day of the range (inclusive)
+            end (datetime, optional): Last day of the range (exclusive)
+
+        Returns:
+            float: Estimated tokens per call, accurate to about 5%, or 0.0 without data
+        """
+        conditions, params = [], []
+        if start is not None:
+            conditions.append("day >= ?")
+            params.append(start.strftime("%Y-%m-%d"))
+        if end is not None:
+            conditions.append("day < ?")
+            params.append(end.strftime("%Y-%m-%d"))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT bucket, SUM(calls) FROM usage_histogram {where} GROUP BY bucket ORDER BY bucket",
+                params
+            ).fetchall()
+        total = sum(calls for _, calls in rows)
+        if total == 0:
+            return 0.0
+
+        target = total * percentile / 100
+        seen = 0
+        for bucket, calls in rows:
+            seen += calls
+            if seen >= target:
+                break
+        if bucket == 0:
+            return 0.0
+        # Geometric midpoint of the bucket
+        return 2 ** ((bucket - 0.5) / HISTOGRAM_BUCKETS_PER_DOUBLING)
+
+    def get_daily_tokens(self, session_id=None):
+        """Get today's token usage, either for one session or across all sessions and processes."""
+        today = datetime.now().strftime("%Y-%m-%d")
+        if session_id is None:
+            self.load_usage()
+            return self.usage["daily_usage"].get(today, {"tokens": 0})["tokens"]
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COALESCE(SUM(tokens), 0) FROM usage_events WHERE day = ? AND session_id = ?",
+                (today, session_id)
+            ).fetchone()[0]
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_token_tracker() -> TokenTracker:
+    """Return the process-wide token tracker, creating it on first use."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = TokenTracker()
+        return _tracker
+
+_session_id: ContextVar[Optional[str]] = ContextVar("session_id", default=None)
+
+@contextmanager
+def session_scope(session_id: Optional[str]):
+    """Attribute LLM calls made inside the block (e.g. from worker threads) to a session."""
+    token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _session_id.reset(token)
+
+def current_session_id() -> Optional[str]:
+    """Return the id of the session making the current call, if any."""
+    session_id = _session_id.get()
+    if session_id is not None:
+        return session_id
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx is not None else None
+
+_turn_usage: ContextVar[Optional[Dict[str, Any]]] = ContextVar("turn_usage", default=None)
+
+@contextmanager
+def usage_scope() -> Iterator[Dict[str, Any]]:
+    """
+    Collect the token usage of the LLM calls made inside the block, e.g. one chat turn.
+
+    Yields:
+        dict: input_tokens, output_tokens, cost and the models used, updated as calls finish
+    """
+    usage = {"input_tokens": 0, "output_tokens": 0, "cost": 0.0, "models": []}
+    token = _turn_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _turn_usage.reset(token)
+
+def _record(tracker: TokenTracker, model: str, input_tokens: int, output_tokens: int, session_id: Optional[str]):
+    """Record usage in the tracker and in the enclosing usage_scope, if any."""
+    _, cost = tracker.record_usage(model, input_tokens, output_tokens, session_id)
+    usage = _turn_usage.get()
+    if usage is not None:
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+        usage["cost"] += cost
+        if model not in usage["models"]:
+            usage["models"].append(model)
+
+def response_usage(response: LLMResult) -> List[Tuple[str, int, int]]:
+    """
+    The token usage an LLM response reports.
+
+    Returns:
+        list: (model, input tokens, output tokens) per generation; empty if the
+            response reports no usage, e.g. a stream without stream_usage
+    """
+    fallback_model = (response.llm_output or {}).get("model_name", "unknown")
+    usages = []
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                model = message.response_metadata.get("model_name", fallback_model)
+                usages.append((model, usage["input_tokens"], usage["output_tokens"]))
+
+    # Older chat model integrations only report aggregate usage in llm_output
+    if not usages:
+        token_usage = (response.llm_output or {}).get("token_usage")
+        if token_usage:
+            usages.append((
+                fallback_model, token_usage.get("prompt_tokens", 0), token_usage.get("completion_tokens", 0)
+            ))
+    return usages
+
+class TokenUsageCallbackHandler(BaseCallbackHandler):
+    """LangChain callback that records the token usage returned with each LLM response."""
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        tracker = get_token_tracker()
+        session_id = current_session_id()
+        for model, input_tokens, output_tokens in response_usage(response):
+            _record(tracker, model, input_tokens, output_tokens, session_id)
+
+# Pass as callbacks=[usage_callback] to every chat model so its usage is tracked
+usage_callback = TokenUsageCallbackHandler()
@@ -1,17 +1,13 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-import os
+from llm_clients import get_chat_model
+from rate_limiter import guard_llm
+from unit_economics import UNIT_ECONOMICS_FUNCTION_SCHEMA, answer_unit_economics_call
 
 class ToolLLM:
     def __init__(self):
         """Initialize the Tool LLM with GPT-3.5."""
-        self.llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0)
         
         # Define the system prompt for tool-specific tasks
         self.system_prompt = """You are a specialized AI assistant focused on executing specific tools and functions.
@@ -25,6 +21,8 @@ class ToolLLM:
         - Business Model Canvas Generator
         - Burn Rate Calculator
         - Pitch Deck Generator
+        - Unit Economics Calculator (call calculate_unit_economics when the user gives the numbers;
+          convert percentages to fractions)
         
         Always be precise and efficient in your tool usage."""
         
@@ -34,12 +32,11 @@ class ToolLLM:
             ("human", "{input}")
         ])
         
-        # Create the chain
+        # Create the chain; the model may answer directly or call a local calculator
         self.chain = (
             {"input": RunnablePassthrough()}
             | self.prompt
-            | self.llm
-            | StrOutputParser()
+            | guard_llm(self.llm, functions=[UNIT_ECONOMICS_FUNCTION_SCHEMA])
         )
     
     def process_tool_request(self, user_input: str) -> str:
@@ -54,8 +51,8 @@ class ToolLLM:
         """
         try:
             # Process the request through the chain
-            result = self.chain.invoke(user_input)
-            return result
+            message = self.chain.invoke(user_input)
+            return answer_unit_economics_call(message) or message.content
         except Exception as e:
             return f"Error processing tool request: {str(e)}"
     
@@ -73,7 +70,8 @@ class ToolLLM:
         tool_prompts = {
             "business_model_canvas": "Generate a business model canvas with the following parameters: {parameters}",
             "burn_rate": "Calculate burn rate with the following financial data: {parameters}",
-            "pitch_deck": "Create a pitch deck structure with the following information: {parameters}"
+            "pitch_deck": "Create a pitch deck structure with the following information: {parameters}",
+            "unit_economics": "Calculate the unit economics with the following data: {parameters}"
         }
         
         if tool_name not in tool_prompts:
@@ -1,26 +1,29 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
-import os
+from llm_clients import get_chat_model
+from rate_limiter import BudgetExceededError, guard_llm
+from translations import get_text
 import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.express as px
 from typing import Dict, Any
 from calculators import (
     calculate_burn_rate,
-    calculate_runway,
+    request_burn_rate_recommendation,
     generate_business_model_canvas,
-    generate_pitch_deck
+    generate_pitch_deck_slides,
+    stream_pitch_deck
 )
-from pdf_generator import create_pitch_deck_pdf
+from unit_economics import unit_economics, sweep_unit_economics, format_unit_economics
+from pdf_jobs import get_pdf_job, submit_pdf_job
+from pitch_deck_layout import PITCH_DECK_LAYOUT, SLIDE_TITLES
 
 class ToolsManager:
     def __init__(self):
         """Initialize the Tools Manager with GPT-3.5 for tool execution."""
-        self.tool_llm = ChatOpenAI(
-            model="gpt-3.5-turbo",
-            temperature=0,
-            api_key=os.getenv("OPENAI_API_KEY")
-        )
+        self.tool_llm = get_chat_model(model="gpt-3.5-turbo", temperature=0)
         
         # Define tool-specific prompts
         self.tool_prompts = {
@@ -85,7 +88,7 @@ class ToolsManager:
         chain = (
             {"input": RunnablePassthrough()}
             | prompt
-            | self.tool_llm
+            | guard_llm(self.tool_llm)
             | StrOutputParser()
         )
         
@@ -162,6 +165,10 @@ class ToolsManager:
             result = self.execute_tool("pitch_deck", input_data)
             st.markdown(result)
 
+def display_budget_warning(error: BudgetExceededError):
+    """Tell the user that a generation was stopped by the rate limits or token budgets."""
+    st.warning(f"{get_text('budget_exceeded', st.session_state.get('language', 'en'))} {str(error)}")
+
 def display_business_model_canvas():
     """Display the Business Model Canvas Generator section."""
     st.subheader("🎨 Business Model Canvas Generator")
@@ -169,6 +176,7 @@ def display_business_model_canvas():
     problem_bmc = st.text_area("Problem Statement", key="problem_bmc")
     solution_bmc = st.text_area("Solution", key="solution_bmc")
     target_group_bmc = st.text_area("Target Group", key="target_group_bmc")
+    regenerate_bmc = st.checkbox("Regenerate (ignore cached result)", key="regenerate_bmc")
     
     if st.button("Generate Business Model Canvas"):
         if not all([problem_bmc, solution_bmc, target_group_bmc]):
@@ -176,11 +184,16 @@ def display_business_model_canvas():
             return
             
         with st.spinner("Generating Business Model Canvas..."):
-            bmc = generate_business_model_canvas(
-                problem=problem_bmc,
-                solution=solution_bmc,
-                target_group=target_group_bmc
-            )
+            try:
+                bmc = generate_business_model_canvas(
+                    problem=problem_bmc,
+                    solution=solution_bmc,
+                    target_group=target_group_bmc,
+                    regenerate=regenerate_bmc
+                )
+            except BudgetExceededError as e:
+                display_budget_warning(e)
+                return
             
             st.markdown("### 🎨 Business Model Canvas")
             st.markdown("#### Key Partners")
@@ -225,15 +238,43 @@ def display_burn_rate_calculator():
     
     monthly_expenses = st.number_input("Monthly Expenses ($)", min_value=0.0, value=10000.0)
     current_cash = st.number_input("Current Cash Balance ($)", min_value=0.0, value=100000.0)
+    monthly_revenue = st.number_input("Monthly Revenue ($)", min_value=0.0, value=0.0)
+    expense_growth = st.number_input("Monthly Expense Growth (%)", value=0.0, step=0.5)
+    revenue_growth = st.number_input("Monthly Revenue Growth (%)", value=0.0, step=0.5)
+    
+    st.markdown("**One-off Items** (positive amounts are costs, negative amounts are inflows)")
+    one_off_items = st.data_editor(
+        pd.DataFrame({
+            "Month": pd.Series(dtype="int"),
+            "Amount ($)": pd.Series(dtype="float"),
+            "Description": pd.Series(dtype="str")
+        }),
+        num_rows="dynamic",
+        key="burn_rate_one_off_items"
+    )
+    ai_recommendation = st.checkbox("Add AI-written recommendation", key="burn_rate_ai_recommendation")
     
     if st.button("Calculate"):
-        result = calculate_burn_rate(current_cash, monthly_expenses)
+        result = calculate_burn_rate(
+            current_cash,
+            monthly_expenses,
+            monthly_revenue=monthly_revenue,
+            expense_growth=expense_growth / 100,
+            revenue_growth=revenue_growth / 100,
+            one_off_items=[
+                (row["Month"], row["Amount ($)"])
+                for _, row in one_off_items.dropna(subset=["Month", "Amount ($)"]).iterrows()
+            ]
+        )
         burn_rate = result["burn_rate"]
-        runway = calculate_runway(current_cash, burn_rate)
+        runway = result["runway_months"]
         
         st.markdown("### Results")
         st.markdown(f"**Monthly Burn Rate:** ${burn_rate:,.2f}")
-        st.markdown(f"**Runway:** {runway:.1f} months")
+        if runway == float("inf"):
+            st.markdown("**Runway:** Cash lasts beyond the 10-year projection")
+        else:
+            st.markdown(f"**Runway:** {runway:.1f} months")
         
         # Display warning level with appropriate color
         warning_level = result["warning_level"]
@@ -247,6 +288,100 @@ def display_burn_rate_calculator():
         # Display recommendation
         st.markdown("### Recommendation")
         st.markdown(result["recommendation"])
+        
+        # The numbers above are already on screen while the LLM writes its advice
+        if ai_recommendation:
+            advice = request_burn_rate_recommendation(result, current_cash)
+            with st.spinner("Writing recommendation..."):
+                try:
+                    st.markdown(advice.result())
+                except Exception as e:
+                    st.warning(f"Could not generate an AI recommendation: {str(e)}")
+
+def display_unit_economics_calculator():
+    """Display the Unit Economics Calculator section."""
+    st.subheader("📐 Unit Economics Calculator")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        arpu = st.number_input("Monthly Revenue per Customer ($)", min_value=0.0, value=100.0, key="ue_arpu")
+        gross_margin = st.slider("Gross Margin (%)", 0, 100, 70, key="ue_gross_margin") / 100
+        monthly_churn = st.slider("Monthly Churn (%)", 0.0, 30.0, 3.0, 0.5, key="ue_churn") / 100
+        cac = st.number_input("Customer Acquisition Cost ($)", min_value=0.0, value=500.0, key="ue_cac")
+    with col2:
+        fixed_costs = st.number_input("Fixed Costs per Month ($)", min_value=0.0, value=20000.0, key="ue_fixed_costs")
+        new_customers = st.number_input("New Customers in Month 1", min_value=0.0, value=50.0, key="ue_new_customers")
+        new_customer_growth = st.slider("Monthly Growth of New Customers (%)", 0.0, 30.0, 5.0, 0.5, key="ue_growth") / 100
+        starting_customers = st.number_input("Current Customers", min_value=0.0, value=0.0, key="ue_customers")
+    
+    inputs = dict(
+        arpu=arpu, gross_margin=gross_margin, monthly_churn=monthly_churn, cac=cac,
+        fixed_costs=fixed_costs, new_customers=new_customers,
+        new_customer_growth=new_customer_growth, starting_customers=starting_customers
+    )
+    result = unit_economics(**inputs)
+    
+    st.markdown("### Results")
+    st.markdown(format_unit_economics(result))
+    
+    months = list(range(1, len(result["customers"]) + 1))
+    col1, col2 = st.columns(2)
+    with col1:
+        fig = px.line(x=list(range(len(result["retention"]))), y=result["retention"] * 100,
+                      title="Cohort Retention", labels={"x": "Months since Acquisition", "y": "Customers Retained (%)"})
+        st.plotly_chart(fig, use_container_width=True)
+    with col2:
+        fig = px.line(x=months, y=result["cumulative_result"], title="Cumulative Operating Result",
+                      labels={"x": "Month", "y": "Cumulative Result ($)"})
+        fig.add_hline(y=0, line_dash="dash", line_color="red")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # What-if sweep of CAC and churn around the current inputs, evaluated in one call
+    cac_values = tuple(np.linspace(max(cac, 1.0) * 0.25, max(cac, 1.0) * 2, 60).round(2))
+    churn_values = tuple(np.linspace(0.005, max(monthly_churn, 0.01) * 2, 60).round(4))
+    base = {key: value for key, value in inputs.items() if key not in ("cac", "monthly_churn")}
+    sweep = sweep_unit_economics("cac", cac_values, "monthly_churn", churn_values, **base)
+    fig = px.imshow(
+        np.minimum(sweep["ltv_cac"], 10),
+        x=list(cac_values),
+        y=[churn * 100 for churn in churn_values],
+        origin="lower",
+        aspect="auto",
+        color_continuous_scale="RdYlGn",
+        title="LTV:CAC by CAC and Churn (capped at 10x)",
+        labels={"x": "CAC ($)", "y": "Monthly Churn (%)", "color": "LTV:CAC"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_slide_markdown(slide_key: str, slide: Dict[str, Any]) -> str:
+    """
+    Render one pitch deck slide as Markdown, following PITCH_DECK_LAYOUT.
+    
+    Args:
+        slide_key (str): Key of the slide, e.g. "problem_slide"
+        slide (dict): The slide content
+        
+    Returns:
+        str: Markdown for the slide
+    """
+    layout = next(item for item in PITCH_DECK_LAYOUT if item["key"] == slide_key)
+    lines = [f"#### {layout['title']}"] if layout["title"] else []
+    
+    for field, label, kind in layout["fields"]:
+        value = slide.get(field, "")
+        if kind == "heading":
+            lines.append(f"#### {value}")
+        elif kind == "tagline":
+            lines.append(f"*{value}*")
+        elif kind == "text":
+            lines.append(value)
+        elif kind == "labeled":
+            lines.append(f"**{label}:** {value}")
+        elif kind == "list":
+            lines.append(f"**{label}:**")
+            lines.append("\n".join(f"- {item}" for item in value))
+    
+    return "\n\n".join(lines)
 
 def display_pitch_deck_generator():
     """Display the Pitch Deck Generator section."""
@@ -258,110 +393,90 @@ def display_pitch_deck_generator():
     business_model = st.text_area("Business Model (Optional)", key="business_model")
     market_size = st.text_area("Market Size (Optional)", key="market_size")
     funding_needed = st.text_area("Funding Needed (Optional)", key="funding_needed")
+    generation_mode = st.radio(
+        "Generation Mode",
+        ["Parallel slides", "Single streamed request"],
+        horizontal=True,
+        key="pitch_deck_generation_mode",
+        help="Parallel slides sends one request per slide; a single streamed request uses fewer tokens and shows slides as they are written."
+    )
+    regenerate_pd = st.checkbox("Regenerate (ignore cached result)", key="regenerate_pd")
     
     if st.button("Generate Pitch Deck"):
         if not all([problem_pd, solution_pd, target_group_pd]):
             st.warning("Please fill in all required fields.")
             return
-            
+        
+        st.markdown("### 📊 Pitch Deck Outline")
+        
+        # One placeholder per slide, filled in as soon as that slide is generated
+        placeholders = {}
+        for layout in PITCH_DECK_LAYOUT:
+            placeholders[layout["key"]] = st.empty()
+            placeholders[layout["key"]].markdown(f"*Generating {SLIDE_TITLES[layout['key']]} slide...*")
+        
+        pitch_deck = {}
         with st.spinner("Generating Pitch Deck..."):
-            pitch_deck = generate_pitch_deck(
-                problem=problem_pd,
-                solution=solution_pd,
-                target_group=target_group_pd,
-                business_model=business_model if business_model else None,
-                market_size=market_size if market_size else None,
-                funding_needed=funding_needed if funding_needed else None
-            )
-            
-            st.markdown("### 📊 Pitch Deck Outline")
-            
-            # Title Slide
-            st.markdown(f"#### {pitch_deck['title_slide']['company_name']}")
-            st.markdown(f"*{pitch_deck['title_slide']['tagline']}*")
-            
-            # Problem Slide
-            st.markdown("#### Problem")
-            st.markdown(pitch_deck["problem_slide"]["main_problem"])
-            st.markdown("**Key Pain Points:**")
-            for point in pitch_deck["problem_slide"]["key_pain_points"]:
-                st.markdown(f"- {point}")
-            st.markdown("**Current Solutions:**")
-            for solution in pitch_deck["problem_slide"]["current_solutions"]:
-                st.markdown(f"- {solution}")
-                
-            # Solution Slide
-            st.markdown("#### Solution")
-            st.markdown(pitch_deck["solution_slide"]["main_solution"])
-            st.markdown("**Key Features:**")
-            for feature in pitch_deck["solution_slide"]["key_features"]:
-                st.markdown(f"- {feature}")
-            st.markdown(f"**Unique Value:** {pitch_deck['solution_slide']['unique_value']}")
-                
-            # Market Slide
-            st.markdown("#### Market")
-            st.markdown(f"**Target Market:** {pitch_deck['market_slide']['target_market']}")
-            st.markdown(f"**Market Size:** {pitch_deck['market_slide']['market_size']}")
-            st.markdown(f"**Growth Potential:** {pitch_deck['market_slide']['growth_potential']}")
-            st.markdown("**Market Trends:**")
-            for trend in pitch_deck["market_slide"]["market_trends"]:
-                st.markdown(f"- {trend}")
-                
-            # Business Model Slide
-            st.markdown("#### Business Model")
-            st.markdown(f"**Revenue Model:** {pitch_deck['business_model_slide']['revenue_model']}")
-            st.markdown("**Key Metrics:**")
-            for metric in pitch_deck["business_model_slide"]["key_metrics"]:
-                st.markdown(f"- {metric}")
-            st.markdown("**Cost Structure:**")
-            for cost in pitch_deck["business_model_slide"]["cost_structure"]:
-                st.markdown(f"- {cost}")
-                
-            # Go-to-Market Slide
-            st.markdown("#### Go-to-Market Strategy")
-            st.markdown(f"**Strategy:** {pitch_deck['go_to_market_slide']['strategy']}")
-            st.markdown("**Channels:**")
-            for channel in pitch_deck["go_to_market_slide"]["channels"]:
-                st.markdown(f"- {channel}")
-            st.markdown("**Timeline:**")
-            for milestone in pitch_deck["go_to_market_slide"]["timeline"]:
-                st.markdown(f"- {milestone}")
-                
-            # Team Slide
-            st.markdown("#### Team")
-            st.markdown("**Key Roles:**")
-            for role in pitch_deck["team_slide"]["key_roles"]:
-                st.markdown(f"- {role}")
-            st.markdown("**Team Strengths:**")
-            for strength in pitch_deck["team_slide"]["team_strengths"]:
-                st.markdown(f"- {strength}")
-            st.markdown("**Hiring Plan:**")
-            for hire in pitch_deck["team_slide"]["hiring_plan"]:
-                st.markdown(f"- {hire}")
-                
-            # Financials Slide
-            st.markdown("#### Financials")
-            st.markdown(f"**Funding Needed:** {pitch_deck['financials_slide']['funding_needed']}")
-            st.markdown("**Use of Funds:**")
-            for use in pitch_deck["financials_slide"]["use_of_funds"]:
-                st.markdown(f"- {use}")
-            st.markdown("**Financial Projections:**")
-            for projection in pitch_deck["financials_slide"]["financial_projections"]:
-                st.markdown(f"- {projection}")
-                
-            # Call to Action Slide
-            st.markdown("#### Call to Action")
-            st.markdown("**Next Steps:**")
-            for step in pitch_deck["call_to_action"]["next_steps"]:
-                st.markdown(f"- {step}")
-            st.markdown(f"**Contact Info:** {pitch_deck['call_to_action']['contact_info']}")
-            st.markdown(f"**Investment Terms:** {pitch_deck['call_to_action']['investment_terms']}")
-            
-            # Add PDF download button
-            pdf_bytes = create_pitch_deck_pdf(pitch_deck)
-            st.download_button(
-                label="Download Pitch Deck as PDF",
-                data=pdf_bytes,
-                file_name=f"{pitch_deck['title_slide']['company_name'].replace(' ', '_')}_Pitch_Deck.pdf",
-                mime="application/pdf"
-            ) 
\ No newline at end of file
+            generate = generate_pitch_deck_slides if generation_mode == "Parallel slides" else stream_pitch_deck
+            try:
+                for slide_key, slide in generate(
+                    problem=problem_pd,
+                    solution=solution_pd,
+                    target_group=target_group_pd,
+                    business_model=business_model if business_model else None,
+                    market_size=market_size if market_size else None,
+                    funding_needed=funding_needed if funding_needed else None,
+                    regenerate=regenerate_pd
+                ):
+                    pitch_deck[slide_key] = slide
+                    placeholders[slide_key].markdown(render_slide_markdown(slide_key, slide))
+            except BudgetExceededError as e:
+                # An incomplete deck is neither kept nor rendered to PDF
+                display_budget_warning(e)
+                return
+        
+        # Keep the deck across reruns and start rendering its PDF in the background
+        st.session_state.pitch_deck = pitch_deck
+        submit_pdf_job(pitch_deck)
+    elif "pitch_deck" in st.session_state:
+        st.markdown("### 📊 Pitch Deck Outline")
+        for layout in PITCH_DECK_LAYOUT:
+            st.markdown(render_slide_markdown(layout["key"], st.session_state.pitch_deck[layout["key"]]))
+    
+    if "pitch_deck" in st.session_state:
+        display_pitch_deck_download(st.session_state.pitch_deck)
+
+def display_pitch_deck_download(pitch_deck: Dict[str, Any]):
+    """
+    Offer the PDF of the pitch deck for download once its background render has finished.
+    
+    The PDF is cached by the deck's content, so reruns with an unchanged deck
+    reuse it and only an edited deck is rendered again.
+    
+    Args:
+        pitch_deck (dict): The pitch deck
+    """
+    job = submit_pdf_job(pitch_deck)
+    if not job.done():
+        _wait_for_pdf_job(job.id)
+        return
+    
+    try:
+        pdf_bytes = job.result()
+    except Exception as e:
+        st.error(f"Could not create the PDF: {str(e)}")
+        return
+    st.download_button(
+        label="Download Pitch Deck as PDF",
+        data=pdf_bytes,
+        file_name=f"{pitch_deck['title_slide']['company_name'].replace(' ', '_')}_Pitch_Deck.pdf",
+        mime="application/pdf"
+    )
+
+@st.fragment(run_every=1)
+def _wait_for_pdf_job(job_id: str):
+    """Poll a PDF job and rerun the page once, when the PDF is ready."""
+    job = get_pdf_job(job_id)
+    if job is None or job.done():
+        st.rerun()
+    st.caption("⏳ Rendering PDF...")
@@ -9,9 +9,12 @@ TRANSLATIONS = {
         "thinking": "Thinking...",
         "sources": "Sources:",
         "no_sources": "No sources available",
+        "load_older": "Load older messages",
+        "budget_exceeded": "The request was not sent because of the usage limits.",
         "tools_title": "Startup Tools",
         "bmc_title": "Business Model Canvas Generator",
         "pitch_title": "Pitch Deck Generator",
+        "unit_economics_title": "Unit Economics Calculator",
         "problem": "Problem Statement",
         "solution": "Solution",
         "target_group": "Target Group",
@@ -36,9 +39,12 @@ TRANSLATIONS = {
         "thinking": "Denke...",
         "sources": "Quellen:",
         "no_sources": "Keine Quellen verfügbar",
+        "load_older": "Ältere Nachrichten laden",
+        "budget_exceeded": "Die Anfrage wurde wegen der Nutzungslimits nicht gesendet.",
         "tools_title": "Startup Tools",
         "bmc_title": "Business Model Canvas Generator",
         "pitch_title": "Pitch Deck Generator",
+        "unit_economics_title": "Unit-Economics-Rechner",
         "problem": "Problemstellung",
         "solution": "Lösung",
         "target_group": "Zielgruppe",
@@ -0,0 +1,227 @@
+"""Vectorized unit economics: CAC, LTV, payback, retention, gross margin and break-even.
+
+Every input may be a scalar or an array. Inputs are broadcast against each other,
+so thousands of what-if combinations are evaluated in one call. The cached
+entry points (unit_economics and sweep_unit_economics) take hashable scalars
+and tuples and memoize their results per input set.
+
+Conventions:
+    - Amounts are per month and per customer unless noted otherwise.
+    - Rates are fractions (0.05 = 5%); churn and growth are monthly, the discount rate is annual.
+    - Retention is the share of a cohort left after 0..horizon months; payback and
+      break-even are month numbers, 1 being a customer's (or the plan's) first month.
+"""
+
+import json
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+DEFAULT_HORIZON_MONTHS = 60
+
+# Parameters of calculate_unit_economics, for sweeps and the chat tool
+UNIT_ECONOMICS_INPUTS = {
+    "arpu": "Average monthly revenue per customer ($)",
+    "gross_margin": "Gross margin as a fraction of revenue (0.7 = 70%)",
+    "monthly_churn": "Share of customers lost per month (0.03 = 3%)",
+    "cac": "Customer acquisition cost per new customer ($)",
+    "fixed_costs": "Fixed operating costs per month ($)",
+    "new_customers": "New customers acquired in the first month",
+    "new_customer_growth": "Monthly growth of new customer acquisition (0.05 = 5%)",
+    "starting_customers": "Customers at the start of the plan",
+    "annual_discount_rate": "Annual discount rate for LTV (0.1 = 10%)"
+}
+
+# Function-calling schema, so the chat can extract inputs from a question
+UNIT_ECONOMICS_FUNCTION_SCHEMA = {
+    "name": "calculate_unit_economics",
+    "description": "Calculate CAC payback, LTV, LTV:CAC, gross margin and break-even month from a startup's unit economics",
+    "parameters": {
+        "type": "object",
+        "properties": {
+            name: {"type": "number", "description": description}
+            for name, description in UNIT_ECONOMICS_INPUTS.items()
+        },
+        "required": ["arpu", "gross_margin", "monthly_churn", "cac"]
+    }
+}
+
+def customer_acquisition_cost(sales_and_marketing_spend: Any, new_customers: Any) -> np.ndarray:
+    """CAC from spend and customers acquired in the same period; inf without new customers."""
+    spend = np.asarray(sales_and_marketing_spend, dtype=float)
+    customers = np.asarray(new_customers, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(customers > 0, spend / customers, np.inf)
+
+def retention_curve(monthly_churn: Any, months: int = DEFAULT_HORIZON_MONTHS) -> np.ndarray:
+    """Share of a cohort still active at the start of months 0..months, one row per churn rate."""
+    churn = np.atleast_1d(np.asarray(monthly_churn, dtype=float))
+    return (1 - churn[..., None]) ** np.arange(months + 1)
+
+def calculate_unit_economics(arpu: Any, gross_margin: Any, monthly_churn: Any, cac: Any,
+                             fixed_costs: Any = 0.0, new_customers: Any = 0.0, new_customer_growth: Any = 0.0,
+                             starting_customers: Any = 0.0, annual_discount_rate: Any = 0.0,
+                             horizon_months: int = DEFAULT_HORIZON_MONTHS) -> Dict[str, np.ndarray]:
+    """
+    Calculate unit economics for one or many input combinations.
+
+    LTV is the discounted gross profit of a customer over its expected lifetime
+    with geometric retention. Payback is the month in which a customer's
+    cumulative gross profit covers its CAC. The break-even month is the first
+    month in which the company plan (acquisition of new customers, their gross
+    profit, CAC and fixed costs) has a non-negative operating result.
+
+    Args:
+        arpu, gross_margin, monthly_churn, cac, fixed_costs, new_customers,
+        new_customer_growth, starting_customers, annual_discount_rate:
+            See UNIT_ECONOMICS_INPUTS; scalars or arrays that broadcast together
+        horizon_months (int): Months of the retention curve and the company plan
+
+    Returns:
+        dict: Arrays in the broadcast shape of the inputs:
+            gross_profit (per customer and month), gross_margin, ltv, ltv_cac,
+            payback_months (inf if never), break_even_month (inf within the horizon)
+        and with a trailing month axis (horizon_months + 1 for retention,
+        horizon_months for the plan):
+            retention, customers, revenue, operating_result, cumulative_result
+    """
+    arpu, gross_margin, churn, cac, fixed_costs, new_customers, new_customer_growth, starting_customers, discount = (
+        np.broadcast_arrays(*(
+            np.asarray(value, dtype=float)
+            for value in (arpu, gross_margin, monthly_churn, cac, fixed_costs, new_customers,
+                          new_customer_growth, starting_customers, annual_discount_rate)
+        ))
+    )
+    gross_profit = arpu * gross_margin
+    survival = 1 - churn
+    monthly_discount = (1 + discount) ** (1 / 12) - 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Sum of gross_profit * (survival / (1 + d))^t over t >= 0
+        ltv = np.where(churn + monthly_discount > 0,
+                       gross_profit * (1 + monthly_discount) / (churn + monthly_discount), np.inf)
+        ltv_cac = np.where(cac > 0, ltv / cac, np.inf)
+
+        # Smallest n with gross_profit * (1 - survival^n) / churn >= cac
+        remaining = 1 - cac * churn / gross_profit
+        payback = np.where(
+            churn > 0,
+            np.log(np.where(remaining > 0, remaining, np.nan)) / np.log(np.where(churn < 1, survival, np.nan)),
+            cac / gross_profit
+        )
+    payback = np.where(np.isfinite(payback) & (gross_profit > 0), np.ceil(payback - 1e-9), np.inf)
+    payback = np.where(cac <= 0, 0.0, payback)
+
+    # Company plan: customers_t = customers_(t-1) * survival + new_t, one month at a time,
+    # with all input combinations advancing together
+    months = np.arange(horizon_months)
+    acquired = new_customers[..., None] * (1 + new_customer_growth[..., None]) ** months
+    customers = np.empty(acquired.shape)
+    active = starting_customers
+    for month in months:
+        active = active * survival + acquired[..., month]
+        customers[..., month] = active
+    revenue = customers * arpu[..., None]
+    operating_result = revenue * gross_margin[..., None] - acquired * cac[..., None] - fixed_costs[..., None]
+
+    profitable = operating_result >= 0
+    break_even = np.where(profitable.any(axis=-1), profitable.argmax(axis=-1) + 1.0, np.inf)
+
+    return {
+        "gross_profit": gross_profit,
+        "gross_margin": gross_margin,
+        "ltv": ltv,
+        "ltv_cac": ltv_cac,
+        "payback_months": payback,
+        "break_even_month": break_even,
+        "retention": retention_curve(churn, horizon_months).reshape(churn.shape + (horizon_months + 1,)),
+        "customers": customers,
+        "revenue": revenue,
+        "operating_result": operating_result,
+        "cumulative_result": np.cumsum(operating_result, axis=-1)
+    }
+
+def _read_only(result: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Mark cached arrays read-only, since every caller shares them."""
+    for values in result.values():
+        values.setflags(write=False)
+    return result
+
+@lru_cache(maxsize=256)
+def unit_economics(arpu: float, gross_margin: float, monthly_churn: float, cac: float,
+                   fixed_costs: float = 0.0, new_customers: float = 0.0, new_customer_growth: float = 0.0,
+                   starting_customers: float = 0.0, annual_discount_rate: float = 0.0,
+                   horizon_months: int = DEFAULT_HORIZON_MONTHS) -> Dict[str, np.ndarray]:
+    """Cached calculate_unit_economics for one scalar input set; the arrays are read-only."""
+    return _read_only(calculate_unit_economics(
+        arpu, gross_margin, monthly_churn, cac, fixed_costs, new_customers, new_customer_growth,
+        starting_customers, annual_discount_rate, horizon_months
+    ))
+
+@lru_cache(maxsize=64)
+def sweep_unit_economics(x_name: str, x_values: Tuple[float, ...], y_name: str, y_values: Tuple[float, ...],
+                         **base: float) -> Dict[str, np.ndarray]:
+    """
+    Cached unit economics over a grid of two inputs, all other inputs fixed.
+
+    Args:
+        x_name, y_name (str): Inputs to vary, keys of UNIT_ECONOMICS_INPUTS
+        x_values, y_values (tuple): Values of the two inputs
+        **base: The fixed inputs, as for calculate_unit_economics
+
+    Returns:
+        dict: The scalar results of calculate_unit_economics with shape
+            (len(y_values), len(x_values)); read-only
+    """
+    for name in (x_name, y_name):
+        if name not in UNIT_ECONOMICS_INPUTS:
+            raise ValueError(f"Unknown unit economics input: {name}")
+    inputs = dict(base)
+    inputs[x_name] = np.asarray(x_values, dtype=float)[None, :]
+    inputs[y_name] = np.asarray(y_values, dtype=float)[:, None]
+    result = calculate_unit_economics(**inputs)
+    return _read_only({
+        key: result[key]
+        for key in ("gross_profit", "ltv", "ltv_cac", "payback_months", "break_even_month")
+    })
+
+def format_unit_economics(result: Dict[str, np.ndarray]) -> str:
+    """Summarize the scalar results of one input set as Markdown."""
+    ltv = float(result["ltv"])
+    ltv_cac = float(result["ltv_cac"])
+    payback = float(result["payback_months"])
+    break_even = float(result["break_even_month"])
+    lines = [
+        f"**Gross Margin:** {float(result['gross_margin']):.0%} "
+        f"(${float(result['gross_profit']):,.2f} gross profit per customer and month)",
+        f"**LTV:** {f'${ltv:,.2f}' if np.isfinite(ltv) else 'unbounded (no churn)'}",
+        f"**LTV:CAC:** {f'{ltv_cac:.1f}x' if np.isfinite(ltv_cac) else 'n/a'}",
+        f"**CAC Payback:** {f'{payback:.0f} months' if np.isfinite(payback) else 'never'}"
+    ]
+    # Break-even needs a company plan (customers or fixed costs), not just per-customer numbers
+    if np.any(result["operating_result"] != 0):
+        lines.append(f"**Break-even:** {f'month {break_even:.0f}' if np.isfinite(break_even) else 'not within the plan horizon'}")
+    if np.isfinite(ltv_cac) and ltv_cac < 3:
+        lines.append("⚠️ An LTV:CAC below 3x usually means acquisition is too expensive for the value a customer brings.")
+    return "\n\n".join(lines)
+
+def answer_unit_economics_call(message: Any) -> Optional[str]:
+    """
+    Answer a model message that calls calculate_unit_economics with the local calculator.
+
+    Args:
+        message: The model's reply, with the function call in its additional_kwargs
+
+    Returns:
+        str: The results as Markdown, or None if the message does not call the calculator
+    """
+    function_call = getattr(message, "additional_kwargs", {}).get("function_call")
+    if not function_call or function_call.get("name") != UNIT_ECONOMICS_FUNCTION_SCHEMA["name"]:
+        return None
+    arguments = json.loads(function_call.get("arguments") or "{}")
+    inputs = {name: float(value) for name, value in arguments.items() if name in UNIT_ECONOMICS_INPUTS}
+    # Percentages given as whole numbers (e.g. 70 for 70%)
+    for name in ("gross_margin", "monthly_churn", "new_customer_growth", "annual_discount_rate"):
+        if inputs.get(name, 0) > 1:
+            inputs[name] /= 100
+    return format_unit_economics(unit_economics(**inputs))
@@ -3,11 +3,13 @@ import sys
 sys.modules['sqlite3'] = sys.modules.pop('pysqlite3')
 from langchain.vectorstores import Chroma
 from langchain.embeddings import OpenAIEmbeddings
-from langchain.chat_models import ChatOpenAI
 from langgraph.graph import StateGraph
 from typing import TypedDict, Dict, Any, List
 from langchain_core.messages import AIMessage, BaseMessage
 import streamlit as st
+from llm_clients import get_chat_model
+from rate_limiter import guard_llm
+from unit_economics import UNIT_ECONOMICS_FUNCTION_SCHEMA, answer_unit_economics_call
 
 @st.cache_resource(show_spinner=False)
 def load_retriever():
@@ -18,7 +20,10 @@ def load_retriever():
 @st.cache_resource(show_spinner=False)
 def create_workflow():
     retriever = load_retriever()
-    llm = ChatOpenAI(temperature=0.2)
+    chat_model = get_chat_model(temperature=0.2)
+    llm = guard_llm(chat_model)
+    # Answers may call the local unit economics calculator instead of guessing numbers
+    answer_llm = guard_llm(chat_model, functions=[UNIT_ECONOMICS_FUNCTION_SCHEMA])
     
     def is_startup_related(question: str) -> bool:
         """Check if the question is related to startups, business, or entrepreneurship."""
@@ -76,11 +81,13 @@ def create_workflow():
         
         Question: {last_message.content}
         
-        Please provide a helpful response based on the context above."""
+        Please provide a helpful response based on the context above. If the question gives
+        unit economics numbers to calculate, call calculate_unit_economics instead."""
         
-        response = llm.invoke(prompt)
+        response = answer_llm.invoke(prompt)
+        content = answer_unit_economics_call(response) or response.content
         return {
-            "messages": messages + [AIMessage(content=response.content)],
+            "messages": messages + [AIMessage(content=content)],
             "context": context,
             "is_startup_related": True
         }